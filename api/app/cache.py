@@ -0,0 +1,136 @@
+"""In-process caching helpers: a bounded LRU cache and request coalescing."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Generic, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """LRU mapping of at most *maxsize* entries, each with its own deadline.
+
+    Entries are evicted least-recently-used first once the cache is full and
+    are dropped lazily on lookup after they expire.  Hit and miss counters
+    are kept for observability.  Instances are meant to be used from a single
+    event loop and are not thread-safe.
+
+    Parameters
+    ----------
+    maxsize:
+        Maximum number of entries kept.
+    ttl_seconds:
+        Default lifetime of an entry; ``None`` means entries only leave the
+        cache through eviction or :meth:`pop`.
+    clock:
+        Monotonic time source, overridable in tests.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl_seconds: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self._maxsize = maxsize
+        self._ttl = ttl_seconds
+        self._clock = clock
+        self._data: OrderedDict[K, tuple[V, float | None]] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    # -- public API -----------------------------------------------------------
+
+    def get(self, key: K) -> V | None:
+        """Return the cached value for *key*, or ``None`` if absent/expired."""
+        entry = self._data.get(key)
+        if entry is None:
+            self._misses += 1
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= self._clock():
+            del self._data[key]
+            self._misses += 1
+            return None
+        self._data.move_to_end(key)
+        self._hits += 1
+        return value
+
+    def set(self, key: K, value: V, ttl_seconds: float | None = None) -> None:
+        """Store *value*; *ttl_seconds* overrides the default lifetime."""
+        ttl = ttl_seconds if ttl_seconds is not None else self._ttl
+        if ttl is not None and ttl <= 0:
+            self._data.pop(key, None)
+            return
+        expires_at = self._clock() + ttl if ttl is not None else None
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        """Remove *key* if present."""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def get_status(self) -> dict:
+        """Return current size and hit/miss counters."""
+        return {
+            "size": len(self._data),
+            "maxsize": self._maxsize,
+            "hits": self._hits,
+            "misses": self._misses,
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SingleFlight(Generic[K, V]):
+    """Coalesce concurrent calls for the same key into one in-flight call.
+
+    The first caller for a key starts the call; callers arriving while it
+    runs await the same result (or exception) instead of starting their own.
+    The key is forgotten as soon as the call finishes, so results are never
+    cached here.  Cancelling one waiter does not cancel the shared call.
+    Instances are meant to be used from a single event loop.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[K, asyncio.Task[V]] = {}
+
+    async def do(self, key: K, fn: Callable[[], Awaitable[V]]) -> V:
+        """Return the result of ``fn()``, sharing an in-flight call for *key*."""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        return await asyncio.shield(task)
+
+    def in_flight(self, key: K) -> bool:
+        return key in self._calls
+
+    def _forget(self, key: K, task: asyncio.Task[V]) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+    def __len__(self) -> int:
+        return len(self._calls)
@@ -1,8 +1,31 @@
+from typing import Literal
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class DatabaseSettings(BaseSettings):
+    """PostgreSQL connection and pool tuning.
+
+    Environment variables (all optional, defaults shown):
+      DB_STATEMENT_CACHE_SIZE              – prepared statements cached per
+                                             connection; 0 behind PgBouncer in
+                                             transaction mode (default: 100)
+      DB_MAX_INACTIVE_CONNECTION_LIFETIME  – seconds before idle connections
+                                             above the minimum are closed
+                                             (default: 300)
+      DB_COMMAND_TIMEOUT                   – default statement timeout in
+                                             seconds (default: unset)
+      DB_REPLICA_DSNS                      – comma-separated read replica
+                                             DSNs for event listings and
+                                             exports (default: none)
+      DB_REPLICA_CHECK_INTERVAL_SECONDS    – replica health check period
+                                             (default: 5)
+      DB_REPLICA_MAX_LAG_SECONDS           – replication lag beyond which a
+                                             replica stops serving reads
+                                             (default: 10)
+    """
+
     host: str = "localhost"
     port: int = 5432
     user: str = "forge"
@@ -10,6 +33,12 @@ class DatabaseSettings(BaseSettings):
     name: str = "forgestream"
     min_pool_size: int = 5
     max_pool_size: int = 20
+    statement_cache_size: int = 100
+    max_inactive_connection_lifetime: float = 300.0
+    command_timeout: float | None = None
+    replica_dsns: str = ""
+    replica_check_interval_seconds: float = 5.0
+    replica_max_lag_seconds: float | None = 10.0
 
     @property
     def dsn(self) -> str:
@@ -18,13 +47,33 @@ class DatabaseSettings(BaseSettings):
             f"@{self.host}:{self.port}/{self.name}"
         )
 
+    @property
+    def replicas(self) -> list[str]:
+        return [dsn.strip() for dsn in self.replica_dsns.split(",") if dsn.strip()]
+
     model_config = SettingsConfigDict(env_prefix="DB_")
 
 
 class RedisSettings(BaseSettings):
+    """Redis connection and cache value encoding.
+
+    Environment variables (all optional, defaults shown):
+      REDIS_CODEC             – ``json``, ``orjson`` or ``msgpack`` for cached
+                                values (default: json)
+      REDIS_COMPRESSION       – ``none``, ``zlib``, ``zstd`` or ``lz4``
+                                (default: none)
+      REDIS_COMPRESS_MIN_BYTES – compress encoded values at least this large
+                                (default: 1024)
+
+    msgpack, zstd and lz4 need the ``cache`` extra.
+    """
+
     host: str = "localhost"
     port: int = 6379
     db: int = 0
+    codec: Literal["json", "orjson", "msgpack"] = "json"
+    compression: Literal["none", "zlib", "zstd", "lz4"] = "none"
+    compress_min_bytes: int = 1024
 
     model_config = SettingsConfigDict(env_prefix="REDIS_")
 
@@ -67,15 +116,99 @@ class RateLimitSettings(BaseSettings):
                                     callers (default: 200)
       RATE_LIMIT_WINDOW_SECONDS   – sliding window length in seconds
                                     (default: 60)
+      RATE_LIMIT_ALGORITHM        – ``sliding_log`` (exact, one sorted-set
+                                    member per request) or
+                                    ``sliding_window_counter`` (approximate,
+                                    one small hash per key)
+                                    (default: sliding_log)
     """
 
     unauthenticated: int = 60
     authenticated: int = 200
     window_seconds: int = 60
+    algorithm: Literal["sliding_log", "sliding_window_counter"] = "sliding_log"
 
     model_config = SettingsConfigDict(env_prefix="RATE_LIMIT_")
 
 
+class UserCacheSettings(BaseSettings):
+    """Settings for the in-process cache of authenticated user rows.
+
+    Environment variables (all optional, defaults shown):
+      USER_CACHE_MAXSIZE      – max users kept per process (default: 10000)
+      USER_CACHE_TTL_SECONDS  – lifetime of a cached user (default: 60)
+      USER_CACHE_PUBSUB       – broadcast invalidations to other replicas
+                                over Redis pub/sub (default: true)
+    """
+
+    maxsize: int = 10_000
+    ttl_seconds: int = 60
+    pubsub: bool = True
+
+    model_config = SettingsConfigDict(env_prefix="USER_CACHE_")
+
+
+class PasswordHashingSettings(BaseSettings):
+    """Settings for the worker pool that runs argon2 off the event loop.
+
+    Environment variables (all optional, defaults shown):
+      PASSWORD_HASH_EXECUTOR         – ``thread`` or ``process``
+                                       (default: thread)
+      PASSWORD_HASH_MAX_WORKERS      – executor size (default: 4)
+      PASSWORD_HASH_MAX_CONCURRENCY  – hashes admitted at once; extra callers
+                                       queue (default: same as max_workers)
+    """
+
+    executor: Literal["thread", "process"] = "thread"
+    max_workers: int = 4
+    max_concurrency: int | None = None
+
+    model_config = SettingsConfigDict(env_prefix="PASSWORD_HASH_")
+
+
+class AnalyticsSettings(BaseSettings):
+    """Settings for analytics ingestion.
+
+    Environment variables (all optional, defaults shown):
+      ANALYTICS_BUFFER_MAX_EVENTS        – write-behind queue capacity
+                                           (default: 10000)
+      ANALYTICS_BUFFER_BATCH_SIZE        – events per bulk write (default: 500)
+      ANALYTICS_BUFFER_FLUSH_INTERVAL_MS – max wait before a partial batch is
+                                           written (default: 200)
+      ANALYTICS_BUFFER_OVERFLOW          – ``drop`` (shed load) or ``block``
+                                           (backpressure) when the queue is
+                                           full (default: drop)
+      ANALYTICS_PARTITIONS_AHEAD_MONTHS  – monthly usage_events partitions to
+                                           pre-create (default: 3)
+      ANALYTICS_RETENTION_MONTHS         – full months of events kept before
+                                           the current one (default: 12)
+      ANALYTICS_RETENTION_ACTION         – ``detach`` or ``drop`` expired
+                                           partitions (default: detach)
+      ANALYTICS_STATS_STORAGE            – rollup tier storage: ``jsonb``
+                                           (events_by_type document) or
+                                           ``columnar`` (per-type counter
+                                           rows) (default: jsonb)
+      ANALYTICS_LIVE_COUNTERS            – accumulate rollup increments in
+                                           Redis and flush them in bulk
+                                           (default: false)
+      ANALYTICS_COUNTER_FLUSH_INTERVAL_MS – live counter flush period in
+                                           milliseconds (default: 1000)
+    """
+
+    buffer_max_events: int = 10_000
+    buffer_batch_size: int = 500
+    buffer_flush_interval_ms: int = 200
+    buffer_overflow: Literal["block", "drop"] = "drop"
+    partitions_ahead_months: int = 3
+    retention_months: int = 12
+    retention_action: Literal["detach", "drop"] = "detach"
+    stats_storage: Literal["jsonb", "columnar"] = "jsonb"
+    live_counters: bool = False
+    counter_flush_interval_ms: int = 1000
+
+    model_config = SettingsConfigDict(env_prefix="ANALYTICS_")
+
+
 class Settings(BaseSettings):
     env: str = "development"
     log_level: str = "info"
@@ -91,6 +224,11 @@ class Settings(BaseSettings):
     smtp: SMTPSettings = Field(default_factory=SMTPSettings)
     github: GitHubOAuthSettings = Field(default_factory=GitHubOAuthSettings)
     rate_limit: RateLimitSettings = Field(default_factory=RateLimitSettings)
+    user_cache: UserCacheSettings = Field(default_factory=UserCacheSettings)
+    password_hashing: PasswordHashingSettings = Field(
+        default_factory=PasswordHashingSettings
+    )
+    analytics: AnalyticsSettings = Field(default_factory=AnalyticsSettings)
 
     @property
     def cors_origins(self) -> list[str]:
@@ -15,10 +15,13 @@ from app.repositories.oauth_account import OAuthAccountRepository
 from app.repositories.password_reset import PasswordResetRepository
 from app.repositories.refresh_token import RefreshTokenRepository
 from app.repositories.user import UserRepository
+from app.repositories.user_cache import UserCache
 from app.security.encryption import EncryptionManager
-from app.security.jwt import JWTManager
-from app.security.password import PasswordManager
+from app.security.jwt import JWTManager, TokenPayload, get_token_payload_cache
+from app.security.password import HashingPool, PasswordManager
 from app.services.analytics import AnalyticsService
+from app.services.analytics_buffer import AnalyticsEventBuffer
+from app.services.analytics_counters import LiveUsageCounters
 from app.services.auth import AuthService
 
 bearer_scheme = HTTPBearer()
@@ -45,10 +48,15 @@ def get_github_provider(request: Request) -> GitHubOAuthProvider:
     return request.app.state.github_provider
 
 
+def get_user_cache(request: Request) -> UserCache | None:
+    return getattr(request.app.state, "user_cache", None)
+
+
 def get_user_repository(
     db: DatabaseProvider = Depends(get_db_provider),
+    cache: UserCache | None = Depends(get_user_cache),
 ) -> UserRepository:
-    return UserRepository(db)
+    return UserRepository(db, cache=cache)
 
 
 def get_refresh_token_repository(
@@ -77,11 +85,29 @@ def get_jwt_manager(
         algorithm=settings.jwt.algorithm,
         access_expire_minutes=settings.jwt.access_token_expire_minutes,
         refresh_expire_days=settings.jwt.refresh_token_expire_days,
+        cache=get_token_payload_cache(),
+    )
+
+
+@lru_cache
+def get_hashing_pool() -> HashingPool:
+    settings = get_cached_settings().password_hashing
+    return HashingPool(
+        max_workers=settings.max_workers,
+        max_concurrency=settings.max_concurrency,
+        kind=settings.executor,
     )
 
 
+def shutdown_hashing_pool() -> None:
+    """Shut down the hashing pool if one was created, and forget it."""
+    if get_hashing_pool.cache_info().currsize:
+        get_hashing_pool().shutdown()
+        get_hashing_pool.cache_clear()
+
+
 def get_password_manager() -> PasswordManager:
-    return PasswordManager()
+    return PasswordManager(pool=get_hashing_pool())
 
 
 @lru_cache
@@ -122,30 +148,55 @@ def get_auth_service(
 
 def get_analytics_repository(
     db: DatabaseProvider = Depends(get_db_provider),
+    settings: Settings = Depends(get_cached_settings),
 ) -> AnalyticsRepository:
-    return AnalyticsRepository(db)
+    return AnalyticsRepository(
+        db, stats_storage=settings.analytics.stats_storage
+    )
+
+
+def get_live_counters(request: Request) -> LiveUsageCounters | None:
+    return getattr(request.app.state, "live_counters", None)
 
 
 def get_analytics_service(
     analytics_repo: AnalyticsRepository = Depends(get_analytics_repository),
     redis: RedisProvider = Depends(get_redis_provider),
+    counters: LiveUsageCounters | None = Depends(get_live_counters),
 ) -> AnalyticsService:
-    return AnalyticsService(analytics_repo=analytics_repo, redis=redis)
+    return AnalyticsService(
+        analytics_repo=analytics_repo, redis=redis, counters=counters
+    )
+
+
+def get_analytics_buffer(request: Request) -> AnalyticsEventBuffer:
+    buffer = getattr(request.app.state, "analytics_buffer", None)
+    if buffer is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Analytics buffer unavailable",
+        )
+    return buffer
 
 
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
     jwt_manager: JWTManager = Depends(get_jwt_manager),
     user_repo: UserRepository = Depends(get_user_repository),
 ) -> UserInDB:
-    token = credentials.credentials
-    try:
-        payload = jwt_manager.decode_token(token)
-    except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token",
-        )
+    # The rate limiter has usually decoded this same bearer token already.
+    payload: TokenPayload | None = getattr(
+        request.state, "token_payload", None
+    )
+    if payload is None:
+        try:
+            payload = jwt_manager.decode_token(credentials.credentials)
+        except JWTError:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired token",
+            )
 
     if payload.type != "access":
         raise HTTPException(
@@ -153,17 +204,17 @@ async def get_current_user(
             detail="Invalid token type",
         )
 
-    user = await user_repo.find_by_id(payload.sub)
+    user = await user_repo.get_by_id(payload.sub)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
 
-    if not user["is_active"]:
+    if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Account disabled",
         )
 
-    return UserInDB(**user)
+    return user
@@ -1,17 +1,35 @@
+import asyncio
 import logging
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import get_settings
-from app.middleware.rate_limit import RateLimitMiddleware
+from app.dependencies import shutdown_hashing_pool
+from app.middleware.rate_limit import (
+    RateLimitMiddleware,
+    register_rate_limit_scripts,
+)
+from app.providers.cache_codec import build_cache_codec
 from app.providers.database import DatabaseProvider
 from app.providers.email import SMTPEmailProvider
 from app.providers.github import GitHubOAuthProvider
 from app.providers.redis import RedisProvider
+from app.repositories.analytics import AnalyticsRepository
+from app.repositories.user_cache import UserCache
 from app.routers.analytics import router as analytics_router
 from app.routers.auth import router as auth_router
+from app.services.analytics import (
+    AnalyticsService,
+    register_summary_cache_scripts,
+)
+from app.services.analytics_buffer import AnalyticsEventBuffer
+from app.services.analytics_counters import (
+    AnalyticsCounterFlusher,
+    LiveUsageCounters,
+    register_live_counter_scripts,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -24,9 +42,24 @@ async def lifespan(app: FastAPI):
         settings.db.dsn,
         settings.db.min_pool_size,
         settings.db.max_pool_size,
+        statement_cache_size=settings.db.statement_cache_size,
+        max_inactive_connection_lifetime=(
+            settings.db.max_inactive_connection_lifetime
+        ),
+        command_timeout=settings.db.command_timeout,
+        replica_dsns=settings.db.replicas,
+        replica_check_interval=settings.db.replica_check_interval_seconds,
+        replica_max_lag=settings.db.replica_max_lag_seconds,
     )
     redis = RedisProvider(
-        settings.redis.host, settings.redis.port, settings.redis.db
+        settings.redis.host,
+        settings.redis.port,
+        settings.redis.db,
+        codec=build_cache_codec(
+            settings.redis.codec,
+            settings.redis.compression,
+            settings.redis.compress_min_bytes,
+        ),
     )
     email = SMTPEmailProvider(
         host=settings.smtp.host,
@@ -42,17 +75,68 @@ async def lifespan(app: FastAPI):
         redirect_uri=settings.github.redirect_uri,
     )
 
+    register_rate_limit_scripts(redis)
+    register_live_counter_scripts(redis)
+    register_summary_cache_scripts(redis)
+
     await db.connect()
     await redis.connect()
     logger.info("Database and Redis connected")
 
+    user_cache = UserCache(
+        maxsize=settings.user_cache.maxsize,
+        ttl_seconds=settings.user_cache.ttl_seconds,
+        redis=redis if settings.user_cache.pubsub else None,
+    )
+    user_cache_listener = asyncio.create_task(user_cache.listen())
+
+    analytics_repo = AnalyticsRepository(
+        db, stats_storage=settings.analytics.stats_storage
+    )
+    live_counters = None
+    counter_flusher = None
+    if settings.analytics.live_counters:
+        live_counters = LiveUsageCounters(redis)
+        counter_flusher = AnalyticsCounterFlusher(
+            live_counters,
+            analytics_repo,
+            flush_interval=settings.analytics.counter_flush_interval_ms / 1000,
+        )
+        counter_flusher.start()
+
+    analytics_buffer = AnalyticsEventBuffer(
+        AnalyticsService(
+            analytics_repo=analytics_repo,
+            redis=redis,
+            counters=live_counters,
+        ),
+        max_events=settings.analytics.buffer_max_events,
+        batch_size=settings.analytics.buffer_batch_size,
+        flush_interval=settings.analytics.buffer_flush_interval_ms / 1000,
+        overflow=settings.analytics.buffer_overflow,
+    )
+    analytics_buffer.start()
+
     app.state.db_provider = db
     app.state.redis_provider = redis
     app.state.email_provider = email
     app.state.github_provider = github
+    app.state.user_cache = user_cache
+    app.state.analytics_buffer = analytics_buffer
+    app.state.live_counters = live_counters
 
     yield
 
+    # Drain buffered analytics while the database and Redis are still up.
+    await analytics_buffer.stop()
+    if counter_flusher is not None:
+        await counter_flusher.stop()
+
+    user_cache_listener.cancel()
+    with suppress(asyncio.CancelledError):
+        await user_cache_listener
+
+    shutdown_hashing_pool()
     await db.disconnect()
     await redis.disconnect()
     logger.info("Database and Redis disconnected")
@@ -83,6 +167,11 @@ async def health_check():
     return {"status": "ok"}
 
 
+@app.get("/health/db-pool")
+async def db_pool_status():
+    return app.state.db_provider.get_status()
+
+
 @app.post("/generate")
 async def generate(req: GenerateRequest):
     try:
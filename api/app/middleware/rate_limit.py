@@ -20,21 +20,42 @@ On every request:
    keys automatically.
 
 Steps 1–5 are executed atomically in a single Lua script to prevent
-concurrent requests from racing past the limit check.
+concurrent requests from racing past the limit check.  The script is
+registered with :class:`~app.providers.redis.RedisProvider` under
+``RATE_LIMIT_SCRIPT``; it is loaded once with ``SCRIPT LOAD`` and then run
+with ``EVALSHA`` so the source is not re-sent and re-hashed per request.
 
 This provides a true sliding window (no boundary spikes) at O(log N) per
 request, where N is the number of requests in the current window.
 
+Sliding window counter (approximate)
+------------------------------------
+With ``RATE_LIMIT_ALGORITHM=sliding_window_counter`` each key is instead a
+small hash holding two fixed-window buckets: the request count of the
+current window and of the previous one.  The in-window count is estimated
+as::
+
+    previous * (1 - elapsed_in_current / window) + current
+
+which smooths boundary spikes without storing one member per request.
+Memory per key is O(1) and each request costs a single ``HMGET``/``HSET``
+pair, at the price of assuming requests in the previous window were evenly
+distributed.  Counter keys use the ``rlc:`` prefix so switching algorithms
+never collides with existing sorted-set keys.
+
 Rate-limit tiers
 ----------------
 * **Auth routes** (signup, login, refresh, password-reset): fixed per-route
   limits applied on a *per-IP* basis regardless of authentication status.
 * **Authenticated callers** (valid ``Authorization: Bearer <token>`` header):
   ``RATE_LIMIT_AUTHENTICATED`` requests per window, keyed on user UUID.
+  The decoded :class:`~app.security.jwt.TokenPayload` is stored on
+  ``request.state.token_payload`` for ``get_current_user`` to reuse.
 * **Unauthenticated callers**: ``RATE_LIMIT_UNAUTHENTICATED`` requests per
   window, keyed on client IP.
 
-Key format: ``rl:{scope}:{identifier}:{route_prefix}``
+Key format: ``rl:{scope}:{identifier}:{route_prefix}`` (``rlc:`` for the
+sliding window counter)
   - *scope*        – ``user`` or ``ip``
   - *identifier*   – user UUID or client IP address
   - *route_prefix* – full path for auth routes, ``global`` otherwise
@@ -43,15 +64,16 @@ Key format: ``rl:{scope}:{identifier}:{route_prefix}``
 import logging
 import time
 import uuid
-from typing import Callable
 
-from fastapi import Request, status
-from jose import JWTError, jwt
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import JSONResponse, Response
+from fastapi import status
+from jose import JWTError
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.config import get_settings
 from app.providers.redis import RedisProvider
+from app.security.jwt import JWTManager, TokenPayload, get_token_payload_cache
 
 logger = logging.getLogger(__name__)
 
@@ -108,6 +130,61 @@ redis.call('EXPIRE', key, window_seconds)
 return {count + 1, max_requests - count - 1, oldest_reset_ts()}
 """
 
+# ---------------------------------------------------------------------------
+# Lua script: approximate sliding-window counter over two fixed buckets
+# ---------------------------------------------------------------------------
+# KEYS[1]  = rate-limit counter hash key
+# ARGV[1]  = now_ms           (current Unix timestamp in milliseconds)
+# ARGV[2]  = max_requests     (integer limit)
+# ARGV[3]  = window_seconds   (fixed bucket length)
+#
+# Hash fields: b = current bucket index, c = current count, p = previous count
+#
+# Returns the same three-element array as _RATE_LIMIT_LUA; the reset
+# timestamp is the end of the current bucket.
+_RATE_LIMIT_COUNTER_LUA = """
+local key            = KEYS[1]
+local now_ms         = tonumber(ARGV[1])
+local max_requests   = tonumber(ARGV[2])
+local window_seconds = tonumber(ARGV[3])
+local window_ms      = window_seconds * 1000
+
+local bucket = math.floor(now_ms / window_ms)
+local state  = redis.call('HMGET', key, 'b', 'c', 'p')
+local stored_bucket = tonumber(state[1])
+local current  = tonumber(state[2]) or 0
+local previous = tonumber(state[3]) or 0
+
+-- 1. Roll the buckets forward to the current window.
+if stored_bucket == bucket - 1 then
+    previous = current
+    current = 0
+elseif stored_bucket ~= bucket then
+    previous = 0
+    current = 0
+end
+
+-- 2. Weight the previous bucket by how much of it still overlaps the window.
+local elapsed   = now_ms - bucket * window_ms
+local weight    = (window_ms - elapsed) / window_ms
+local estimated = math.floor(previous * weight + current)
+local reset_ts  = math.floor((bucket + 1) * window_ms / 1000)
+
+-- 3. Reject if over the limit.
+if estimated >= max_requests then
+    return {estimated, -1, reset_ts}
+end
+
+-- 4. Record this request and keep the key for two buckets.
+redis.call('HSET', key, 'b', bucket, 'c', current + 1, 'p', previous)
+redis.call('PEXPIRE', key, window_ms * 2)
+
+return {estimated + 1, max_requests - estimated - 1, reset_ts}
+"""
+
+RATE_LIMIT_SCRIPT = "rate_limit:sliding_log"
+RATE_LIMIT_COUNTER_SCRIPT = "rate_limit:sliding_window_counter"
+
 # Route-specific limits: path -> (max_requests, window_seconds)
 # These apply per-IP regardless of auth status.
 ROUTE_LIMITS: dict[str, tuple[int, int]] = {
@@ -118,127 +195,205 @@ ROUTE_LIMITS: dict[str, tuple[int, int]] = {
 }
 
 
-def _extract_user_id(
-    request: Request, jwt_secret: str, jwt_algorithm: str
-) -> str | None:
-    """Extract the user UUID from an ``Authorization: Bearer <token>`` header.
+def register_rate_limit_scripts(redis_provider: RedisProvider) -> None:
+    """Register the limiter's Lua scripts so they are preloaded on connect."""
+    redis_provider.register_script(RATE_LIMIT_SCRIPT, _RATE_LIMIT_LUA)
+    redis_provider.register_script(
+        RATE_LIMIT_COUNTER_SCRIPT, _RATE_LIMIT_COUNTER_LUA
+    )
+
+
+def _client_host(scope: Scope) -> str:
+    client = scope.get("client")
+    return client[0] if client else "unknown"
 
-    Returns the ``sub`` claim string if the token is present and valid,
-    ``None`` in all other cases.  The raw token is never logged.
+
+def _decode_bearer(headers: Headers, jwt_manager: JWTManager) -> TokenPayload | None:
+    """Decode the token from an ``Authorization: Bearer <token>`` header.
+
+    Returns the verified payload if the token is present and valid, ``None``
+    in all other cases.  The raw token is never logged.
     """
-    auth_header = request.headers.get("Authorization", "")
+    auth_header = headers.get("Authorization", "")
     if not auth_header.startswith("Bearer "):
         return None
     token = auth_header[len("Bearer "):]
     try:
-        data = jwt.decode(token, jwt_secret, algorithms=[jwt_algorithm])
-        return data.get("sub")
+        return jwt_manager.decode_token(token)
     except JWTError:
         return None
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Sliding-window Redis rate limiter with per-user and per-IP tiers."""
+class RateLimitMiddleware:
+    """Sliding-window Redis rate limiter with per-user and per-IP tiers.
+
+    Implemented as a pure ASGI middleware rather than on top of
+    ``BaseHTTPMiddleware`` so that responses (including streaming bodies)
+    are passed straight through to the server without an intermediate task
+    and memory stream.  Rate-limit headers are injected into the
+    ``http.response.start`` message on the way out.
+    """
 
-    def __init__(self, app, **kwargs) -> None:
-        super().__init__(app, **kwargs)
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
         # Cache settings at startup to avoid constructing Settings on every
         # request (get_settings() is not cached by default).
         settings = get_settings()
-        self._jwt_secret: str = settings.jwt_secret_key
-        self._jwt_algorithm: str = settings.jwt_algorithm
+        # Decoded tokens are shared with get_current_user through the
+        # process-wide payload cache and the request scope, so a bearer token
+        # is signature-verified at most once per process while it is valid.
+        self._jwt = JWTManager(
+            secret_key=settings.jwt_secret_key,
+            algorithm=settings.jwt_algorithm,
+            access_expire_minutes=settings.jwt_access_token_expire_minutes,
+            refresh_expire_days=settings.jwt_refresh_token_expire_days,
+            cache=get_token_payload_cache(),
+        )
         self._rl_unauthenticated: int = settings.rate_limit.unauthenticated
         self._rl_authenticated: int = settings.rate_limit.authenticated
         self._rl_window_seconds: int = settings.rate_limit.window_seconds
-
-    async def dispatch(
-        self, request: Request, call_next: Callable
-    ) -> Response:
-        redis_provider: RedisProvider | None = getattr(
-            request.app.state, "redis_provider", None
+        self._use_counter: bool = (
+            settings.rate_limit.algorithm == "sliding_window_counter"
         )
-
-        # When Redis is unavailable, allow the request through rather than
-        # blocking all traffic.  Rate-limit headers are intentionally omitted
-        # in this degraded state since limit state cannot be reliably reported.
-        client = None
-        if redis_provider is not None:
-            try:
-                client = redis_provider.client
-            except RuntimeError:
-                pass
-
-        if client is None:
-            return await call_next(request)
-
-        path = request.url.path
-
-        # ------------------------------------------------------------------
-        # Determine rate-limit parameters for this request
-        # ------------------------------------------------------------------
-        if path in ROUTE_LIMITS:
-            # Auth endpoints: fixed limits, always keyed by IP.
-            max_requests, window_seconds = ROUTE_LIMITS[path]
-            scope = "ip"
-            identifier = (
-                request.client.host if request.client else "unknown"
-            )
-            route_prefix = path
-        else:
-            window_seconds = self._rl_window_seconds
-            user_id = _extract_user_id(
-                request, self._jwt_secret, self._jwt_algorithm
-            )
-            if user_id:
-                scope = "user"
-                identifier = user_id
-                max_requests = self._rl_authenticated
-            else:
-                scope = "ip"
-                identifier = (
-                    request.client.host if request.client else "unknown"
-                )
-                max_requests = self._rl_unauthenticated
-            route_prefix = "global"
-
-        key = f"rl:{scope}:{identifier}:{route_prefix}"
-
-        now_ms = int(time.time() * 1000)
-        window_ms = window_seconds * 1000
-        window_start_ms = now_ms - window_ms
-
-        # ------------------------------------------------------------------
-        # Atomic sliding window via Redis Lua script
-        # ------------------------------------------------------------------
-        result = await client.eval(
-            _RATE_LIMIT_LUA,
-            1,
-            key,
-            window_start_ms,
-            now_ms,
-            max_requests,
-            window_seconds,
-            str(uuid.uuid4()),
+        self._key_prefix: str = "rlc" if self._use_counter else "rl"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        redis_provider = _get_redis_provider(scope)
+        if redis_provider is None:
+            # When Redis is unavailable, allow the request through rather
+            # than blocking all traffic.  Rate-limit headers are
+            # intentionally omitted in this degraded state since limit state
+            # cannot be reliably reported.
+            await self.app(scope, receive, send)
+            return
+
+        scope_name, identifier, route_prefix, max_requests, window_seconds = (
+            self._resolve_limit(scope)
+        )
+        key = f"{self._key_prefix}:{scope_name}:{identifier}:{route_prefix}"
+        remaining, reset_ts = await self._hit(
+            redis_provider, key, max_requests, window_seconds
+        )
+        rate_limit_headers = _rate_limit_headers(
+            max_requests, remaining, reset_ts
         )
-        _count, remaining, reset_ts = int(result[0]), int(result[1]), int(result[2])
 
         if remaining == -1:
             logger.warning(
                 "Rate limit exceeded: scope=%s route_prefix=%s",
-                scope,
+                scope_name,
                 route_prefix,
             )
             response = JSONResponse(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 content={"detail": "Rate limit exceeded. Try again later."},
+                headers=rate_limit_headers,
             )
-            response.headers["X-RateLimit-Limit"] = str(max_requests)
-            response.headers["X-RateLimit-Remaining"] = "0"
-            response.headers["X-RateLimit-Reset"] = str(reset_ts)
-            return response
-
-        response = await call_next(request)
-        response.headers["X-RateLimit-Limit"] = str(max_requests)
-        response.headers["X-RateLimit-Remaining"] = str(remaining)
-        response.headers["X-RateLimit-Reset"] = str(reset_ts)
-        return response
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                headers = MutableHeaders(scope=message)
+                for name, value in rate_limit_headers.items():
+                    headers[name] = value
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    def _resolve_limit(self, scope: Scope) -> tuple[str, str, str, int, int]:
+        """Return the rate-limit tier for a request.
+
+        The result is ``(scope, identifier, route_prefix, max_requests,
+        window_seconds)``; see the module docstring for the key format.
+        """
+        path: str = scope["path"]
+        if path in ROUTE_LIMITS:
+            # Auth endpoints: fixed limits, always keyed by IP.
+            max_requests, window_seconds = ROUTE_LIMITS[path]
+            return "ip", _client_host(scope), path, max_requests, window_seconds
+
+        payload = _decode_bearer(Headers(scope=scope), self._jwt)
+        if payload is not None:
+            # Expose the decoded payload as request.state.token_payload.
+            scope.setdefault("state", {})["token_payload"] = payload
+            return (
+                "user",
+                payload.sub,
+                "global",
+                self._rl_authenticated,
+                self._rl_window_seconds,
+            )
+        return (
+            "ip",
+            _client_host(scope),
+            "global",
+            self._rl_unauthenticated,
+            self._rl_window_seconds,
+        )
+
+    async def _hit(
+        self,
+        redis_provider: RedisProvider,
+        key: str,
+        max_requests: int,
+        window_seconds: int,
+    ) -> tuple[int, int]:
+        """Record a request against *key* via the atomic Lua script.
+
+        Returns ``(remaining, reset_ts)``; *remaining* is ``-1`` when the
+        request is rejected.
+        """
+        if not redis_provider.has_script(RATE_LIMIT_SCRIPT):
+            register_rate_limit_scripts(redis_provider)
+        now_ms = int(time.time() * 1000)
+        if self._use_counter:
+            result = await redis_provider.run_script(
+                RATE_LIMIT_COUNTER_SCRIPT,
+                [key],
+                [now_ms, max_requests, window_seconds],
+            )
+            return int(result[1]), int(result[2])
+
+        window_start_ms = now_ms - window_seconds * 1000
+        result = await redis_provider.run_script(
+            RATE_LIMIT_SCRIPT,
+            [key],
+            [
+                window_start_ms,
+                now_ms,
+                max_requests,
+                window_seconds,
+                str(uuid.uuid4()),
+            ],
+        )
+        return int(result[1]), int(result[2])
+
+
+def _get_redis_provider(scope: Scope) -> RedisProvider | None:
+    """Return the connected RedisProvider from app state, or ``None``."""
+    state = getattr(scope.get("app"), "state", None)
+    redis_provider: RedisProvider | None = getattr(state, "redis_provider", None)
+    if redis_provider is None:
+        return None
+    try:
+        redis_provider.client
+    except RuntimeError:
+        return None
+    return redis_provider
+
+
+def _rate_limit_headers(
+    max_requests: int, remaining: int, reset_ts: int
+) -> dict[str, str]:
+    return {
+        "X-RateLimit-Limit": str(max_requests),
+        "X-RateLimit-Remaining": str(max(remaining, 0)),
+        "X-RateLimit-Reset": str(reset_ts),
+    }
+
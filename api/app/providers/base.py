@@ -1,5 +1,16 @@
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
-from typing import Any
+from collections.abc import AsyncIterator, Iterable, Sequence
+from contextlib import AbstractAsyncContextManager
+from typing import Any, NamedTuple
+
+
+class Statement(NamedTuple):
+    """A parameterised SQL statement, for :meth:`execute_batch`."""
+
+    query: str
+    args: tuple[Any, ...] = ()
 
 
 class BaseDatabaseProvider(ABC):
@@ -9,15 +20,72 @@ class BaseDatabaseProvider(ABC):
     @abstractmethod
     async def disconnect(self) -> None: ...
 
+    # ``read_only=True`` marks a query that may be served by a read replica.
+    @abstractmethod
+    async def fetch_one(
+        self, query: str, *args: Any, read_only: bool = False
+    ) -> dict | None: ...
+
     @abstractmethod
-    async def fetch_one(self, query: str, *args: Any) -> dict | None: ...
+    async def fetch_all(
+        self, query: str, *args: Any, read_only: bool = False
+    ) -> list[dict]: ...
 
     @abstractmethod
-    async def fetch_all(self, query: str, *args: Any) -> list[dict]: ...
+    async def fetch_records(
+        self, query: str, *args: Any, read_only: bool = False
+    ) -> Sequence[Sequence[Any]]:
+        """Like :meth:`fetch_all`, but return the driver's rows uncopied.
+
+        Rows are read-only and support access by column name as well as
+        iteration over their values in column order, so callers can build
+        their own row objects without an intermediate dict per row.
+        """
 
     @abstractmethod
     async def execute(self, query: str, *args: Any) -> str: ...
 
+    @abstractmethod
+    async def execute_many(
+        self, query: str, args: Iterable[Sequence[Any]]
+    ) -> None: ...
+
+    @abstractmethod
+    async def copy_records(
+        self,
+        table: str,
+        records: Iterable[Sequence[Any]],
+        columns: Sequence[str],
+    ) -> str: ...
+
+    @abstractmethod
+    def iterate(
+        self,
+        query: str,
+        *args: Any,
+        prefetch: int = 1000,
+        read_only: bool = False,
+    ) -> AsyncIterator[dict]: ...
+
+    @abstractmethod
+    def transaction(self) -> AbstractAsyncContextManager[BaseDatabaseProvider]:
+        """Run the block in a transaction on one pinned connection.
+
+        The yielded provider issues every call on that connection; nesting
+        ``transaction()`` on it opens a savepoint.
+        """
+
+    @abstractmethod
+    async def execute_batch(self, statements: Sequence[Statement]) -> None:
+        """Run independent writes atomically in a single round trip.
+
+        The statements all see the same snapshot, so none may depend on
+        another's effects (e.g. update a row another one inserts).  Each
+        must be a single plain DML statement: no ``WITH`` clause of its
+        own, trailing ``;``, dollar quoting or ``$n`` inside a string
+        literal; a batch containing one raises :class:`ValueError`.
+        """
+
 
 class BaseCacheProvider(ABC):
     @abstractmethod
@@ -0,0 +1,233 @@
+"""Serialisation codecs for values stored through :class:`RedisProvider`.
+
+A codec turns plain Python data (dicts, lists, strings, numbers, plus
+``UUID``, ``datetime`` and ``date``) into bytes and back.  Decoded values
+may come back with UUIDs and timestamps as strings, depending on the codec,
+so callers validate them into their pydantic models rather than relying on
+the exact types.
+
+``json`` uses the standard library and is always available.  ``orjson`` is
+a faster JSON encoder; ``msgpack`` is a binary format storing UUIDs as 16
+raw bytes and timestamps as msgpack timestamps.  Any of them can be wrapped
+in :class:`CompressedCodec`, which compresses payloads above a size
+threshold with ``zlib``, ``zstd`` or ``lz4``.  msgpack, zstd and lz4 need
+the ``cache`` extra (``pip install forge-stream-api[cache]``).
+
+:meth:`CacheCodec.decode_json` turns a stored payload into JSON bytes for an
+HTTP response; payloads of the JSON codecs are returned as stored, without
+being parsed.
+"""
+
+from __future__ import annotations
+
+import json
+import uuid
+import zlib
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from typing import Any, Literal, TypeVar
+
+import orjson
+from pydantic import BaseModel
+
+CodecName = Literal["json", "orjson", "msgpack"]
+CompressionName = Literal["none", "zlib", "zstd", "lz4"]
+
+_MSGPACK_EXT_UUID = 1
+_MSGPACK_EXT_DATE = 2
+
+M = TypeVar("M", bound=BaseModel)
+
+# First byte of a CompressedCodec payload.
+_RAW = b"\x00"
+_COMPRESSED = b"\x01"
+
+
+class CacheCodec(ABC):
+    """Encodes cache values to bytes and decodes them back."""
+
+    name: str
+
+    @abstractmethod
+    def encode(self, value: Any) -> bytes: ...
+
+    @abstractmethod
+    def decode(self, data: bytes) -> Any: ...
+
+    def encode_model(self, model: BaseModel) -> bytes:
+        return self.encode(model.model_dump())
+
+    def decode_model(self, data: bytes, model_type: type[M]) -> M:
+        return model_type.model_validate(self.decode(data))
+
+    def decode_json(self, data: bytes) -> bytes:
+        """Return the value stored in *data* as JSON bytes."""
+        return orjson.dumps(self.decode(data), option=orjson.OPT_UTC_Z)
+
+
+class JsonCodec(CacheCodec):
+    """Compact JSON via the standard library.
+
+    Pydantic models go through pydantic's own JSON serialiser and parser,
+    which skip building intermediate dicts and beat any Python-level codec.
+    """
+
+    name = "json"
+
+    def encode(self, value: Any) -> bytes:
+        return json.dumps(
+            value, separators=(",", ":"), default=_json_default
+        ).encode()
+
+    def decode(self, data: bytes) -> Any:
+        return json.loads(data)
+
+    def encode_model(self, model: BaseModel) -> bytes:
+        return model.model_dump_json().encode()
+
+    def decode_model(self, data: bytes, model_type: type[M]) -> M:
+        return model_type.model_validate_json(data)
+
+    def decode_json(self, data: bytes) -> bytes:
+        return data
+
+
+class OrjsonCodec(JsonCodec):
+    """JSON via orjson, which serialises UUIDs and datetimes natively.
+
+    Pydantic models are handled as in :class:`JsonCodec`.
+    """
+
+    name = "orjson"
+
+    def encode(self, value: Any) -> bytes:
+        return orjson.dumps(value)
+
+    def decode(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+class MsgpackCodec(CacheCodec):
+    """msgpack with extension types for UUIDs and dates."""
+
+    name = "msgpack"
+
+    def __init__(self) -> None:
+        import msgpack
+
+        self._msgpack = msgpack
+
+    def encode(self, value: Any) -> bytes:
+        return self._msgpack.packb(
+            value, default=self._default, datetime=True, use_bin_type=True
+        )
+
+    def decode(self, data: bytes) -> Any:
+        return self._msgpack.unpackb(
+            data, ext_hook=self._ext_hook, timestamp=3, raw=False
+        )
+
+    def _default(self, value: Any) -> Any:
+        if isinstance(value, uuid.UUID):
+            return self._msgpack.ExtType(_MSGPACK_EXT_UUID, value.bytes)
+        if isinstance(value, date) and not isinstance(value, datetime):
+            return self._msgpack.ExtType(
+                _MSGPACK_EXT_DATE, value.isoformat().encode()
+            )
+        raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+    def _ext_hook(self, code: int, data: bytes) -> Any:
+        if code == _MSGPACK_EXT_UUID:
+            return uuid.UUID(bytes=data)
+        if code == _MSGPACK_EXT_DATE:
+            return date.fromisoformat(data.decode())
+        return self._msgpack.ExtType(code, data)
+
+
+class CompressedCodec(CacheCodec):
+    """Wraps *inner*, compressing payloads of at least *min_size* bytes.
+
+    Every payload starts with a one-byte marker, so small payloads stored
+    uncompressed and large ones stored compressed decode the same way.
+    """
+
+    def __init__(
+        self,
+        inner: CacheCodec,
+        compression: Literal["zlib", "zstd", "lz4"],
+        min_size: int = 1024,
+    ) -> None:
+        self._inner = inner
+        self._min_size = min_size
+        self.name = f"{inner.name}+{compression}"
+        if compression == "zlib":
+            self._compress = zlib.compress
+            self._decompress = zlib.decompress
+        elif compression == "zstd":
+            import zstandard
+
+            self._compress = zstandard.ZstdCompressor().compress
+            self._decompress = zstandard.ZstdDecompressor().decompress
+        elif compression == "lz4":
+            import lz4.frame
+
+            self._compress = lz4.frame.compress
+            self._decompress = lz4.frame.decompress
+        else:
+            raise ValueError(f"Unknown compression {compression!r}")
+
+    def encode(self, value: Any) -> bytes:
+        return self._pack(self._inner.encode(value))
+
+    def decode(self, data: bytes) -> Any:
+        return self._inner.decode(self._unpack(data))
+
+    def encode_model(self, model: BaseModel) -> bytes:
+        return self._pack(self._inner.encode_model(model))
+
+    def decode_model(self, data: bytes, model_type: type[M]) -> M:
+        return self._inner.decode_model(self._unpack(data), model_type)
+
+    def decode_json(self, data: bytes) -> bytes:
+        return self._inner.decode_json(self._unpack(data))
+
+    def _pack(self, data: bytes) -> bytes:
+        if len(data) < self._min_size:
+            return _RAW + data
+        return _COMPRESSED + self._compress(data)
+
+    def _unpack(self, data: bytes) -> bytes:
+        marker, payload = data[:1], data[1:]
+        if marker == _COMPRESSED:
+            return self._decompress(payload)
+        if marker != _RAW:
+            raise ValueError("Unknown cache payload marker")
+        return payload
+
+
+def build_cache_codec(
+    codec: CodecName = "json",
+    compression: CompressionName = "none",
+    min_size: int = 1024,
+) -> CacheCodec:
+    """Return the codec configured by name, raising if its library is missing."""
+    codecs: dict[str, type[CacheCodec]] = {
+        "json": JsonCodec,
+        "orjson": OrjsonCodec,
+        "msgpack": MsgpackCodec,
+    }
+    try:
+        base = codecs[codec]()
+    except KeyError:
+        raise ValueError(f"Unknown cache codec {codec!r}") from None
+    if compression == "none":
+        return base
+    return CompressedCodec(base, compression, min_size)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
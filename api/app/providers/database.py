@@ -1,42 +1,524 @@
-from typing import Any
+import asyncio
+import itertools
+import logging
+import re
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable, Sequence
+from contextlib import asynccontextmanager, suppress
+from typing import Any, TypeVar
 
 import asyncpg
+import orjson
 
-from app.providers.base import BaseDatabaseProvider
+from app.providers.base import BaseDatabaseProvider, Statement
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# jsonb's binary wire format is a version byte followed by the JSON text.
+_JSONB_VERSION = b"\x01"
+
+_PLACEHOLDER = re.compile(r"\$(\d+)")
+# Constructs _merge_batch cannot rewrite safely: a leading WITH (CTEs do not
+# nest inside a CTE), a dollar-quoted body, or a string literal containing
+# something that looks like a placeholder.
+_LEADING_WITH = re.compile(r"\s*WITH\b", re.IGNORECASE)
+_DOLLAR_QUOTE = re.compile(r"\$(?:[A-Za-z_]\w*)?\$")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+
+# Errors meaning the connection to a replica failed rather than that the
+# query did; the read is retried on the primary and the replica taken out of
+# rotation.  Timeouts (TimeoutError is an OSError, but not a ConnectionError)
+# and query errors reach the caller, so a slow query is not run twice.
+_REPLICA_ERRORS = (
+    ConnectionError,
+    asyncpg.ConnectionDoesNotExistError,
+    asyncpg.CannotConnectNowError,
+    asyncpg.InterfaceError,
+)
+
+# Seconds the replica is behind the primary.  A replica that has replayed
+# everything it received counts as current even if the primary is idle.
+_REPLICA_LAG_QUERY = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(
+        EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0
+    )
+END::float8
+"""
+
+
+class _Replica:
+    """A read replica's pool and its last health check result."""
+
+    def __init__(self, dsn: str) -> None:
+        self.dsn = dsn
+        self.pool: asyncpg.Pool | None = None
+        self.healthy = False
+        self.lag: float | None = None
+        self.failed_checks = 0
 
 
 class DatabaseProvider(BaseDatabaseProvider):
-    def __init__(self, dsn: str, min_size: int = 5, max_size: int = 20) -> None:
+    """asyncpg pool wrapper.
+
+    Parameters
+    ----------
+    dsn:
+        PostgreSQL connection string.
+    min_size, max_size:
+        Pool size bounds.
+    statement_cache_size:
+        Prepared statements cached per connection (0 disables the cache,
+        as needed behind PgBouncer in transaction mode).
+    max_inactive_connection_lifetime:
+        Seconds after which idle connections above *min_size* are closed.
+    command_timeout:
+        Default per-statement timeout in seconds; ``None`` for no limit.
+    init:
+        Extra coroutine run on every new connection, after the built-in
+        setup that maps ``jsonb`` values to Python objects with orjson.
+    replica_dsns:
+        Read replicas, each with its own pool of the same size.  Calls made
+        with ``read_only=True`` go round-robin to healthy replicas and fall
+        back to the primary when none is healthy or a replica fails.
+    replica_check_interval:
+        Seconds between replica health checks.
+    replica_max_lag:
+        Replication lag in seconds beyond which a replica stops serving
+        reads; ``None`` ignores lag.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        min_size: int = 5,
+        max_size: int = 20,
+        *,
+        statement_cache_size: int = 100,
+        max_inactive_connection_lifetime: float = 300.0,
+        command_timeout: float | None = None,
+        init: Callable[[asyncpg.Connection], Awaitable[None]] | None = None,
+        replica_dsns: Sequence[str] = (),
+        replica_check_interval: float = 5.0,
+        replica_max_lag: float | None = 10.0,
+    ) -> None:
         self._dsn = dsn
         self._min_size = min_size
         self._max_size = max_size
+        self._statement_cache_size = statement_cache_size
+        self._max_inactive_connection_lifetime = max_inactive_connection_lifetime
+        self._command_timeout = command_timeout
+        self._init = init
         self._pool: asyncpg.Pool | None = None
+        self._replicas = [_Replica(dsn) for dsn in replica_dsns]
+        self._replica_turn = itertools.count()
+        self._replica_check_interval = replica_check_interval
+        self._replica_max_lag = replica_max_lag
+        self._health_task: asyncio.Task | None = None
+        # Pool metrics, see get_status().
+        self._waiting = 0
+        self._acquired = 0
+        self._acquire_wait_total = 0.0
+        self._acquire_wait_max = 0.0
 
     async def connect(self) -> None:
-        self._pool = await asyncpg.create_pool(
-            self._dsn, min_size=self._min_size, max_size=self._max_size
-        )
+        self._pool = await self._create_pool(self._dsn)
+        if self._replicas:
+            # A replica that is down at startup must not stop the app; the
+            # health check keeps retrying it.
+            await self._check_replicas()
+            self._health_task = asyncio.create_task(self._monitor_replicas())
 
     async def disconnect(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._health_task
+            self._health_task = None
+        for replica in self._replicas:
+            if replica.pool is not None:
+                await replica.pool.close()
+                replica.pool = None
+            replica.healthy = False
         if self._pool:
             await self._pool.close()
 
-    async def fetch_one(self, query: str, *args: Any) -> dict | None:
-        if self._pool is None:
-            raise RuntimeError("DatabaseProvider is not connected")
-        async with self._pool.acquire() as conn:
+    async def fetch_one(
+        self, query: str, *args: Any, read_only: bool = False
+    ) -> dict | None:
+        async def run(conn: asyncpg.Connection) -> dict | None:
             row = await conn.fetchrow(query, *args)
             return dict(row) if row else None
 
-    async def fetch_all(self, query: str, *args: Any) -> list[dict]:
-        if self._pool is None:
-            raise RuntimeError("DatabaseProvider is not connected")
-        async with self._pool.acquire() as conn:
+        return await self._run(run, read_only)
+
+    async def fetch_all(
+        self, query: str, *args: Any, read_only: bool = False
+    ) -> list[dict]:
+        async def run(conn: asyncpg.Connection) -> list[dict]:
             rows = await conn.fetch(query, *args)
             return [dict(r) for r in rows]
 
+        return await self._run(run, read_only)
+
+    async def fetch_records(
+        self, query: str, *args: Any, read_only: bool = False
+    ) -> list[asyncpg.Record]:
+        async def run(conn: asyncpg.Connection) -> list[asyncpg.Record]:
+            return await conn.fetch(query, *args)
+
+        return await self._run(run, read_only)
+
     async def execute(self, query: str, *args: Any) -> str:
-        if self._pool is None:
-            raise RuntimeError("DatabaseProvider is not connected")
-        async with self._pool.acquire() as conn:
+        async with self._acquire(self._pool) as conn:
             return await conn.execute(query, *args)
+
+    async def execute_many(
+        self, query: str, args: Iterable[Sequence[Any]]
+    ) -> None:
+        async with self._acquire(self._pool) as conn:
+            await conn.executemany(query, args)
+
+    async def copy_records(
+        self,
+        table: str,
+        records: Iterable[Sequence[Any]],
+        columns: Sequence[str],
+    ) -> str:
+        """Bulk-insert *records* into *table* with ``COPY ... FROM STDIN``."""
+        async with self._acquire(self._pool) as conn:
+            return await conn.copy_records_to_table(
+                table, records=records, columns=list(columns)
+            )
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator["ConnectionProvider"]:
+        async with self._acquire(self._pool) as conn:
+            async with conn.transaction():
+                yield ConnectionProvider(conn)
+
+    async def execute_batch(self, statements: Sequence[Statement]) -> None:
+        if not statements:
+            return
+        async with self._acquire(self._pool) as conn:
+            await conn.execute(*_merge_batch(statements))
+
+    async def iterate(
+        self,
+        query: str,
+        *args: Any,
+        prefetch: int = 1000,
+        read_only: bool = False,
+    ) -> AsyncIterator[dict]:
+        """
+        Stream rows through a server-side cursor, *prefetch* rows per
+        round trip.  A pooled connection and its transaction stay open
+        until the iterator is exhausted or closed.
+
+        A read-only stream falls back to the primary only if its replica
+        fails before the first row; later failures are raised.
+        """
+        replica = self._pick_replica() if read_only else None
+        if replica is not None:
+            started = False
+            try:
+                async for row in self._stream(
+                    replica.pool, query, args, prefetch
+                ):
+                    started = True
+                    yield row
+                return
+            except _REPLICA_ERRORS:
+                if started:
+                    raise
+                self._mark_down(replica)
+        async for row in self._stream(self._pool, query, args, prefetch):
+            yield row
+
+    def get_status(self) -> dict:
+        """Return pool occupancy, acquire waits and replica health.
+
+        Acquire statistics cover the primary and replica pools together.
+        """
+        return {
+            **_pool_occupancy(self._pool),
+            "max_size": self._max_size,
+            "waiting": self._waiting,
+            "acquired": self._acquired,
+            "acquire_wait_avg_ms": (
+                1000 * self._acquire_wait_total / self._acquired
+                if self._acquired
+                else 0.0
+            ),
+            "acquire_wait_max_ms": 1000 * self._acquire_wait_max,
+            "replicas": [
+                {
+                    "healthy": replica.healthy,
+                    "lag_seconds": replica.lag,
+                    **_pool_occupancy(replica.pool),
+                }
+                for replica in self._replicas
+            ],
+        }
+
+    async def _run(
+        self,
+        fn: Callable[[asyncpg.Connection], Awaitable[T]],
+        read_only: bool,
+    ) -> T:
+        """Run *fn* on a replica when *read_only*, else on the primary."""
+        replica = self._pick_replica() if read_only else None
+        if replica is not None:
+            try:
+                async with self._acquire(replica.pool) as conn:
+                    return await fn(conn)
+            except _REPLICA_ERRORS:
+                self._mark_down(replica)
+        async with self._acquire(self._pool) as conn:
+            return await fn(conn)
+
+    async def _stream(
+        self,
+        pool: asyncpg.Pool | None,
+        query: str,
+        args: Sequence[Any],
+        prefetch: int,
+    ) -> AsyncIterator[dict]:
+        async with self._acquire(pool) as conn:
+            async with conn.transaction():
+                async for record in conn.cursor(
+                    query, *args, prefetch=prefetch
+                ):
+                    yield dict(record)
+
+    def _pick_replica(self) -> _Replica | None:
+        """Return the next healthy replica in round-robin order, if any."""
+        healthy = [r for r in self._replicas if r.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._replica_turn) % len(healthy)]
+
+    def _mark_down(self, replica: _Replica) -> None:
+        logger.warning(
+            "Read replica %d failed; reading from the primary until it "
+            "passes a health check",
+            self._replicas.index(replica),
+        )
+        replica.healthy = False
+
+    async def _monitor_replicas(self) -> None:
+        while True:
+            await asyncio.sleep(self._replica_check_interval)
+            await self._check_replicas()
+
+    async def _check_replicas(self) -> None:
+        await asyncio.gather(*(self._check_replica(r) for r in self._replicas))
+
+    async def _check_replica(self, replica: _Replica) -> None:
+        """Connect *replica* if needed and update its health and lag."""
+        timeout = self._replica_check_interval
+        was_healthy = replica.healthy
+        try:
+            if replica.pool is None:
+                replica.pool = await asyncio.wait_for(
+                    self._create_pool(replica.dsn), timeout
+                )
+            async with replica.pool.acquire(timeout=timeout) as conn:
+                replica.lag = await conn.fetchval(
+                    _REPLICA_LAG_QUERY, timeout=timeout
+                )
+        except Exception as exc:
+            replica.healthy = False
+            replica.lag = None
+            replica.failed_checks += 1
+            if replica.failed_checks == 1:
+                logger.warning(
+                    "Read replica %d is unavailable: %s",
+                    self._replicas.index(replica),
+                    exc,
+                )
+            return
+        replica.failed_checks = 0
+        replica.healthy = (
+            self._replica_max_lag is None or replica.lag <= self._replica_max_lag
+        )
+        if replica.healthy != was_healthy:
+            logger.info(
+                "Read replica %d is %s (lag %.1fs)",
+                self._replicas.index(replica),
+                "serving reads" if replica.healthy else "lagging",
+                replica.lag,
+            )
+
+    async def _create_pool(self, dsn: str) -> asyncpg.Pool:
+        return await asyncpg.create_pool(
+            dsn,
+            min_size=self._min_size,
+            max_size=self._max_size,
+            statement_cache_size=self._statement_cache_size,
+            max_inactive_connection_lifetime=self._max_inactive_connection_lifetime,
+            command_timeout=self._command_timeout,
+            init=self._init_connection,
+        )
+
+    @asynccontextmanager
+    async def _acquire(
+        self, pool: asyncpg.Pool | None
+    ) -> AsyncIterator[asyncpg.Connection]:
+        """Acquire a connection from *pool*, recording how long it took."""
+        if pool is None:
+            raise RuntimeError("DatabaseProvider is not connected")
+        self._waiting += 1
+        started = time.perf_counter()
+        try:
+            conn = await pool.acquire()
+        finally:
+            self._waiting -= 1
+        waited = time.perf_counter() - started
+        self._acquired += 1
+        self._acquire_wait_total += waited
+        self._acquire_wait_max = max(self._acquire_wait_max, waited)
+        try:
+            yield conn
+        finally:
+            await pool.release(conn)
+
+    async def _init_connection(self, conn: asyncpg.Connection) -> None:
+        # Decode jsonb straight to Python objects (and encode parameters
+        # from them) so repositories never handle JSON text.
+        await conn.set_type_codec(
+            "jsonb",
+            schema="pg_catalog",
+            encoder=_encode_jsonb,
+            decoder=_decode_jsonb,
+            format="binary",
+        )
+        if self._init is not None:
+            await self._init(conn)
+
+
+class ConnectionProvider(BaseDatabaseProvider):
+    """One pinned connection, as yielded by :meth:`DatabaseProvider.transaction`.
+
+    Every call runs on that connection inside its transaction, including
+    ``read_only`` ones, so they see the transaction's own writes.  The
+    connection belongs to the pool: ``connect`` and ``disconnect`` do
+    nothing.
+    """
+
+    def __init__(self, conn: asyncpg.Connection) -> None:
+        self._conn = conn
+
+    async def connect(self) -> None:
+        pass
+
+    async def disconnect(self) -> None:
+        pass
+
+    async def fetch_one(
+        self, query: str, *args: Any, read_only: bool = False
+    ) -> dict | None:
+        row = await self._conn.fetchrow(query, *args)
+        return dict(row) if row else None
+
+    async def fetch_all(
+        self, query: str, *args: Any, read_only: bool = False
+    ) -> list[dict]:
+        return [dict(r) for r in await self._conn.fetch(query, *args)]
+
+    async def fetch_records(
+        self, query: str, *args: Any, read_only: bool = False
+    ) -> list[asyncpg.Record]:
+        return await self._conn.fetch(query, *args)
+
+    async def execute(self, query: str, *args: Any) -> str:
+        return await self._conn.execute(query, *args)
+
+    async def execute_many(
+        self, query: str, args: Iterable[Sequence[Any]]
+    ) -> None:
+        await self._conn.executemany(query, args)
+
+    async def copy_records(
+        self,
+        table: str,
+        records: Iterable[Sequence[Any]],
+        columns: Sequence[str],
+    ) -> str:
+        return await self._conn.copy_records_to_table(
+            table, records=records, columns=list(columns)
+        )
+
+    async def iterate(
+        self,
+        query: str,
+        *args: Any,
+        prefetch: int = 1000,
+        read_only: bool = False,
+    ) -> AsyncIterator[dict]:
+        async for record in self._conn.cursor(query, *args, prefetch=prefetch):
+            yield dict(record)
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator["ConnectionProvider"]:
+        async with self._conn.transaction():
+            yield self
+
+    async def execute_batch(self, statements: Sequence[Statement]) -> None:
+        if statements:
+            await self._conn.execute(*_merge_batch(statements))
+
+
+def _merge_batch(statements: Sequence[Statement]) -> tuple[str, ...]:
+    """Fold *statements* into one query plus arguments.
+
+    Each statement becomes a data-modifying CTE with its ``$n`` placeholders
+    shifted past the previous statements' arguments, so the whole batch is
+    parsed, planned and run in one round trip and commits or fails as one.
+    Only single plain DML statements can be folded; anything else raises
+    :class:`ValueError` (see :func:`_check_mergeable`).
+    """
+    if len(statements) == 1:
+        return (statements[0].query, *statements[0].args)
+    ctes = []
+    args: list[Any] = []
+    for i, (query, stmt_args) in enumerate(statements):
+        _check_mergeable(query)
+        offset = len(args)
+        renumbered = _PLACEHOLDER.sub(
+            lambda m: f"${int(m.group(1)) + offset}", query
+        )
+        ctes.append(f"s{i} AS ({renumbered})")
+        args.extend(stmt_args)
+    return (f"WITH {', '.join(ctes)} SELECT 1", *args)
+
+
+def _check_mergeable(query: str) -> None:
+    if _LEADING_WITH.match(query):
+        raise ValueError(f"Cannot batch a statement with its own WITH: {query!r}")
+    if query.rstrip().endswith(";"):
+        raise ValueError(f"Cannot batch a statement ending in ';': {query!r}")
+    if _DOLLAR_QUOTE.search(query):
+        raise ValueError(f"Cannot batch a dollar-quoted statement: {query!r}")
+    if any(_PLACEHOLDER.search(lit) for lit in _STRING_LITERAL.findall(query)):
+        raise ValueError(
+            f"Cannot batch a statement with '$n' in a string literal: {query!r}"
+        )
+
+
+def _pool_occupancy(pool: asyncpg.Pool | None) -> dict:
+    size = pool.get_size() if pool else 0
+    idle = pool.get_idle_size() if pool else 0
+    return {"size": size, "in_use": size - idle, "idle": idle}
+
+
+def _encode_jsonb(value: Any) -> bytes:
+    return _JSONB_VERSION + orjson.dumps(value)
+
+
+def _decode_jsonb(data: bytes) -> Any:
+    return orjson.loads(data[1:])
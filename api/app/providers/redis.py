@@ -1,14 +1,40 @@
+import hashlib
+from collections.abc import AsyncIterator, Callable
+from typing import Any
+
 import redis.asyncio as aioredis
+from pydantic import BaseModel
+from redis.exceptions import NoScriptError, WatchError
 
 from app.providers.base import BaseCacheProvider
+from app.providers.cache_codec import CacheCodec, JsonCodec
 
 
 class RedisProvider(BaseCacheProvider):
-    def __init__(self, host: str, port: int, db: int = 0) -> None:
+    """Redis access for the API.
+
+    :meth:`get` and :meth:`set` store strings as-is.  :meth:`get_value`,
+    :meth:`set_value`, :meth:`update_many` and :meth:`set_many_if_unchanged`
+    store structured values encoded with *codec* (compact JSON by default);
+    pydantic models are encoded directly and, given ``model_type``, decoded
+    back into that model.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        db: int = 0,
+        codec: CacheCodec | None = None,
+    ) -> None:
         self._host = host
         self._port = port
         self._db = db
+        self._codec = codec or JsonCodec()
         self._client: aioredis.Redis | None = None
+        # Registered Lua scripts: name -> (source, sha1).  The SHA is computed
+        # locally so EVALSHA can be issued even before SCRIPT LOAD has run.
+        self._scripts: dict[str, tuple[str, str]] = {}
 
     @property
     def client(self) -> aioredis.Redis:
@@ -22,6 +48,7 @@ class RedisProvider(BaseCacheProvider):
             host=self._host, port=self._port, db=self._db
         )
         await self._client.ping()
+        await self.load_scripts()
 
     async def disconnect(self) -> None:
         if self._client:
@@ -43,6 +70,139 @@ class RedisProvider(BaseCacheProvider):
         else:
             await self._client.set(key, value)
 
+    @property
+    def codec(self) -> CacheCodec:
+        return self._codec
+
+    async def get_value(
+        self, key: str, model_type: type[BaseModel] | None = None
+    ) -> Any | None:
+        """Return the decoded value of *key*, or ``None`` if it is missing."""
+        if self._client is None:
+            raise RuntimeError("RedisProvider is not connected")
+        data = await self._client.get(key)
+        return self.decode_value(data, model_type) if data is not None else None
+
+    async def set_value(
+        self, key: str, value: Any, expire_seconds: int | None = None
+    ) -> None:
+        """Encode *value* with the provider's codec and store it."""
+        if self._client is None:
+            raise RuntimeError("RedisProvider is not connected")
+        await self._client.set(key, self.encode_value(value), ex=expire_seconds)
+
+    async def set_if_absent(
+        self, key: str, value: str, expire_ms: int
+    ) -> bool:
+        """``SET key value NX PX expire_ms``; return whether the key was set."""
+        if self._client is None:
+            raise RuntimeError("RedisProvider is not connected")
+        return bool(await self._client.set(key, value, nx=True, px=expire_ms))
+
+    async def update_many(
+        self,
+        keys: list[str],
+        fn: Callable[[str, Any], Any | None],
+        attempts: int = 5,
+        model_type: type[BaseModel] | None = None,
+    ) -> int:
+        """Replace the values of *keys* with ``fn(key, value)`` in one transaction.
+
+        *keys* are ``WATCH``ed and read with one ``MGET``; the new values are
+        written back in a single ``MULTI``/``EXEC`` with their TTLs kept.  If
+        another client writes any of them in between, the whole update is
+        run again.  Missing keys are skipped; *fn* receives each decoded
+        value and returns the value to encode, or ``None`` to leave the key
+        untouched.  Returns how many keys were written; raises
+        :class:`redis.exceptions.WatchError` after *attempts* conflicts.
+        """
+        if self._client is None:
+            raise RuntimeError("RedisProvider is not connected")
+        if not keys:
+            return 0
+        async with self._client.pipeline(transaction=True) as pipe:
+            for attempt in range(attempts):
+                try:
+                    await pipe.watch(*keys)
+                    updates = {}
+                    for key, raw in zip(keys, await pipe.mget(keys)):
+                        if raw is None:
+                            continue
+                        value = fn(key, self.decode_value(raw, model_type))
+                        if value is not None:
+                            updates[key] = self.encode_value(value)
+                    if not updates:
+                        await pipe.unwatch()
+                        return 0
+                    pipe.multi()
+                    for key, data in updates.items():
+                        pipe.set(key, data, keepttl=True)
+                    await pipe.execute()
+                    return len(updates)
+                except WatchError:
+                    if attempt == attempts - 1:
+                        raise
+                    await pipe.reset()
+        return 0
+
+    async def set_many_if_unchanged(
+        self,
+        values: dict[str, Any],
+        expire_seconds: int,
+        guard_key: str,
+        guard_value: str | None,
+        index: tuple[str, dict[str, float]] | None = None,
+    ) -> bool:
+        """Set every key in *values* if *guard_key* still holds *guard_value*.
+
+        Values are encoded with the provider's codec; *guard_value* is
+        compared with the raw string stored at *guard_key*.
+        The check and the writes run under ``WATCH``/``MULTI``, so the keys
+        are only written when nothing touched *guard_key* in between.
+        *guard_value* ``None`` stands for a missing key.  *index*, a sorted
+        set key and its ``{member: score}`` entries, is added to in the same
+        transaction and given the same expiry.  Returns whether the keys
+        were written.
+        """
+        if self._client is None:
+            raise RuntimeError("RedisProvider is not connected")
+        async with self._client.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(guard_key)
+                current = await pipe.get(guard_key)
+                if (current.decode() if current else None) != guard_value:
+                    await pipe.unwatch()
+                    return False
+                pipe.multi()
+                for key, value in values.items():
+                    pipe.set(key, self.encode_value(value), ex=expire_seconds)
+                if index is not None:
+                    index_key, entries = index
+                    pipe.zadd(index_key, entries)
+                    pipe.expire(index_key, expire_seconds)
+                await pipe.execute()
+                return True
+            except WatchError:
+                return False
+
+    def encode_value(self, value: Any) -> bytes:
+        """Encode *value* as :meth:`set_value` would store it."""
+        if isinstance(value, BaseModel):
+            return self._codec.encode_model(value)
+        return self._codec.encode(value)
+
+    def decode_value(
+        self, data: bytes, model_type: type[BaseModel] | None = None
+    ) -> Any:
+        """Decode bytes stored by :meth:`set_value`, e.g. returned by a script."""
+        if model_type is not None:
+            return self._codec.decode_model(data, model_type)
+        return self._codec.decode(data)
+
+    def decode_json(self, data: bytes) -> bytes:
+        """Return bytes stored by :meth:`set_value` as JSON, for a response body."""
+        return self._codec.decode_json(data)
+
     async def incr(self, key: str) -> int:
         if self._client is None:
             raise RuntimeError("RedisProvider is not connected")
@@ -57,3 +217,70 @@ class RedisProvider(BaseCacheProvider):
         if self._client is None:
             raise RuntimeError("RedisProvider is not connected")
         await self._client.delete(key)
+
+    async def publish(self, channel: str, message: str) -> int:
+        """Publish *message* on a pub/sub channel; returns the receiver count."""
+        if self._client is None:
+            raise RuntimeError("RedisProvider is not connected")
+        return await self._client.publish(channel, message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[str]:
+        """Yield messages published on *channel* until cancelled."""
+        if self._client is None:
+            raise RuntimeError("RedisProvider is not connected")
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(channel)
+        try:
+            async for message in pubsub.listen():
+                data = message["data"]
+                yield data.decode() if isinstance(data, bytes) else str(data)
+        finally:
+            await pubsub.unsubscribe(channel)
+            await pubsub.close()
+
+    # ------------------------------------------------------------------
+    # Lua script registry
+    # ------------------------------------------------------------------
+
+    def register_script(self, name: str, source: str) -> str:
+        """Register a Lua script under *name* and return its SHA1 digest.
+
+        Registered scripts are sent to Redis with ``SCRIPT LOAD`` on
+        :meth:`connect` and afterwards invoked with ``EVALSHA`` via
+        :meth:`run_script`, so the source is not re-sent on every call.
+        Re-registering the same name replaces the previous source.
+        """
+        sha = hashlib.sha1(source.encode()).hexdigest()
+        self._scripts[name] = (source, sha)
+        return sha
+
+    def has_script(self, name: str) -> bool:
+        return name in self._scripts
+
+    async def load_scripts(self) -> None:
+        """``SCRIPT LOAD`` every registered script into the Redis script cache."""
+        if self._client is None:
+            raise RuntimeError("RedisProvider is not connected")
+        for source, _sha in self._scripts.values():
+            await self._client.script_load(source)
+
+    async def run_script(
+        self, name: str, keys: list[str], args: list[Any]
+    ) -> Any:
+        """Execute a registered script with ``EVALSHA``.
+
+        If Redis replies ``NOSCRIPT`` (e.g. after a restart, failover or
+        ``SCRIPT FLUSH``) the script is loaded again and the call retried
+        once, transparently to the caller.
+        """
+        if self._client is None:
+            raise RuntimeError("RedisProvider is not connected")
+        try:
+            source, sha = self._scripts[name]
+        except KeyError:
+            raise KeyError(f"Lua script {name!r} is not registered") from None
+        try:
+            return await self._client.evalsha(sha, len(keys), *keys, *args)
+        except NoScriptError:
+            await self._client.script_load(source)
+            return await self._client.evalsha(sha, len(keys), *keys, *args)
@@ -2,21 +2,187 @@
 
 from __future__ import annotations
 
-import json
 import uuid
-from datetime import date, datetime, timezone
+from collections.abc import AsyncIterator, Mapping
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Literal
 
+from app.providers.base import BaseDatabaseProvider
 from app.repositories.base import BaseRepository
 from app.schemas.analytics import (
     AnalyticsSummaryResponse,
     DailyStatResponse,
+    HourlyStatResponse,
     UsageEventCreate,
     UsageEventResponse,
+    UsageStatIncrement,
 )
 
+StatsStorage = Literal["jsonb", "columnar"]
+
+_EVENT_COLUMNS = (
+    "id",
+    "user_id",
+    "event_type",
+    "provider",
+    "model",
+    "tokens_used",
+    "latency_ms",
+    "metadata",
+    "created_at",
+)
+_EVENT_SELECT = ", ".join(_EVENT_COLUMNS)
+
+
+@dataclass(slots=True)
+class UsageEventRecord:
+    """A usage event row, built positionally from a driver row.
+
+    Event listings return these instead of :class:`UsageEventResponse` so
+    each row is validated once, by the response model, rather than copied
+    into a dict and validated in the repository as well.  Fields follow
+    ``_EVENT_COLUMNS`` order.  ``id`` and ``user_id`` keep the driver's
+    UUID type, a :class:`uuid.UUID` subclass that orjson only serialises
+    through :func:`app.responses.dump_json`.
+    """
+
+    id: uuid.UUID
+    user_id: uuid.UUID | None
+    event_type: str
+    provider: str | None
+    model: str | None
+    tokens_used: int | None
+    latency_ms: int | None
+    metadata: dict[str, Any]
+    created_at: datetime
+
+
+# Rollup tier storage, keyed by ANALYTICS_STATS_STORAGE.  "jsonb" keeps one
+# row per (user, period) in each tier with an events_by_type document;
+# "columnar" keeps one row of integer counters per (user, period, event_type)
+# in each tier, read back through the *_usage_type_rollup views (see
+# infra/migrations/006_daily_usage_type_stats.sql and
+# 007_hourly_monthly_usage_type_stats.sql).
+_STATS_TABLES = {
+    "jsonb": {
+        "hourly": "hourly_usage_stats",
+        "daily": "daily_usage_stats",
+        "monthly": "monthly_usage_stats",
+    },
+    "columnar": {
+        "hourly": "hourly_usage_type_rollup",
+        "daily": "daily_usage_type_rollup",
+        "monthly": "monthly_usage_type_rollup",
+    },
+}
+
+# Adds one increment to every rollup tier in a single statement.
+#   jsonb:    $1 user, $2 hour, $3 day, $4 month, $5 events, $6 tokens,
+#             $7 events_by_type; the per-type JSONB counters are merged key
+#             by key with usage_counts_merge()
+#             (see infra/migrations/005_usage_rollup_tiers.sql).
+#   columnar: $1 user, $2 hour, $3 day, $4 month, $5 events_by_type,
+#             $6 tokens_by_type; each tier gets one counter row per type.
+_UPSERT_ROLLUPS_SQL = {
+    "jsonb": """
+WITH hourly AS (
+    INSERT INTO hourly_usage_stats
+        (user_id, hour, total_events, total_tokens, events_by_type)
+    VALUES ($1, $2, $5, $6, $7::jsonb)
+    ON CONFLICT (user_id, hour) DO UPDATE SET
+        total_events   = hourly_usage_stats.total_events
+                         + EXCLUDED.total_events,
+        total_tokens   = hourly_usage_stats.total_tokens
+                         + EXCLUDED.total_tokens,
+        events_by_type = usage_counts_merge(
+            hourly_usage_stats.events_by_type, EXCLUDED.events_by_type
+        )
+),
+daily AS (
+    INSERT INTO daily_usage_stats
+        (user_id, date, total_events, total_tokens, events_by_type)
+    VALUES ($1, $3, $5, $6, $7::jsonb)
+    ON CONFLICT (user_id, date) DO UPDATE SET
+        total_events   = daily_usage_stats.total_events
+                         + EXCLUDED.total_events,
+        total_tokens   = daily_usage_stats.total_tokens
+                         + EXCLUDED.total_tokens,
+        events_by_type = usage_counts_merge(
+            daily_usage_stats.events_by_type, EXCLUDED.events_by_type
+        )
+)
+INSERT INTO monthly_usage_stats
+    (user_id, month, total_events, total_tokens, events_by_type)
+VALUES ($1, $4, $5, $6, $7::jsonb)
+ON CONFLICT (user_id, month) DO UPDATE SET
+    total_events   = monthly_usage_stats.total_events
+                     + EXCLUDED.total_events,
+    total_tokens   = monthly_usage_stats.total_tokens
+                     + EXCLUDED.total_tokens,
+    events_by_type = usage_counts_merge(
+        monthly_usage_stats.events_by_type, EXCLUDED.events_by_type
+    )
+""",
+    "columnar": """
+WITH counts AS (
+    SELECT counts.key AS event_type,
+           counts.value::bigint AS event_count,
+           COALESCE(($6::jsonb ->> counts.key)::bigint, 0) AS total_tokens
+    FROM   jsonb_each_text($5::jsonb) AS counts
+),
+hourly AS (
+    INSERT INTO hourly_usage_type_stats
+        (user_id, hour, event_type, event_count, total_tokens)
+    SELECT $1, $2, event_type, event_count, total_tokens FROM counts
+    ON CONFLICT (user_id, hour, event_type) DO UPDATE SET
+        event_count  = hourly_usage_type_stats.event_count
+                       + EXCLUDED.event_count,
+        total_tokens = hourly_usage_type_stats.total_tokens
+                       + EXCLUDED.total_tokens
+),
+daily AS (
+    INSERT INTO daily_usage_type_stats
+        (user_id, date, event_type, event_count, total_tokens)
+    SELECT $1, $3, event_type, event_count, total_tokens FROM counts
+    ON CONFLICT (user_id, date, event_type) DO UPDATE SET
+        event_count  = daily_usage_type_stats.event_count
+                       + EXCLUDED.event_count,
+        total_tokens = daily_usage_type_stats.total_tokens
+                       + EXCLUDED.total_tokens
+)
+INSERT INTO monthly_usage_type_stats
+    (user_id, month, event_type, event_count, total_tokens)
+SELECT $1, $4, event_type, event_count, total_tokens FROM counts
+ON CONFLICT (user_id, month, event_type) DO UPDATE SET
+    event_count  = monthly_usage_type_stats.event_count
+                   + EXCLUDED.event_count,
+    total_tokens = monthly_usage_type_stats.total_tokens
+                   + EXCLUDED.total_tokens
+""",
+}
+
 
 class AnalyticsRepository(BaseRepository):
-    """Provides persistence operations for analytics data."""
+    """Provides persistence operations for analytics data.
+
+    Event listings and exports are issued with ``read_only=True`` and may be
+    served by a read replica, so they can trail writes by the replica's lag.
+    Summaries and rollup stats are read from the primary: they are cached
+    (guarded against concurrent writes, not against replica lag) or merged
+    with live counter deltas that may already be flushed to the primary.
+    """
+
+    def __init__(
+        self, db: BaseDatabaseProvider, stats_storage: StatsStorage = "jsonb"
+    ) -> None:
+        super().__init__(db)
+        self._stats_storage = stats_storage
+        tables = _STATS_TABLES[stats_storage]
+        self._hourly_table = tables["hourly"]
+        self._daily_table = tables["daily"]
+        self._monthly_table = tables["monthly"]
+        self._upsert_rollups_sql = _UPSERT_ROLLUPS_SQL[stats_storage]
 
     # ------------------------------------------------------------------
     # Write operations
@@ -40,47 +206,173 @@ class AnalyticsRepository(BaseRepository):
             data.model,
             data.tokens_used,
             data.latency_ms,
-            json.dumps(data.metadata),
+            data.metadata,
         )
         return _row_to_event(row)
 
+    async def record_events(
+        self, events: list[UsageEventCreate]
+    ) -> list[UsageEventResponse]:
+        """
+        Bulk-insert usage events with a single ``COPY`` and return them.
+        Ids and timestamps are assigned here rather than by column defaults
+        because COPY cannot return the inserted rows.
+        """
+        created_at = datetime.now(timezone.utc)
+        persisted = [
+            UsageEventResponse(
+                id=uuid.uuid4(),
+                user_id=data.user_id,
+                event_type=data.event_type,
+                provider=data.provider,
+                model=data.model,
+                tokens_used=data.tokens_used,
+                latency_ms=data.latency_ms,
+                metadata=data.metadata,
+                created_at=created_at,
+            )
+            for data in events
+        ]
+        await self._db.copy_records(
+            "usage_events",
+            [
+                (
+                    e.id,
+                    e.user_id,
+                    e.event_type,
+                    e.provider,
+                    e.model,
+                    e.tokens_used,
+                    e.latency_ms,
+                    e.metadata,
+                    e.created_at,
+                )
+                for e in persisted
+            ],
+            columns=_EVENT_COLUMNS,
+        )
+        return persisted
+
+    async def upsert_daily_stats_batch(
+        self, increments: list[UsageStatIncrement]
+    ) -> None:
+        """
+        Apply pre-aggregated increments, one rollup upsert per (user, hour).
+        Each increment is added to its hourly, daily and monthly rows.
+        """
+        await self._db.execute_many(
+            self._upsert_rollups_sql,
+            [
+                self._rollup_args(
+                    inc.user_id,
+                    inc.hour,
+                    inc.total_events,
+                    inc.total_tokens,
+                    inc.events_by_type,
+                    inc.tokens_by_type,
+                )
+                for inc in increments
+            ],
+        )
+
     async def upsert_daily_stats(
         self,
         user_id: uuid.UUID,
-        stat_date: date,
+        stat_hour: datetime,
         event_type: str,
         tokens: int,
     ) -> None:
         """
-        Insert or update the aggregated daily stats row for a user/date pair.
-        Increments total_events, total_tokens, and the per-type counter in
-        the events_by_type JSONB column atomically.
+        Record one event in the hourly, daily and monthly rollups for the
+        UTC hour starting at *stat_hour*.  Increments total_events,
+        total_tokens and the per-type counter of each tier atomically.
         """
+        tokens = tokens or 0
         await self._db.execute(
-            """
-            INSERT INTO daily_usage_stats
-                (user_id, date, total_events, total_tokens, events_by_type)
-            VALUES ($1, $2, 1, $3, jsonb_build_object($4::text, 1))
-            ON CONFLICT (user_id, date) DO UPDATE SET
-                total_events   = daily_usage_stats.total_events + 1,
-                total_tokens   = daily_usage_stats.total_tokens + $3,
-                events_by_type = jsonb_set(
-                    daily_usage_stats.events_by_type,
-                    ARRAY[$4::text],
-                    to_jsonb(
-                        COALESCE(
-                            (daily_usage_stats.events_by_type ->> $4::text)::integer,
-                            0
-                        ) + 1
-                    )
-                )
-            """,
+            self._upsert_rollups_sql,
+            *self._rollup_args(
+                user_id,
+                stat_hour,
+                1,
+                tokens,
+                {event_type: 1},
+                {event_type: tokens},
+            ),
+        )
+
+    def _rollup_args(
+        self,
+        user_id: uuid.UUID,
+        hour: datetime,
+        total_events: int,
+        total_tokens: int,
+        events_by_type: dict[str, int],
+        tokens_by_type: dict[str, int],
+    ) -> tuple:
+        """Positional arguments for the rollup upsert statement."""
+        hour = hour.astimezone(timezone.utc).replace(
+            minute=0, second=0, microsecond=0
+        )
+        day = hour.date()
+        if self._stats_storage == "columnar":
+            return (
+                user_id,
+                hour,
+                day,
+                day.replace(day=1),
+                events_by_type,
+                tokens_by_type,
+            )
+        return (
             user_id,
-            stat_date,
-            tokens or 0,
-            event_type,
+            hour,
+            day,
+            day.replace(day=1),
+            total_events,
+            total_tokens,
+            events_by_type,
         )
 
+    # ------------------------------------------------------------------
+    # Partition maintenance
+    # ------------------------------------------------------------------
+
+    async def create_event_partitions(self, months_ahead: int) -> int:
+        """
+        Pre-create monthly usage_events partitions up to *months_ahead*
+        months after the current one, moving any matching events out of the
+        DEFAULT partition; returns how many were created.
+        """
+        row = await self._db.fetch_one(
+            "SELECT usage_events_create_partitions($1) AS created",
+            months_ahead,
+        )
+        return int(row["created"]) if row else 0
+
+    async def expire_event_partitions(
+        self, retention_months: int, detach_only: bool
+    ) -> list[str]:
+        """
+        Detach (or drop) usage_events partitions older than the retention
+        window and return their names.
+        """
+        rows = await self._db.fetch_all(
+            "SELECT usage_events_expire_partitions($1, $2) AS name",
+            retention_months,
+            detach_only,
+        )
+        return [r["name"] for r in rows]
+
+    async def count_default_partition_events(self) -> int:
+        """
+        Count the events sitting in the DEFAULT partition, i.e. in months
+        that had no partition of their own when they were recorded.
+        """
+        row = await self._db.fetch_one(
+            "SELECT COUNT(*) AS events FROM usage_events_default"
+        )
+        return int(row["events"]) if row else 0
+
     # ------------------------------------------------------------------
     # Read operations
     # ------------------------------------------------------------------
@@ -92,8 +384,16 @@ class AnalyticsRepository(BaseRepository):
         event_type: str | None,
         start_date: date | None = None,
         end_date: date | None = None,
-    ) -> list[UsageEventResponse]:
-        """Return the most recent usage events for a user, with optional filtering."""
+        before: tuple[datetime, uuid.UUID] | None = None,
+    ) -> list[UsageEventRecord]:
+        """
+        Return the most recent usage events for a user, with optional
+        filtering, ordered by (created_at, id) descending.
+
+        *before* is a keyset position: only events strictly older than that
+        (created_at, id) pair are returned, so each page is an index range
+        scan on (user_id, created_at DESC, id DESC) however deep it is.
+        """
         conditions = ["user_id = $1"]
         args: list = [user_id]
 
@@ -106,21 +406,61 @@ class AnalyticsRepository(BaseRepository):
         if end_date:
             args.append(end_date)
             conditions.append(f"created_at < (${len(args)} + INTERVAL '1 day')")
+        if before:
+            args.extend(before)
+            conditions.append(
+                f"(created_at, id) < (${len(args) - 1}, ${len(args)})"
+            )
 
         args.append(limit)
         where_clause = " AND ".join(conditions)
-        rows = await self._db.fetch_all(
+        rows = await self._db.fetch_records(
+            f"""
+            SELECT {_EVENT_SELECT}
+            FROM   usage_events
+            WHERE  {where_clause}
+            ORDER  BY created_at DESC, id DESC
+            LIMIT  ${len(args)}
+            """,
+            *args,
+            read_only=True,
+        )
+        return [UsageEventRecord(*r) for r in rows]
+
+    def iter_events(
+        self,
+        user_id: uuid.UUID,
+        start_date: date,
+        end_date: date,
+        event_type: str | None = None,
+    ) -> AsyncIterator[dict]:
+        """
+        Stream raw usage event rows for a user and date range, oldest first,
+        from a server-side cursor.  Rows are yielded as plain dicts so bulk
+        consumers can serialise them without building response models.
+        """
+        conditions = [
+            "user_id = $1",
+            "created_at >= $2",
+            "created_at < ($3 + INTERVAL '1 day')",
+        ]
+        args: list = [user_id, start_date, end_date]
+        if event_type:
+            args.append(event_type)
+            conditions.append(f"event_type = ${len(args)}")
+
+        where_clause = " AND ".join(conditions)
+        return self._db.iterate(
             f"""
             SELECT id, user_id, event_type, provider, model,
                    tokens_used, latency_ms, metadata, created_at
             FROM   usage_events
             WHERE  {where_clause}
-            ORDER  BY created_at DESC
-            LIMIT  ${len(args)}
+            ORDER  BY created_at, id
             """,
             *args,
+            read_only=True,
         )
-        return [_row_to_event(r) for r in rows]
 
     async def get_daily_stats(
         self,
@@ -130,9 +470,9 @@ class AnalyticsRepository(BaseRepository):
     ) -> list[DailyStatResponse]:
         """Return per-day aggregated stats for a user within a date range."""
         rows = await self._db.fetch_all(
-            """
+            f"""
             SELECT date, total_events, total_tokens, events_by_type
-            FROM   daily_usage_stats
+            FROM   {self._daily_table}
             WHERE  user_id = $1
               AND  date BETWEEN $2 AND $3
             ORDER  BY date ASC
@@ -143,56 +483,134 @@ class AnalyticsRepository(BaseRepository):
         )
         return [_row_to_daily_stat(r) for r in rows]
 
+    async def get_hourly_stats(
+        self,
+        user_id: uuid.UUID,
+        start: datetime,
+        end: datetime,
+    ) -> list[HourlyStatResponse]:
+        """Return per-hour aggregated stats for a user in ``[start, end)``."""
+        rows = await self._db.fetch_all(
+            f"""
+            SELECT hour, total_events, total_tokens, events_by_type
+            FROM   {self._hourly_table}
+            WHERE  user_id = $1
+              AND  hour >= $2
+              AND  hour < $3
+            ORDER  BY hour ASC
+            """,
+            user_id,
+            start,
+            end,
+        )
+        return [
+            HourlyStatResponse(
+                hour=r["hour"],
+                total_events=int(r["total_events"]),
+                total_tokens=int(r["total_tokens"]),
+                events_by_type=_parse_jsonb(r.get("events_by_type")),
+            )
+            for r in rows
+        ]
+
     async def get_user_summary(
         self,
         user_id: uuid.UUID,
         start_date: date,
         end_date: date,
         limit: int,
+        months: tuple[date, date] | None = None,
     ) -> AnalyticsSummaryResponse:
         """
         Compute a high-level summary combining totals and per-type
-        breakdowns from the daily stats table, plus recent raw events.
+        breakdowns from the rollup tables, plus recent raw events.
+
+        Everything is produced by one statement: the ``daily`` CTE scans the
+        user's daily rows once for the daily list, while the recent events
+        come from the keyset index in the same round trip.  When *months*
+        gives the first and last whole months inside the range, totals and
+        per-type sums read those months from the monthly tier and only the
+        remaining edge days from the daily rows.
         """
-        # Aggregate totals from daily_usage_stats for the date range
-        agg = await self._db.fetch_one(
-            """
+        month_end = (
+            (months[1] + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+            if months
+            else None
+        )
+        row = await self._db.fetch_one(
+            f"""
+            WITH daily AS (
+                SELECT date, total_events, total_tokens, events_by_type
+                FROM   {self._daily_table}
+                WHERE  user_id = $1
+                  AND  date BETWEEN $2 AND $3
+            ),
+            tier AS (
+                SELECT total_events, total_tokens, events_by_type
+                FROM   {self._monthly_table}
+                WHERE  user_id = $1
+                  AND  month BETWEEN $5 AND $6
+                UNION ALL
+                SELECT total_events, total_tokens, events_by_type
+                FROM   daily
+                WHERE  $5::date IS NULL OR date < $5 OR date > $7
+            ),
+            by_type AS (
+                SELECT key, SUM(value::bigint) AS cnt
+                FROM   tier, jsonb_each_text(tier.events_by_type)
+                GROUP  BY key
+            ),
+            recent AS (
+                SELECT id, user_id, event_type, provider, model,
+                       tokens_used, latency_ms, metadata, created_at
+                FROM   usage_events
+                WHERE  user_id = $1
+                ORDER  BY created_at DESC, id DESC
+                LIMIT  $4
+            )
             SELECT
-                COALESCE(SUM(total_events), 0)  AS total_events,
-                COALESCE(SUM(total_tokens), 0)  AS total_tokens,
-                (
-                    SELECT jsonb_object_agg(key, cnt)
-                    FROM (
-                        SELECT key, SUM(value::bigint) AS cnt
-                        FROM   daily_usage_stats,
-                               jsonb_each_text(events_by_type)
-                        WHERE  user_id = $1
-                          AND  date BETWEEN $2 AND $3
-                        GROUP  BY key
-                    ) sub
-                ) AS events_by_type
-            FROM daily_usage_stats
-            WHERE user_id = $1
-              AND date BETWEEN $2 AND $3
+                (SELECT COALESCE(SUM(total_events), 0) FROM tier)
+                    AS total_events,
+                (SELECT COALESCE(SUM(total_tokens), 0) FROM tier)
+                    AS total_tokens,
+                (SELECT jsonb_object_agg(key, cnt) FROM by_type)
+                    AS events_by_type,
+                (SELECT jsonb_agg(to_jsonb(daily) ORDER BY date) FROM daily)
+                    AS daily_stats,
+                (SELECT jsonb_agg(to_jsonb(recent)
+                                  ORDER BY created_at DESC, id DESC)
+                 FROM recent)
+                    AS recent_events
             """,
             user_id,
             start_date,
             end_date,
+            limit,
+            months[0] if months else None,
+            months[1] if months else None,
+            month_end,
         )
 
-        total_events = int(agg["total_events"]) if agg else 0
-        total_tokens = int(agg["total_tokens"]) if agg else 0
-        events_by_type: dict = _parse_jsonb(agg["events_by_type"] if agg else None)
-
-        recent = await self.get_recent_events(user_id, limit, None)
-        daily = await self.get_daily_stats(user_id, start_date, end_date)
-
+        if row is None:
+            return AnalyticsSummaryResponse(
+                total_events=0,
+                total_tokens=0,
+                events_by_type={},
+                recent_events=[],
+                daily_stats=[],
+            )
         return AnalyticsSummaryResponse(
-            total_events=total_events,
-            total_tokens=total_tokens,
-            events_by_type=events_by_type,
-            recent_events=recent,
-            daily_stats=daily,
+            total_events=int(row["total_events"]),
+            total_tokens=int(row["total_tokens"]),
+            events_by_type=_parse_jsonb(row["events_by_type"]),
+            recent_events=[
+                UsageEventResponse.model_validate(e)
+                for e in _parse_jsonb_list(row["recent_events"])
+            ],
+            daily_stats=[
+                DailyStatResponse.model_validate(d)
+                for d in _parse_jsonb_list(row["daily_stats"])
+            ],
         )
 
 
@@ -202,15 +620,16 @@ class AnalyticsRepository(BaseRepository):
 
 
 def _parse_jsonb(value: object) -> dict:
-    """Normalise an asyncpg JSONB value to a plain Python dict."""
-    if value is None:
-        return {}
-    if isinstance(value, str):
-        return json.loads(value)
-    return dict(value)
+    """Normalise a decoded JSONB value (``None`` for SQL NULL) to a dict."""
+    return dict(value) if value is not None else {}
+
+
+def _parse_jsonb_list(value: object) -> list:
+    """Normalise a decoded JSONB array (``None`` for SQL NULL) to a list."""
+    return list(value) if value is not None else []
 
 
-def _row_to_event(row: dict) -> UsageEventResponse:
+def _row_to_event(row: Mapping[str, Any]) -> UsageEventResponse:
     created_at: datetime = row["created_at"]
     if created_at.tzinfo is None:
         created_at = created_at.replace(tzinfo=timezone.utc)
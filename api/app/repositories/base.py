@@ -1,6 +1,29 @@
-from app.providers.base import BaseDatabaseProvider
+import copy
+from collections.abc import Sequence
+from contextlib import AbstractAsyncContextManager
+from typing import Self
+
+from app.providers.base import BaseDatabaseProvider, Statement
 
 
 class BaseRepository:
     def __init__(self, db: BaseDatabaseProvider) -> None:
         self._db = db
+
+    def transaction(self) -> AbstractAsyncContextManager[BaseDatabaseProvider]:
+        """Open a transaction on this repository's database provider."""
+        return self._db.transaction()
+
+    async def execute_batch(self, statements: Sequence[Statement]) -> None:
+        """Run statements built by repositories in one round trip."""
+        await self._db.execute_batch(statements)
+
+    def using(self, db: BaseDatabaseProvider) -> Self:
+        """Return a copy of this repository that queries through *db*.
+
+        Used to run repository methods on the provider yielded by
+        :meth:`transaction`.
+        """
+        bound = copy.copy(self)
+        bound._db = db
+        return bound
@@ -1,5 +1,6 @@
 from datetime import datetime
 
+from app.providers.base import Statement
 from app.repositories.base import BaseRepository
 
 
@@ -17,20 +18,32 @@ class PasswordResetRepository(BaseRepository):
             expires_at,
         )
 
-    async def find_valid_by_hash(self, token_hash: str) -> dict | None:
+    async def find_valid_by_hash(
+        self, token_hash: str, for_update: bool = False
+    ) -> dict | None:
+        """Return the unused, unexpired token with *token_hash*.
+
+        *for_update* locks the row until the surrounding transaction ends,
+        so a token cannot be redeemed twice concurrently.
+        """
         return await self._db.fetch_one(
-            """SELECT * FROM password_reset_tokens
+            f"""SELECT * FROM password_reset_tokens
                WHERE token_hash = $1
                  AND used_at IS NULL
-                 AND expires_at > NOW()""",
+                 AND expires_at > NOW()
+               {"FOR UPDATE" if for_update else ""}""",
             token_hash,
         )
 
     async def mark_used(self, token_id: str) -> None:
-        await self._db.execute(
+        stmt = self.mark_used_statement(token_id)
+        await self._db.execute(stmt.query, *stmt.args)
+
+    def mark_used_statement(self, token_id: str) -> Statement:
+        return Statement(
             """UPDATE password_reset_tokens SET used_at = NOW()
                WHERE id = $1::uuid""",
-            token_id,
+            (token_id,),
         )
 
     async def revoke_all_for_user(self, user_id: str) -> None:
@@ -1,7 +1,45 @@
 from datetime import datetime
 
+from app.providers.base import Statement
 from app.repositories.base import BaseRepository
 
+# Revokes the live token $1 and inserts its successor, or, if $1 is not
+# live (reuse of a rotated token), revokes the rest of family $4.  All CTEs
+# share the statement's snapshot; "raced" flags a token that was live in it
+# but rotated by a concurrent statement before the UPDATE got its row lock.
+_ROTATE_SQL = """
+WITH snapshot AS (
+    SELECT 1
+    FROM   refresh_tokens
+    WHERE  token_hash = $1
+      AND  revoked_at IS NULL
+      AND  expires_at > NOW()
+),
+revoked AS (
+    UPDATE refresh_tokens SET revoked_at = NOW()
+    WHERE  token_hash = $1
+      AND  user_id = $5::uuid
+      AND  revoked_at IS NULL
+      AND  expires_at > NOW()
+    RETURNING id
+),
+inserted AS (
+    INSERT INTO refresh_tokens (user_id, token_hash, family_id, expires_at)
+    SELECT $5::uuid, $2, $4::uuid, $3
+    FROM   revoked
+    RETURNING id
+),
+family AS (
+    UPDATE refresh_tokens SET revoked_at = NOW()
+    WHERE  family_id = $4::uuid
+      AND  revoked_at IS NULL
+      AND  NOT EXISTS (SELECT 1 FROM revoked)
+)
+SELECT EXISTS (SELECT 1 FROM inserted) AS rotated,
+       EXISTS (SELECT 1 FROM snapshot)
+           AND NOT EXISTS (SELECT 1 FROM revoked) AS raced
+"""
+
 
 class RefreshTokenRepository(BaseRepository):
     async def create(
@@ -22,6 +60,37 @@ class RefreshTokenRepository(BaseRepository):
             expires_at,
         )
 
+    async def rotate(
+        self,
+        token_hash: str,
+        user_id: str,
+        new_token_hash: str,
+        family_id: str,
+        expires_at: datetime,
+    ) -> bool:
+        """Replace the live token *token_hash* with *new_token_hash*.
+
+        Revoking the old token and inserting the new one is a single
+        statement.  Returns ``False`` if the old token was not live, which
+        is treated as reuse: the rest of *family_id* is revoked in the same
+        statement.  Only if another rotation of the token committed while
+        this one waited is a second statement needed, as the token it
+        issued is not visible to this statement.
+        """
+        row = await self._db.fetch_one(
+            _ROTATE_SQL,
+            token_hash,
+            new_token_hash,
+            expires_at,
+            family_id,
+            user_id,
+        )
+        if row["rotated"]:
+            return True
+        if row["raced"]:
+            await self.revoke_family(family_id)
+        return False
+
     async def find_by_token_hash(self, token_hash: str) -> dict | None:
         return await self._db.fetch_one(
             """SELECT * FROM refresh_tokens
@@ -45,8 +114,12 @@ class RefreshTokenRepository(BaseRepository):
         )
 
     async def revoke_all_for_user(self, user_id: str) -> None:
-        await self._db.execute(
+        stmt = self.revoke_all_for_user_statement(user_id)
+        await self._db.execute(stmt.query, *stmt.args)
+
+    def revoke_all_for_user_statement(self, user_id: str) -> Statement:
+        return Statement(
             """UPDATE refresh_tokens SET revoked_at = NOW()
                WHERE user_id = $1::uuid AND revoked_at IS NULL""",
-            user_id,
+            (user_id,),
         )
@@ -1,7 +1,16 @@
+from app.models.user import UserInDB
+from app.providers.base import BaseDatabaseProvider, Statement
 from app.repositories.base import BaseRepository
+from app.repositories.user_cache import UserCache
 
 
 class UserRepository(BaseRepository):
+    def __init__(
+        self, db: BaseDatabaseProvider, cache: UserCache | None = None
+    ) -> None:
+        super().__init__(db)
+        self._cache = cache
+
     async def create(
         self,
         email: str,
@@ -46,14 +55,38 @@ class UserRepository(BaseRepository):
             "SELECT * FROM users WHERE id = $1::uuid", user_id
         )
 
+    async def get_by_id(self, user_id: str) -> UserInDB | None:
+        """Return the user as ``UserInDB``, served from the cache when set."""
+        if self._cache is not None:
+            cached = self._cache.get(user_id)
+            if cached is not None:
+                return cached
+        row = await self.find_by_id(user_id)
+        if row is None:
+            return None
+        user = UserInDB(**row)
+        if self._cache is not None:
+            self._cache.set(user)
+        return user
+
     async def update_password(
         self, user_id: str, password_hash: str
     ) -> None:
-        await self._db.execute(
+        stmt = self.update_password_statement(user_id, password_hash)
+        await self._db.execute(stmt.query, *stmt.args)
+        await self.invalidate(user_id)
+
+    def update_password_statement(
+        self, user_id: str, password_hash: str
+    ) -> Statement:
+        """Statement form of :meth:`update_password`.
+
+        The caller must :meth:`invalidate` the user once it has committed.
+        """
+        return Statement(
             """UPDATE users SET password_hash = $1, updated_at = NOW()
                WHERE id = $2::uuid""",
-            password_hash,
-            user_id,
+            (password_hash, user_id),
         )
 
     async def mark_verified(self, user_id: str) -> None:
@@ -62,3 +95,9 @@ class UserRepository(BaseRepository):
                WHERE id = $1::uuid""",
             user_id,
         )
+        await self.invalidate(user_id)
+
+    async def invalidate(self, user_id: str) -> None:
+        """Drop *user_id* from the user cache."""
+        if self._cache is not None:
+            await self._cache.invalidate(user_id)
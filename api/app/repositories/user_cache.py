@@ -0,0 +1,81 @@
+"""In-process cache of ``UserInDB`` rows with cross-replica invalidation."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from app.cache import TTLCache
+from app.models.user import UserInDB
+from app.providers.redis import RedisProvider
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "users:invalidate"
+_RESUBSCRIBE_DELAY_SECONDS = 1.0
+
+
+class UserCache:
+    """LRU+TTL cache of users keyed by id, sitting in front of ``find_by_id``.
+
+    Every authenticated request resolves its user; rows change rarely, so
+    caching them for a short TTL removes a database round trip from the hot
+    path.  Writes that change a user call :meth:`invalidate`, which evicts
+    the local entry and, when a Redis provider is given, publishes the id on
+    ``INVALIDATION_CHANNEL`` so every replica running :meth:`listen` evicts it
+    too.  The TTL bounds staleness if a message is missed.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 10_000,
+        ttl_seconds: float = 60,
+        redis: RedisProvider | None = None,
+    ) -> None:
+        self._cache: TTLCache[str, UserInDB] = TTLCache(
+            maxsize=maxsize, ttl_seconds=ttl_seconds
+        )
+        self._redis = redis
+
+    def get(self, user_id: str) -> UserInDB | None:
+        return self._cache.get(str(user_id))
+
+    def set(self, user: UserInDB) -> None:
+        self._cache.set(str(user.id), user)
+
+    async def invalidate(self, user_id: str) -> None:
+        """Evict *user_id* locally and broadcast the eviction to replicas."""
+        self._cache.pop(str(user_id))
+        if self._redis is None:
+            return
+        try:
+            await self._redis.publish(INVALIDATION_CHANNEL, str(user_id))
+        except Exception:
+            logger.warning(
+                "Failed to publish user cache invalidation for user_id=%s",
+                user_id,
+            )
+
+    async def listen(self) -> None:
+        """Evict users announced on the invalidation channel until cancelled.
+
+        If the subscription drops, messages may have been missed, so the
+        whole local cache is cleared before resubscribing.
+        """
+        if self._redis is None:
+            return
+        while True:
+            try:
+                async for user_id in self._redis.subscribe(INVALIDATION_CHANNEL):
+                    self._cache.pop(user_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning(
+                    "User cache invalidation subscription lost; retrying"
+                )
+            self._cache.clear()
+            await asyncio.sleep(_RESUBSCRIBE_DELAY_SECONDS)
+
+    def get_status(self) -> dict:
+        return self._cache.get_status()
@@ -0,0 +1,44 @@
+"""JSON responses rendered with orjson."""
+
+from __future__ import annotations
+
+import uuid
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def dump_json(value: Any) -> bytes:
+    """Serialise *value* as JSON the way pydantic would render the response.
+
+    orjson handles dataclasses, UUIDs and datetimes natively; UTC datetimes
+    are written with a ``Z`` suffix as pydantic does.  Pydantic models are
+    dumped in JSON mode, and UUID subclasses orjson does not accept (such
+    as asyncpg's) are written as strings.
+    """
+    return orjson.dumps(value, default=_default, option=orjson.OPT_UTC_Z)
+
+
+class ORJSONResponse(JSONResponse):
+    """A JSON response rendered with :func:`dump_json`.
+
+    ``bytes`` content is taken to be JSON already and sent as-is.  Routes
+    that return this response directly skip FastAPI's validation and
+    serialisation against their ``response_model``, which then only
+    documents the schema.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dump_json(content)
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
@@ -3,19 +3,31 @@
 from __future__ import annotations
 
 from datetime import date
+from typing import Literal
 
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 
-from app.dependencies import get_analytics_service, get_current_user
+from app.dependencies import (
+    get_analytics_buffer,
+    get_analytics_service,
+    get_current_user,
+)
 from app.models.user import UserInDB
+from app.responses import ORJSONResponse
 from app.schemas.analytics import (
     AnalyticsQueryParams,
     AnalyticsSummaryResponse,
     DailyStatResponse,
+    HourlyStatResponse,
+    UsageEventBatchCreate,
+    UsageEventBatchResponse,
     UsageEventCreate,
+    UsageEventPage,
     UsageEventResponse,
 )
 from app.services.analytics import AnalyticsService
+from app.services.analytics_buffer import AnalyticsEventBuffer
 
 router = APIRouter(prefix="/api/v1/analytics", tags=["analytics"])
 
@@ -23,6 +35,7 @@ router = APIRouter(prefix="/api/v1/analytics", tags=["analytics"])
 @router.get(
     "/summary",
     response_model=AnalyticsSummaryResponse,
+    response_class=ORJSONResponse,
     summary="Get analytics summary for the authenticated user",
 )
 async def get_summary(
@@ -31,11 +44,12 @@ async def get_summary(
     limit: int = Query(default=50, ge=1, le=500),
     current_user: UserInDB = Depends(get_current_user),
     service: AnalyticsService = Depends(get_analytics_service),
-) -> AnalyticsSummaryResponse:
+) -> ORJSONResponse:
     """
     Returns total event counts, token usage, per-type breakdowns,
     recent events, and daily stats for the authenticated user.
-    Results are served from Redis when available (5-minute TTL).
+    Results are served from Redis when available (5-minute TTL), as the
+    cached JSON bytes without re-serialisation.
     Aggregated totals apply to all event types within the date range.
     """
     params = AnalyticsQueryParams(
@@ -43,12 +57,15 @@ async def get_summary(
         end_date=end_date,
         limit=limit,
     )
-    return await service.get_cached_summary(current_user.id, params)
+    return ORJSONResponse(
+        await service.get_cached_summary_json(current_user.id, params)
+    )
 
 
 @router.get(
     "/events",
-    response_model=list[UsageEventResponse],
+    response_model=UsageEventPage,
+    response_class=ORJSONResponse,
     summary="List recent usage events for the authenticated user",
 )
 async def list_events(
@@ -56,21 +73,65 @@ async def list_events(
     end_date: date | None = Query(default=None),
     event_type: str | None = Query(default=None),
     limit: int = Query(default=50, ge=1, le=500),
+    cursor: str | None = Query(default=None),
     current_user: UserInDB = Depends(get_current_user),
     service: AnalyticsService = Depends(get_analytics_service),
-) -> list[UsageEventResponse]:
+) -> ORJSONResponse:
     """
-    Returns a list of individual usage events ordered by most recent first.
+    Returns a page of individual usage events ordered by most recent first.
     Filtered by the authenticated user's identity, optional event_type,
-    and optional date range.
+    and optional date range.  Pass the returned ``next_cursor`` as
+    ``cursor`` to fetch the following page; it is null on the last page.
     """
     params = AnalyticsQueryParams(
         start_date=start_date,
         end_date=end_date,
         event_type=event_type,
         limit=limit,
+        cursor=cursor,
+    )
+    return ORJSONResponse(
+        await service.get_user_events_json(current_user.id, params)
+    )
+
+
+_EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+@router.get(
+    "/events/export",
+    response_class=StreamingResponse,
+    summary="Export usage events for the authenticated user as NDJSON or CSV",
+)
+async def export_events(
+    start_date: date | None = Query(default=None),
+    end_date: date | None = Query(default=None),
+    event_type: str | None = Query(default=None),
+    fmt: Literal["ndjson", "csv"] = Query(default="ndjson", alias="format"),
+    current_user: UserInDB = Depends(get_current_user),
+    service: AnalyticsService = Depends(get_analytics_service),
+) -> StreamingResponse:
+    """
+    Streams every event in the date range (default: last 30 days), oldest
+    first, without a row limit.  Rows are read from a server-side cursor
+    and written as they arrive, so the response size is unbounded while
+    server memory stays constant.
+    """
+    params = AnalyticsQueryParams(
+        start_date=start_date,
+        end_date=end_date,
+        event_type=event_type,
+    )
+    return StreamingResponse(
+        service.export_events(current_user.id, params, fmt),
+        media_type=_EXPORT_MEDIA_TYPES[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="usage_events.{fmt}"'
+        },
     )
-    return await service.get_user_events(current_user.id, params)
 
 
 @router.get(
@@ -95,6 +156,28 @@ async def list_daily_stats(
     return await service.get_daily_stats_only(current_user.id, params)
 
 
+@router.get(
+    "/hourly",
+    response_model=list[HourlyStatResponse],
+    summary="List hourly aggregated stats for the authenticated user",
+)
+async def list_hourly_stats(
+    start_date: date | None = Query(default=None),
+    end_date: date | None = Query(default=None),
+    current_user: UserInDB = Depends(get_current_user),
+    service: AnalyticsService = Depends(get_analytics_service),
+) -> list[HourlyStatResponse]:
+    """
+    Returns per-hour (UTC) aggregated event counts and token totals
+    for the authenticated user within the requested date range.
+    """
+    params = AnalyticsQueryParams(
+        start_date=start_date,
+        end_date=end_date,
+    )
+    return await service.get_hourly_stats_only(current_user.id, params)
+
+
 @router.post(
     "/events",
     response_model=UsageEventResponse,
@@ -113,3 +196,48 @@ async def record_event(
     data.user_id = current_user.id
     return await service.track_event(data)
 
+
+@router.post(
+    "/events/batch",
+    response_model=UsageEventBatchResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Record a batch of usage events (JWT auth required)",
+)
+async def record_events_batch(
+    data: UsageEventBatchCreate,
+    current_user: UserInDB = Depends(get_current_user),
+    service: AnalyticsService = Depends(get_analytics_service),
+) -> UsageEventBatchResponse:
+    """
+    Persists up to 1000 usage events in one bulk write.  Every event's
+    user_id is overridden with the authenticated user's id.
+    """
+    for event in data.events:
+        event.user_id = current_user.id
+    persisted = await service.track_events(data.events)
+    return UsageEventBatchResponse(accepted=len(persisted))
+
+
+@router.post(
+    "/events/async",
+    response_model=UsageEventBatchResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Queue a usage event for background persistence (JWT auth required)",
+)
+async def enqueue_event(
+    data: UsageEventCreate,
+    current_user: UserInDB = Depends(get_current_user),
+    buffer: AnalyticsEventBuffer = Depends(get_analytics_buffer),
+) -> UsageEventBatchResponse:
+    """
+    Fire-and-forget variant of POST /events: the event is buffered in
+    memory and written in bulk shortly after.  Returns 503 when the buffer
+    is full and the event was shed.
+    """
+    data.user_id = current_user.id
+    if not await buffer.put(data):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Analytics buffer full. Try again later.",
+        )
+    return UsageEventBatchResponse(accepted=1)
@@ -23,6 +23,18 @@ class UsageEventCreate(BaseModel):
     metadata: dict[str, Any] = Field(default_factory=dict)
 
 
+class UsageEventBatchCreate(BaseModel):
+    """Payload used to record many usage events in one request."""
+
+    events: list[UsageEventCreate] = Field(..., min_length=1, max_length=1000)
+
+
+class UsageEventBatchResponse(BaseModel):
+    """Result of a batch ingestion request."""
+
+    accepted: int
+
+
 class UsageEventResponse(BaseModel):
     """Full representation of a recorded usage event."""
 
@@ -39,6 +51,13 @@ class UsageEventResponse(BaseModel):
     created_at: datetime
 
 
+class UsageEventPage(BaseModel):
+    """One page of usage events plus the cursor for the next page."""
+
+    items: list[UsageEventResponse]
+    next_cursor: str | None = None
+
+
 class DailyStatResponse(BaseModel):
     """Aggregated usage statistics for a single calendar day."""
 
@@ -50,6 +69,17 @@ class DailyStatResponse(BaseModel):
     events_by_type: dict[str, Any]
 
 
+class HourlyStatResponse(BaseModel):
+    """Aggregated usage statistics for a single UTC hour."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    hour: datetime
+    total_events: int
+    total_tokens: int
+    events_by_type: dict[str, Any]
+
+
 class AnalyticsSummaryResponse(BaseModel):
     """High-level analytics summary for a user over a date range."""
 
@@ -62,6 +92,17 @@ class AnalyticsSummaryResponse(BaseModel):
     daily_stats: list[DailyStatResponse]
 
 
+class UsageStatIncrement(BaseModel):
+    """Pre-aggregated increments for one (user, UTC hour) across all tiers."""
+
+    user_id: uuid.UUID
+    hour: datetime
+    total_events: int = 0
+    total_tokens: int = 0
+    events_by_type: dict[str, int] = Field(default_factory=dict)
+    tokens_by_type: dict[str, int] = Field(default_factory=dict)
+
+
 class AnalyticsQueryParams(BaseModel):
     """Optional filters that apply to analytics query endpoints."""
 
@@ -71,3 +112,4 @@ class AnalyticsQueryParams(BaseModel):
     end_date: date | None = None
     event_type: str | None = None
     limit: int = Field(default=50, ge=1, le=500)
+    cursor: str | None = None
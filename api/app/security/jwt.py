@@ -1,8 +1,15 @@
+import hashlib
 import uuid
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 
 from jose import JWTError, jwt
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
+
+from app.cache import TTLCache
+
+# Upper bound on distinct tokens whose decoded payload is kept in memory.
+_TOKEN_CACHE_MAXSIZE = 10_000
 
 
 class TokenPayload(BaseModel):
@@ -14,6 +21,17 @@ class TokenPayload(BaseModel):
     family_id: str | None = None
 
 
+@lru_cache
+def get_token_payload_cache() -> TTLCache[str, TokenPayload]:
+    """Return the process-wide cache of verified token payloads.
+
+    Entries are keyed by the SHA-256 digest of the raw token and live until
+    the token's ``exp``, so a token is only signature-verified once per
+    process for as long as it is valid.
+    """
+    return TTLCache(maxsize=_TOKEN_CACHE_MAXSIZE)
+
+
 class JWTManager:
     def __init__(
         self,
@@ -21,11 +39,13 @@ class JWTManager:
         algorithm: str,
         access_expire_minutes: int,
         refresh_expire_days: int,
+        cache: TTLCache[str, TokenPayload] | None = None,
     ) -> None:
         self._secret = secret_key
         self._algorithm = algorithm
         self._access_expire = timedelta(minutes=access_expire_minutes)
         self._refresh_expire = timedelta(days=refresh_expire_days)
+        self._cache = cache
 
     def create_access_token(self, user_id: str) -> str:
         now = datetime.now(timezone.utc)
@@ -56,10 +76,22 @@ class JWTManager:
         return token, fid, expires_at
 
     def decode_token(self, token: str) -> TokenPayload:
+        if self._cache is None:
+            return self._decode(token)
+
+        digest = hashlib.sha256(token.encode()).hexdigest()
+        cached = self._cache.get(digest)
+        if cached is not None:
+            return cached
+
+        payload = self._decode(token)
+        ttl = (payload.exp - datetime.now(timezone.utc)).total_seconds()
+        self._cache.set(digest, payload, ttl_seconds=ttl)
+        return payload
+
+    def _decode(self, token: str) -> TokenPayload:
+        data = jwt.decode(token, self._secret, algorithms=[self._algorithm])
         try:
-            data = jwt.decode(
-                token, self._secret, algorithms=[self._algorithm]
-            )
             return TokenPayload(**data)
-        except JWTError:
-            raise
+        except ValidationError as exc:
+            raise JWTError("Token is missing required claims") from exc
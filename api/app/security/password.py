@@ -1,15 +1,121 @@
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Literal, TypeVar
+
 from passlib.context import CryptContext
 
+T = TypeVar("T")
+
+
+@lru_cache
+def _crypt_context() -> CryptContext:
+    return CryptContext(
+        schemes=["argon2"],
+        deprecated="auto",
+        argon2__memory_cost=65536,
+        argon2__time_cost=3,
+        argon2__parallelism=4,
+    )
+
+
+# Module-level so they can be pickled into a process pool; each worker
+# process builds its own CryptContext on first use.
+def _hash(password: str) -> str:
+    return _crypt_context().hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return _crypt_context().verify(plain_password, hashed_password)
+
+
+class HashingPool:
+    """Bounded executor for CPU-heavy password hashing.
+
+    argon2 blocks for tens of milliseconds per call, so running it inline in
+    an async handler stalls every other request on the event loop.  Work is
+    submitted to a thread pool (argon2-cffi releases the GIL) or a process
+    pool, and at most *max_concurrency* calls are admitted at once; further
+    callers wait on a semaphore and are reported as queued.  The executor is
+    only started by the first call.
+
+    Parameters
+    ----------
+    max_workers:
+        Size of the underlying executor.
+    max_concurrency:
+        Maximum calls admitted to the executor at once; defaults to
+        *max_workers* so submitted work never queues inside the executor.
+    kind:
+        ``"thread"`` or ``"process"``.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_concurrency: int | None = None,
+        kind: Literal["thread", "process"] = "thread",
+    ) -> None:
+        self._max_workers = max_workers
+        self._max_concurrency = max_concurrency or max_workers
+        self._kind = kind
+        self._executor: Executor | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._waiting = 0
+        self._in_flight = 0
+        self._completed = 0
+
+    async def run(self, fn: Callable[..., T], *args: object) -> T:
+        """Run ``fn(*args)`` in the pool once a concurrency slot is free."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self._in_flight -= 1
+            self._completed += 1
+            self._semaphore.release()
+
+    def get_status(self) -> dict:
+        """Return queue depth and throughput counters."""
+        return {
+            "queued": self._waiting,
+            "in_flight": self._in_flight,
+            "max_concurrency": self._max_concurrency,
+            "completed": self._completed,
+        }
+
+    def shutdown(self) -> None:
+        """Shut down the executor, if any work has created it."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = (
+                ProcessPoolExecutor(max_workers=self._max_workers)
+                if self._kind == "process"
+                else ThreadPoolExecutor(
+                    max_workers=self._max_workers,
+                    thread_name_prefix="password-hash",
+                )
+            )
+        return self._executor
+
 
 class PasswordManager:
-    def __init__(self) -> None:
-        self._context = CryptContext(
-            schemes=["argon2"],
-            deprecated="auto",
-            argon2__memory_cost=65536,
-            argon2__time_cost=3,
-            argon2__parallelism=4,
-        )
+    def __init__(self, pool: HashingPool | None = None) -> None:
+        self._context = _crypt_context()
+        self._pool = pool
 
     def hash(self, password: str) -> str:
         return self._context.hash(password)
@@ -19,3 +125,19 @@ class PasswordManager:
 
     def needs_rehash(self, hashed_password: str) -> bool:
         return self._context.needs_update(hashed_password)
+
+    async def hash_async(self, password: str) -> str:
+        """Hash off the event loop, in the pool when one is configured."""
+        if self._pool is None:
+            return await asyncio.to_thread(_hash, password)
+        return await self._pool.run(_hash, password)
+
+    async def verify_async(
+        self, plain_password: str, hashed_password: str
+    ) -> bool:
+        """Verify off the event loop, in the pool when one is configured."""
+        if self._pool is None:
+            return await asyncio.to_thread(
+                _verify, plain_password, hashed_password
+            )
+        return await self._pool.run(_verify, plain_password, hashed_password)
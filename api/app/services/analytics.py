@@ -2,26 +2,111 @@
 
 from __future__ import annotations
 
+import asyncio
+import base64
+import csv
+import io
 import logging
 import uuid
-from datetime import date, timedelta, timezone
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import aclosing
+from datetime import date, time, timedelta, timezone
 from datetime import datetime as dt
+from typing import Literal, TypeVar
 
+import orjson
+from fastapi import HTTPException, status
+
+from app.cache import SingleFlight
 from app.providers.redis import RedisProvider
-from app.repositories.analytics import AnalyticsRepository
+from app.repositories.analytics import AnalyticsRepository, UsageEventRecord
+from app.responses import dump_json
 from app.schemas.analytics import (
     AnalyticsQueryParams,
     AnalyticsSummaryResponse,
     DailyStatResponse,
+    HourlyStatResponse,
     UsageEventCreate,
+    UsageEventPage,
     UsageEventResponse,
+    UsageStatIncrement,
 )
+from app.services.analytics_counters import LiveUsageCounters
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 _SUMMARY_TTL_SECONDS = 300  # 5 minutes
+# Once past its TTL, or superseded by a version bump, a summary is still
+# served for this long while a single task recomputes it in the background.
+_SUMMARY_STALE_SECONDS = 60
+# Cross-replica refresh lock.  Replicas that lose the race poll for the
+# winner's result for up to _SUMMARY_LOCK_WAIT_SECONDS before computing
+# the summary themselves.
+_SUMMARY_LOCK_MS = 5_000
+_SUMMARY_LOCK_WAIT_SECONDS = 2.0
+_SUMMARY_LOCK_POLL_SECONDS = 0.05
 _CACHE_KEY_PREFIX = "analytics:summary"
 _VERSION_KEY_PREFIX = "analytics:version"
+_WRITES_KEY_PREFIX = "analytics:writes"
+
+SUMMARY_READ_SCRIPT = "analytics:summary_read"
+SUMMARY_UNLOCK_SCRIPT = "analytics:summary_unlock"
+SUMMARY_INDEX_SCRIPT = "analytics:summary_index"
+
+# KEYS[1] = user's cache version key
+# ARGV[1] = "analytics:summary:{user_id}:", ARGV[2] = ":{start}:{end}:{limit}"
+# Returns the version, the summary cached for it, that key's remaining TTL
+# in milliseconds and the range's "latest" pointer.  The summary keys depend
+# on the version read here, so they are built in the script rather than
+# declared in KEYS (single-node Redis only).
+_SUMMARY_READ_LUA = """
+local version = redis.call('GET', KEYS[1]) or '0'
+local key = ARGV[1] .. version .. ARGV[2]
+return {
+    tonumber(version),
+    redis.call('GET', key),
+    redis.call('PTTL', key),
+    redis.call('GET', ARGV[1] .. 'latest' .. ARGV[2])
+}
+"""
+
+# KEYS[1] = user's write mark, KEYS[2] = user's summary index
+# ARGV[1] = now (index scores are expiry times)
+# Bumps the write mark, drops expired index entries and returns the keys of
+# the summaries still cached.
+_SUMMARY_INDEX_LUA = """
+redis.call('INCR', KEYS[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+return redis.call('ZRANGE', KEYS[2], 0, -1)
+"""
+
+# KEYS[1] = lock key, ARGV[1] = owner token
+_SUMMARY_UNLOCK_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Services are built per request; summary refreshes are coalesced across
+# all of them, and background refreshes are kept referenced until done.
+_summary_flights: SingleFlight[str, AnalyticsSummaryResponse] = SingleFlight()
+_background_refreshes: set[asyncio.Task] = set()
+
+_EXPORT_COLUMNS = (
+    "id",
+    "user_id",
+    "event_type",
+    "provider",
+    "model",
+    "tokens_used",
+    "latency_ms",
+    "metadata",
+    "created_at",
+)
+_EXPORT_CHUNK_ROWS = 500
 
 
 class AnalyticsService:
@@ -31,9 +116,15 @@ class AnalyticsService:
         self,
         analytics_repo: AnalyticsRepository,
         redis: RedisProvider,
+        counters: LiveUsageCounters | None = None,
     ) -> None:
         self._repo = analytics_repo
         self._redis = redis
+        # When set, rollup increments go to Redis live counters (flushed to
+        # Postgres by AnalyticsCounterFlusher) and reads merge the pending
+        # deltas back in.  Cached summaries already include pending deltas,
+        # so new events are applied to them as in the Postgres path.
+        self._counters = counters
 
     # ------------------------------------------------------------------
     # Write path
@@ -42,24 +133,58 @@ class AnalyticsService:
     async def track_event(self, data: UsageEventCreate) -> UsageEventResponse:
         """
         Persist a usage event and, when a user_id is present, update the
-        daily aggregation table and invalidate the cached summary.
+        hourly/daily/monthly rollups and the user's cached summaries.
         """
         event = await self._repo.record_event(data)
 
-        if data.user_id is not None:
-            event_date = event.created_at.astimezone(timezone.utc).date()
+        if data.user_id is None:
+            return event
+        if self._counters is not None:
+            (increment,) = _aggregate_rollup_increments([event])
+            await self._counters.add(increment)
+        else:
             await self._repo.upsert_daily_stats(
                 user_id=data.user_id,
-                stat_date=event_date,
+                stat_hour=event.created_at,
                 event_type=data.event_type,
                 tokens=data.tokens_used or 0,
             )
-            # Bump the per-user cache version so all existing cached keys
-            # for this user are bypassed on the next read.
-            await self._invalidate_user_cache(data.user_id)
+        await self._apply_to_cached_summaries(data.user_id, [event])
 
         return event
 
+    async def track_events(
+        self, events: list[UsageEventCreate]
+    ) -> list[UsageEventResponse]:
+        """
+        Persist a batch of usage events with one bulk insert, one rollup
+        upsert per (user, hour) and one cached summary update per user.
+        The insert and the rollup upsert commit together, so events are
+        never stored without their rollup counts.
+        """
+        if not events:
+            return []
+        if self._counters is not None:
+            persisted = await self._repo.record_events(events)
+            for inc in _aggregate_rollup_increments(persisted):
+                await self._counters.add(inc)
+        else:
+            async with self._repo.transaction() as tx:
+                repo = self._repo.using(tx)
+                persisted = await repo.record_events(events)
+                increments = _aggregate_rollup_increments(persisted)
+                if increments:
+                    await repo.upsert_daily_stats_batch(increments)
+
+        by_user: dict[uuid.UUID, list[UsageEventResponse]] = {}
+        for event in persisted:
+            if event.user_id is not None:
+                by_user.setdefault(event.user_id, []).append(event)
+        for user_id, user_events in by_user.items():
+            await self._apply_to_cached_summaries(user_id, user_events)
+
+        return persisted
+
     # ------------------------------------------------------------------
     # Read path
     # ------------------------------------------------------------------
@@ -71,12 +196,7 @@ class AnalyticsService:
     ) -> AnalyticsSummaryResponse:
         """Return analytics summary, bypassing the cache."""
         start, end = _resolve_date_range(params)
-        return await self._repo.get_user_summary(
-            user_id=user_id,
-            start_date=start,
-            end_date=end,
-            limit=params.limit,
-        )
+        return await self._read_summary(user_id, start, end, params.limit)
 
     async def get_cached_summary(
         self,
@@ -86,62 +206,133 @@ class AnalyticsService:
         """
         Return analytics summary, serving from Redis when available.
         Cache key: analytics:summary:{user_id}:{version}:{start}:{end}:{limit}
-        TTL: 5 minutes.  The version component is bumped on every new event
-        so any subsequent read fetches fresh data regardless of the date range
-        or limit that was previously cached.
+        TTL: 5 minutes.  Tracked events are applied to the cached summaries
+        in place (see :meth:`_apply_to_cached_summaries`); the version
+        component is only bumped when that is not possible, which discards
+        every summary cached for the user.
+
+        A summary past its TTL, or cached for the previous version, is
+        returned as-is for up to ``_SUMMARY_STALE_SECONDS`` while one
+        background task refreshes it.  Misses are coalesced: concurrent
+        requests in this process share one computation, and a short Redis
+        lock lets a single replica compute it while the others wait for the
+        result.
         """
-        start, end = _resolve_date_range(params)
-        version = await self._get_user_cache_version(user_id)
-        cache_key = _build_cache_key(user_id, version, start, end, params.limit)
+        return await self._cached_summary(
+            user_id,
+            params,
+            lambda data: self._redis.decode_value(data, AnalyticsSummaryResponse),
+            lambda summary: summary,
+        )
 
-        cached = await self._redis.get(cache_key)
-        if cached:
+    async def get_cached_summary_json(
+        self,
+        user_id: uuid.UUID,
+        params: AnalyticsQueryParams,
+    ) -> bytes:
+        """
+        Like :meth:`get_cached_summary`, but return the summary as JSON.
+        A cached summary is returned as the bytes read from Redis (after
+        decompression) without being parsed, unless the cache codec is
+        not JSON; a summary read from Postgres is serialised once.
+        """
+        return await self._cached_summary(
+            user_id, params, self._redis.decode_json, _summary_json
+        )
+
+    async def _cached_summary(
+        self,
+        user_id: uuid.UUID,
+        params: AnalyticsQueryParams,
+        decode: Callable[[bytes], T],
+        convert: Callable[[AnalyticsSummaryResponse], T],
+    ) -> T:
+        """
+        Serve a summary as described in :meth:`get_cached_summary`.  Bytes
+        cached for the current version are passed to *decode*; a summary
+        from any other source is passed to *convert*.
+        """
+        start, end = _resolve_date_range(params)
+        version, data, fresh, latest = await self._read_cached_summary(
+            user_id, start, end, params.limit
+        )
+        if data is not None:
             try:
-                return AnalyticsSummaryResponse.model_validate_json(cached)
+                cached = decode(data)
             except Exception:
-                # Corrupt cache entry – fall through to DB
+                # Corrupt cache entry – treat as a miss
                 logger.warning(
                     "Failed to deserialise cached summary for user_id=%s",
                     user_id,
                 )
-
-        summary = await self._repo.get_user_summary(
-            user_id=user_id,
-            start_date=start,
-            end_date=end,
-            limit=params.limit,
-        )
-
-        try:
-            await self._redis.set(
-                cache_key,
-                summary.model_dump_json(),
-                expire_seconds=_SUMMARY_TTL_SECONDS,
-            )
-        except Exception:
-            logger.warning(
-                "Failed to cache summary for user_id=%s", user_id
+            else:
+                if not fresh:
+                    self._refresh_in_background(
+                        user_id, version, start, end, params.limit
+                    )
+                return cached
+        elif latest is not None and latest != version:
+            # Cached for an earlier version of the same range.
+            summary = await self._get_cached_entry(
+                _build_cache_key(user_id, latest, start, end, params.limit)
             )
+            if summary is not None:
+                self._refresh_in_background(
+                    user_id, version, start, end, params.limit
+                )
+                return convert(summary)
 
-        return summary
+        return convert(
+            await self._refresh_summary(user_id, version, start, end, params.limit)
+        )
 
     async def get_user_events(
         self,
         user_id: uuid.UUID,
         params: AnalyticsQueryParams,
-    ) -> list[UsageEventResponse]:
+    ) -> UsageEventPage:
+        """
+        Return one page of usage events for a user, newest first.
+        Applies both date range and event_type filters when provided;
+        ``params.cursor`` resumes after the last event of a previous page.
+        One extra row is fetched to tell whether another page exists.
+        Rows are validated into the page model directly from the
+        repository's records.
+        """
+        items, next_cursor = await self._get_event_page(user_id, params)
+        return UsageEventPage(items=items, next_cursor=next_cursor)
+
+    async def get_user_events_json(
+        self,
+        user_id: uuid.UUID,
+        params: AnalyticsQueryParams,
+    ) -> bytes:
         """
-        Return a filtered, paginated list of usage events for a user.
-        Applies both date range and event_type filters when provided.
+        Like :meth:`get_user_events`, but return the page as JSON bytes
+        serialised straight from the repository's records.
         """
+        items, next_cursor = await self._get_event_page(user_id, params)
+        return dump_json({"items": items, "next_cursor": next_cursor})
+
+    async def _get_event_page(
+        self,
+        user_id: uuid.UUID,
+        params: AnalyticsQueryParams,
+    ) -> tuple[list[UsageEventRecord], str | None]:
         start, end = _resolve_date_range(params)
-        return await self._repo.get_recent_events(
+        before = _decode_cursor(params.cursor) if params.cursor else None
+        events = await self._repo.get_recent_events(
             user_id=user_id,
-            limit=params.limit,
+            limit=params.limit + 1,
             event_type=params.event_type,
             start_date=start,
             end_date=end,
+            before=before,
         )
+        if len(events) <= params.limit:
+            return events, None
+        items = events[: params.limit]
+        return items, _encode_cursor(items[-1])
 
     async def get_daily_stats_only(
         self,
@@ -154,27 +345,340 @@ class AnalyticsService:
         by calling get_user_summary().
         """
         start, end = _resolve_date_range(params)
-        return await self._repo.get_daily_stats(
+        daily, pending = await self._read_with_pending(
+            user_id,
+            lambda: self._repo.get_daily_stats(
+                user_id=user_id,
+                start_date=start,
+                end_date=end,
+            ),
+        )
+        return _merge_pending_daily(daily, _pending_between(pending, start, end))
+
+    async def get_hourly_stats_only(
+        self,
+        user_id: uuid.UUID,
+        params: AnalyticsQueryParams,
+    ) -> list[HourlyStatResponse]:
+        """
+        Return per-hour aggregated stats covering the requested days
+        (midnight UTC of start_date up to the end of end_date).
+        """
+        start, end = _resolve_date_range(params)
+        hourly, pending = await self._read_with_pending(
+            user_id,
+            lambda: self._repo.get_hourly_stats(
+                user_id=user_id,
+                start=dt.combine(start, time.min, tzinfo=timezone.utc),
+                end=dt.combine(
+                    end + timedelta(days=1), time.min, tzinfo=timezone.utc
+                ),
+            ),
+        )
+        return _merge_pending_hourly(
+            hourly, _pending_between(pending, start, end)
+        )
+
+    async def export_events(
+        self,
+        user_id: uuid.UUID,
+        params: AnalyticsQueryParams,
+        fmt: Literal["ndjson", "csv"],
+    ) -> AsyncIterator[str]:
+        """
+        Stream a user's events for the requested date range as NDJSON or
+        CSV text chunks.  Rows come straight from a server-side cursor and
+        are serialised ``_EXPORT_CHUNK_ROWS`` at a time, so memory stays flat
+        regardless of how many events are exported.
+        """
+        start, end = _resolve_date_range(params)
+        encode = _csv_chunk if fmt == "csv" else _ndjson_chunk
+        if fmt == "csv":
+            yield ",".join(_EXPORT_COLUMNS) + "\r\n"
+
+        rows = self._repo.iter_events(
             user_id=user_id,
             start_date=start,
             end_date=end,
+            event_type=params.event_type,
         )
+        chunk: list[dict] = []
+        async with aclosing(rows):
+            async for row in rows:
+                chunk.append(row)
+                if len(chunk) >= _EXPORT_CHUNK_ROWS:
+                    yield encode(chunk)
+                    chunk = []
+        if chunk:
+            yield encode(chunk)
 
     # ------------------------------------------------------------------
     # Private helpers
     # ------------------------------------------------------------------
 
-    async def _get_user_cache_version(self, user_id: uuid.UUID) -> int:
+    async def _read_summary(
+        self, user_id: uuid.UUID, start: date, end: date, limit: int
+    ) -> AnalyticsSummaryResponse:
+        summary, pending = await self._read_with_pending(
+            user_id,
+            lambda: self._repo.get_user_summary(
+                user_id=user_id,
+                start_date=start,
+                end_date=end,
+                limit=limit,
+                months=_plan_rollup_months(start, end),
+            ),
+        )
+        return _merge_pending_summary(
+            summary, _pending_between(pending, start, end)
+        )
+
+    async def _read_with_pending(
+        self, user_id: uuid.UUID, read: Callable[[], Awaitable[T]]
+    ) -> tuple[T, list[UsageStatIncrement]]:
+        """Run *read*, adding live counter deltas when they are enabled."""
+        if self._counters is None:
+            return await read(), []
+        return await self._counters.read_with_pending(user_id, read)
+
+    async def _refresh_summary(
+        self,
+        user_id: uuid.UUID,
+        version: int,
+        start: date,
+        end: date,
+        limit: int,
+    ) -> AnalyticsSummaryResponse:
+        """Recompute and cache a summary, sharing in-flight refreshes."""
+        cache_key = _build_cache_key(user_id, version, start, end, limit)
+        return await _summary_flights.do(
+            cache_key,
+            lambda: self._load_summary(user_id, version, start, end, limit),
+        )
+
+    def _refresh_in_background(
+        self,
+        user_id: uuid.UUID,
+        version: int,
+        start: date,
+        end: date,
+        limit: int,
+    ) -> None:
+        cache_key = _build_cache_key(user_id, version, start, end, limit)
+        if _summary_flights.in_flight(cache_key):
+            return
+
+        async def revalidate() -> None:
+            try:
+                await self._refresh_summary(user_id, version, start, end, limit)
+            except Exception:
+                logger.exception(
+                    "Failed to refresh cached summary for user_id=%s", user_id
+                )
+
+        task = asyncio.create_task(revalidate())
+        _background_refreshes.add(task)
+        task.add_done_callback(_background_refreshes.discard)
+
+    async def _load_summary(
+        self,
+        user_id: uuid.UUID,
+        version: int,
+        start: date,
+        end: date,
+        limit: int,
+    ) -> AnalyticsSummaryResponse:
+        """
+        Read the summary from Postgres and cache it, unless another replica
+        holding the refresh lock caches it first.
+        """
+        cache_key = _build_cache_key(user_id, version, start, end, limit)
+        lock_key = f"{cache_key}:lock"
+        token = uuid.uuid4().hex
+        try:
+            locked = await self._redis.set_if_absent(
+                lock_key, token, _SUMMARY_LOCK_MS
+            )
+        except Exception:
+            logger.warning(
+                "Failed to take summary refresh lock for user_id=%s", user_id
+            )
+            locked = None
+
+        try:
+            if locked is False:
+                summary = await self._wait_for_entry(cache_key)
+                if summary is not None:
+                    return summary
+
+            writes = await self._get_write_mark(user_id)
+            summary = await self._read_summary(user_id, start, end, limit)
+            await self._store_summary(
+                user_id, version, start, end, limit, summary, writes
+            )
+            return summary
+        finally:
+            if locked:
+                try:
+                    await self._redis.run_script(
+                        SUMMARY_UNLOCK_SCRIPT, [lock_key], [token]
+                    )
+                except Exception:
+                    # The lock expires on its own after _SUMMARY_LOCK_MS.
+                    logger.warning(
+                        "Failed to release summary refresh lock for user_id=%s",
+                        user_id,
+                    )
+
+    async def _wait_for_entry(
+        self, cache_key: str
+    ) -> AnalyticsSummaryResponse | None:
+        """Poll for a summary being cached by the replica holding the lock."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + _SUMMARY_LOCK_WAIT_SECONDS
+        while loop.time() < deadline:
+            await asyncio.sleep(_SUMMARY_LOCK_POLL_SECONDS)
+            summary = await self._get_cached_entry(cache_key)
+            if summary is not None:
+                return summary
+        return None
+
+    async def _get_cached_entry(
+        self, cache_key: str
+    ) -> AnalyticsSummaryResponse | None:
+        try:
+            return await self._redis.get_value(
+                cache_key, model_type=AnalyticsSummaryResponse
+            )
+        except Exception:
+            # Unreadable or corrupt cache entry – treat as a miss
+            logger.warning("Failed to deserialise cached summary %s", cache_key)
+            return None
+
+    async def _read_cached_summary(
+        self, user_id: uuid.UUID, start: date, end: date, limit: int
+    ) -> tuple[int, bytes | None, bool, int | None]:
         """
-        Return the current cache version for *user_id*.
-        Returns 0 when no version key has been set yet.
+        Return the user's cache version, the encoded summary cached for it,
+        whether that summary is still fresh and the version of the range's
+        most recently cached summary, in one round trip
+        (:data:`SUMMARY_READ_SCRIPT`).
+
+        Summaries are stored for ``_SUMMARY_TTL_SECONDS`` plus
+        ``_SUMMARY_STALE_SECONDS`` and updated with their TTL kept, so one
+        is fresh while more than ``_SUMMARY_STALE_SECONDS`` of it remain.
         """
-        version_key = f"{_VERSION_KEY_PREFIX}:{user_id}"
         try:
-            raw = await self._redis.get(version_key)
-            return int(raw) if raw is not None else 0
+            version, current, ttl_ms, latest = await self._redis.run_script(
+                SUMMARY_READ_SCRIPT,
+                [_version_key(user_id)],
+                [
+                    f"{_CACHE_KEY_PREFIX}:{user_id}:",
+                    _range_suffix(start, end, limit),
+                ],
+            )
         except Exception:
-            return 0
+            logger.warning(
+                "Failed to read cached summary for user_id=%s", user_id
+            )
+            return 0, None, False, None
+
+        fresh = ttl_ms > _SUMMARY_STALE_SECONDS * 1000
+        if latest is not None:
+            latest = int(self._redis.decode_value(latest))
+        return int(version), current, fresh, latest
+
+    async def _store_summary(
+        self,
+        user_id: uuid.UUID,
+        version: int,
+        start: date,
+        end: date,
+        limit: int,
+        summary: AnalyticsSummaryResponse,
+        writes: str | None,
+    ) -> None:
+        """
+        Cache *summary*, read after the user's write mark was *writes*.
+
+        Tracked events are applied only to summaries already in the cache,
+        so one tracked while *summary* was being read could be missing from
+        it for good.  The summary is therefore only stored if the write mark
+        is unchanged, and added to the user's index in the same transaction,
+        so any event tracked after the store finds it.
+        """
+        cache_key = _build_cache_key(user_id, version, start, end, limit)
+        now = dt.now(timezone.utc).timestamp()
+        expire = _SUMMARY_TTL_SECONDS + _SUMMARY_STALE_SECONDS
+        try:
+            stored = await self._redis.set_many_if_unchanged(
+                {
+                    cache_key: summary,
+                    _build_latest_key(user_id, start, end, limit): version,
+                },
+                expire,
+                guard_key=_writes_key(user_id),
+                guard_value=writes,
+                index=(_build_index_key(user_id), {cache_key: now + expire}),
+            )
+        except Exception:
+            logger.warning(
+                "Failed to cache summary for user_id=%s", user_id
+            )
+            return
+        if not stored:
+            logger.debug(
+                "Not caching summary for user_id=%s: events were tracked "
+                "while it was read",
+                user_id,
+            )
+
+    async def _apply_to_cached_summaries(
+        self, user_id: uuid.UUID, events: list[UsageEventResponse]
+    ) -> None:
+        """
+        Add newly tracked *events* to every summary cached for *user_id*.
+
+        The user's write mark is bumped first so summaries being computed
+        concurrently are not cached without these events (see
+        :meth:`_store_summary`) and the cached summaries listed, in one
+        script call (:data:`SUMMARY_INDEX_SCRIPT`).  All of them are then
+        updated in one optimistic ``WATCH``/``MULTI`` write: totals,
+        per-type counts and the event's daily row for ranges covering its
+        date, and the recent events list.  Events already listed in a
+        summary's recent events were part of the read that produced it and
+        are skipped.  If the update fails, the user's cache version is
+        bumped instead.
+        """
+
+        def apply(
+            cache_key: str, summary: AnalyticsSummaryResponse
+        ) -> AnalyticsSummaryResponse | None:
+            start, end, limit = _parse_cache_key(cache_key)
+            return _apply_events_to_summary(summary, events, start, end, limit)
+
+        try:
+            members = await self._redis.run_script(
+                SUMMARY_INDEX_SCRIPT,
+                [_writes_key(user_id), _build_index_key(user_id)],
+                [dt.now(timezone.utc).timestamp()],
+            )
+            await self._redis.update_many(
+                [m.decode() if isinstance(m, bytes) else m for m in members],
+                apply,
+                model_type=AnalyticsSummaryResponse,
+            )
+        except Exception:
+            logger.warning(
+                "Failed to update cached summaries for user_id=%s", user_id
+            )
+            await self._invalidate_user_cache(user_id)
+
+    async def _get_write_mark(self, user_id: uuid.UUID) -> str | None:
+        try:
+            return await self._redis.get(_writes_key(user_id))
+        except Exception:
+            return None
 
     async def _invalidate_user_cache(self, user_id: uuid.UUID) -> None:
         """
@@ -182,7 +686,7 @@ class AnalyticsService:
         all previously cached summaries for this user regardless of the
         date range, limit, or event_type that was cached.
         """
-        version_key = f"{_VERSION_KEY_PREFIX}:{user_id}"
+        version_key = _version_key(user_id)
         try:
             await self._redis.incr(version_key)
         except Exception:
@@ -196,6 +700,77 @@ class AnalyticsService:
 # ------------------------------------------------------------------
 
 
+def _encode_cursor(event: UsageEventRecord) -> str:
+    """Encode an event's (created_at, id) keyset position as an opaque token."""
+    raw = f"{event.created_at.isoformat()}|{event.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[dt, uuid.UUID]:
+    """Decode a token produced by :func:`_encode_cursor`; 400 if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, event_id = (
+            base64.urlsafe_b64decode(padded).decode().split("|")
+        )
+        position = dt.fromisoformat(created_at), uuid.UUID(event_id)
+        if position[0].tzinfo is None:
+            raise ValueError("cursor timestamp must be timezone-aware")
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor.",
+        )
+    return position
+
+
+def _export_value(column: str, value: object) -> object:
+    """Convert a raw event column to a JSON/CSV friendly value."""
+    if value is None:
+        return None
+    if column == "created_at":
+        return value.isoformat()
+    if column in ("id", "user_id"):
+        return str(value)
+    return value
+
+
+def _ndjson_default(value: object) -> object:
+    """orjson fallback for driver UUIDs, which orjson does not serialise."""
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+
+def _ndjson_chunk(rows: list[dict]) -> str:
+    """Serialise event rows as newline-delimited JSON.
+
+    orjson writes UUIDs and timestamps itself, in the same form as
+    :func:`_export_value`; asyncpg's UUID subclass goes through
+    :func:`_ndjson_default`.
+    """
+    lines = [
+        orjson.dumps(
+            {c: row.get(c) for c in _EXPORT_COLUMNS}, default=_ndjson_default
+        )
+        for row in rows
+    ]
+    return (b"\n".join(lines) + b"\n").decode()
+
+
+def _csv_chunk(rows: list[dict]) -> str:
+    """Serialise event rows as CSV lines; metadata is embedded as JSON."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        metadata = orjson.dumps(row.get("metadata") or {}).decode()
+        writer.writerow(
+            metadata if c == "metadata" else _export_value(c, row.get(c))
+            for c in _EXPORT_COLUMNS
+        )
+    return buffer.getvalue()
+
+
 def _resolve_date_range(params: AnalyticsQueryParams) -> tuple[date, date]:
     """Return a (start_date, end_date) pair, defaulting to the last 30 days."""
     today = dt.now(timezone.utc).date()
@@ -204,11 +779,198 @@ def _resolve_date_range(params: AnalyticsQueryParams) -> tuple[date, date]:
     return start, end
 
 
+def _aggregate_rollup_increments(
+    events: list[UsageEventResponse],
+) -> list[UsageStatIncrement]:
+    """Fold events into one rollup increment per (user_id, UTC hour)."""
+    increments: dict[tuple[uuid.UUID, dt], UsageStatIncrement] = {}
+    for event in events:
+        if event.user_id is None:
+            continue
+        hour = event.created_at.astimezone(timezone.utc).replace(
+            minute=0, second=0, microsecond=0
+        )
+        inc = increments.get((event.user_id, hour))
+        if inc is None:
+            inc = UsageStatIncrement(user_id=event.user_id, hour=hour)
+            increments[(event.user_id, hour)] = inc
+        inc.total_events += 1
+        inc.total_tokens += event.tokens_used or 0
+        inc.events_by_type[event.event_type] = (
+            inc.events_by_type.get(event.event_type, 0) + 1
+        )
+        inc.tokens_by_type[event.event_type] = inc.tokens_by_type.get(
+            event.event_type, 0
+        ) + (event.tokens_used or 0)
+    return list(increments.values())
+
+
+def _pending_between(
+    pending: list[UsageStatIncrement], start: date, end: date
+) -> list[UsageStatIncrement]:
+    return [inc for inc in pending if start <= inc.hour.date() <= end]
+
+
+def _add_counts(target: dict, counts: dict[str, int]) -> None:
+    for key, value in counts.items():
+        target[key] = int(target.get(key, 0)) + value
+
+
+def _merge_pending_summary(
+    summary: AnalyticsSummaryResponse, pending: list[UsageStatIncrement]
+) -> AnalyticsSummaryResponse:
+    """Add rollup increments not yet reflected in *summary*."""
+    if not pending:
+        return summary
+    events_by_type = dict(summary.events_by_type)
+    for inc in pending:
+        _add_counts(events_by_type, inc.events_by_type)
+    return summary.model_copy(
+        update={
+            "total_events": summary.total_events
+            + sum(inc.total_events for inc in pending),
+            "total_tokens": summary.total_tokens
+            + sum(inc.total_tokens for inc in pending),
+            "events_by_type": events_by_type,
+            "daily_stats": _merge_pending_daily(summary.daily_stats, pending),
+        }
+    )
+
+
+def _merge_pending_daily(
+    daily: list[DailyStatResponse], pending: list[UsageStatIncrement]
+) -> list[DailyStatResponse]:
+    """Add not-yet-flushed live counter deltas to per-day stats."""
+    if not pending:
+        return daily
+    by_date = {d.date: d.model_copy(deep=True) for d in daily}
+    for inc in pending:
+        day = inc.hour.date()
+        stat = by_date.setdefault(
+            day,
+            DailyStatResponse(
+                date=day, total_events=0, total_tokens=0, events_by_type={}
+            ),
+        )
+        stat.total_events += inc.total_events
+        stat.total_tokens += inc.total_tokens
+        _add_counts(stat.events_by_type, inc.events_by_type)
+    return [by_date[day] for day in sorted(by_date)]
+
+
+def _apply_events_to_summary(
+    summary: AnalyticsSummaryResponse,
+    events: list[UsageEventResponse],
+    start: date,
+    end: date,
+    limit: int,
+) -> AnalyticsSummaryResponse | None:
+    """
+    Return *summary* with newly tracked *events* added, or ``None`` when it
+    already includes all of them.  Events are counted in the totals and
+    daily rows when they fall inside ``[start, end]``; recent events are
+    not range-filtered, mirroring the summary query.
+    """
+    listed = {e.id for e in summary.recent_events}
+    new = [e for e in events if e.id not in listed]
+    if not new:
+        return None
+    in_range = [
+        e for e in new if start <= e.created_at.astimezone(timezone.utc).date() <= end
+    ]
+    updated = _merge_pending_summary(
+        summary, _aggregate_rollup_increments(in_range)
+    )
+    recent = sorted(
+        [*new, *summary.recent_events],
+        key=lambda e: (e.created_at, e.id),
+        reverse=True,
+    )
+    return updated.model_copy(update={"recent_events": recent[:limit]})
+
+
+def _merge_pending_hourly(
+    hourly: list[HourlyStatResponse], pending: list[UsageStatIncrement]
+) -> list[HourlyStatResponse]:
+    """Add not-yet-flushed live counter deltas to per-hour stats."""
+    if not pending:
+        return hourly
+    by_hour = {h.hour: h.model_copy(deep=True) for h in hourly}
+    for inc in pending:
+        stat = by_hour.setdefault(
+            inc.hour,
+            HourlyStatResponse(
+                hour=inc.hour, total_events=0, total_tokens=0, events_by_type={}
+            ),
+        )
+        stat.total_events += inc.total_events
+        stat.total_tokens += inc.total_tokens
+        _add_counts(stat.events_by_type, inc.events_by_type)
+    return [by_hour[hour] for hour in sorted(by_hour)]
+
+
+def _version_key(user_id: uuid.UUID) -> str:
+    return f"{_VERSION_KEY_PREFIX}:{user_id}"
+
+
+def _writes_key(user_id: uuid.UUID) -> str:
+    return f"{_WRITES_KEY_PREFIX}:{user_id}"
+
+
+def _plan_rollup_months(start: date, end: date) -> tuple[date, date] | None:
+    """
+    Pick the coarsest rollup tier for ``[start, end]``: return the first
+    and last whole calendar months inside the range (read from the monthly
+    tier), or ``None`` when no whole month fits and only daily rows apply.
+    """
+    first = start if start.day == 1 else (
+        (start.replace(day=1) + timedelta(days=32)).replace(day=1)
+    )
+    if (end + timedelta(days=1)).day == 1:
+        last = end.replace(day=1)
+    else:
+        last = (end.replace(day=1) - timedelta(days=1)).replace(day=1)
+    return (first, last) if first <= last else None
+
+
+def _range_suffix(start: date, end: date, limit: int) -> str:
+    return f":{start.isoformat()}:{end.isoformat()}:{limit}"
+
+
 def _build_cache_key(
     user_id: uuid.UUID, version: int, start: date, end: date, limit: int
 ) -> str:
     return (
         f"{_CACHE_KEY_PREFIX}:{user_id}:{version}"
-        f":{start.isoformat()}:{end.isoformat()}:{limit}"
+        f"{_range_suffix(start, end, limit)}"
     )
 
+
+def _build_latest_key(
+    user_id: uuid.UUID, start: date, end: date, limit: int
+) -> str:
+    """Key holding the version of the range's most recently cached summary."""
+    return f"{_CACHE_KEY_PREFIX}:{user_id}:latest{_range_suffix(start, end, limit)}"
+
+
+def _build_index_key(user_id: uuid.UUID) -> str:
+    """Sorted set of the user's cached summary keys, scored by expiry."""
+    return f"{_CACHE_KEY_PREFIX}:{user_id}:index"
+
+
+def _parse_cache_key(cache_key: str) -> tuple[date, date, int]:
+    """Return the ``(start, end, limit)`` a summary cache key was built for."""
+    _, start, end, limit = cache_key.rsplit(":", 3)
+    return date.fromisoformat(start), date.fromisoformat(end), int(limit)
+
+
+def _summary_json(summary: AnalyticsSummaryResponse) -> bytes:
+    """Serialise a summary not served from the cache as a response body."""
+    return summary.model_dump_json().encode()
+
+
+def register_summary_cache_scripts(redis_provider: RedisProvider) -> None:
+    """Register the summary cache Lua scripts with *redis_provider*."""
+    redis_provider.register_script(SUMMARY_READ_SCRIPT, _SUMMARY_READ_LUA)
+    redis_provider.register_script(SUMMARY_UNLOCK_SCRIPT, _SUMMARY_UNLOCK_LUA)
+    redis_provider.register_script(SUMMARY_INDEX_SCRIPT, _SUMMARY_INDEX_LUA)
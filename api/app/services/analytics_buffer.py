@@ -0,0 +1,149 @@
+"""Write-behind buffer that batches usage events off the request path."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Literal
+
+from app.schemas.analytics import UsageEventCreate
+from app.services.analytics import AnalyticsService
+
+logger = logging.getLogger(__name__)
+
+
+class AnalyticsEventBuffer:
+    """Bounded in-process queue of events flushed in bulk by a background task.
+
+    Callers enqueue with :meth:`put` and return immediately; the flusher
+    coalesces events until *batch_size* are waiting or *flush_interval*
+    seconds have passed since the first one, then writes them with
+    :meth:`AnalyticsService.track_events`.  When the queue is full the
+    *overflow* policy applies: ``"block"`` makes :meth:`put` wait for space
+    (backpressure), ``"drop"`` rejects the event (load shedding).
+
+    Events still queued or being coalesced at shutdown are written by
+    :meth:`stop`; events held in memory are lost if the process dies, so
+    this is only suitable for best-effort analytics.
+    """
+
+    def __init__(
+        self,
+        service: AnalyticsService,
+        max_events: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 0.2,
+        overflow: Literal["block", "drop"] = "drop",
+    ) -> None:
+        self._service = service
+        self._queue: asyncio.Queue[UsageEventCreate] = asyncio.Queue(
+            maxsize=max_events
+        )
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._overflow = overflow
+        self._task: asyncio.Task | None = None
+        # Events taken off the queue by the flusher while it waits for more;
+        # kept here so stop() can write them if it cancels the wait.
+        self._batch: list[UsageEventCreate] = []
+        self._in_flight: asyncio.Future | None = None
+        self._flushed = 0
+        self._dropped = 0
+        self._failed = 0
+
+    # -- lifecycle ------------------------------------------------------------
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flusher and write every event still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # A flush interrupted by the cancellation keeps running (it is
+        # shielded); wait for it so its batch is not lost.
+        if self._in_flight is not None:
+            await self._in_flight
+            self._in_flight = None
+        batch, self._batch = self._batch, []
+        await self._flush(batch)
+        while not self._queue.empty():
+            await self._flush(self._take(self._batch_size))
+
+    # -- public API -----------------------------------------------------------
+
+    async def put(self, event: UsageEventCreate) -> bool:
+        """Enqueue *event*; returns ``False`` if it was shed."""
+        if self._overflow == "block":
+            await self._queue.put(event)
+            return True
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self._dropped += 1
+            return False
+        return True
+
+    def get_status(self) -> dict:
+        """Return queue depth and flush counters."""
+        return {
+            "queued": self._queue.qsize(),
+            "max_events": self._queue.maxsize,
+            "flushed": self._flushed,
+            "dropped": self._dropped,
+            "failed": self._failed,
+        }
+
+    # -- internals ------------------------------------------------------------
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._batch = [await self._queue.get()]
+            deadline = loop.time() + self._flush_interval
+            while len(self._batch) < self._batch_size:
+                self._batch.extend(
+                    self._take(self._batch_size - len(self._batch))
+                )
+                if len(self._batch) >= self._batch_size:
+                    break
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    self._batch.append(
+                        await asyncio.wait_for(self._queue.get(), timeout)
+                    )
+                except asyncio.TimeoutError:
+                    break
+            batch, self._batch = self._batch, []
+            self._in_flight = asyncio.ensure_future(self._flush(batch))
+            await asyncio.shield(self._in_flight)
+            self._in_flight = None
+
+    def _take(self, limit: int) -> list[UsageEventCreate]:
+        batch: list[UsageEventCreate] = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    async def _flush(self, batch: list[UsageEventCreate]) -> None:
+        if not batch:
+            return
+        try:
+            await self._service.track_events(batch)
+            self._flushed += len(batch)
+        except Exception:
+            self._failed += len(batch)
+            logger.exception(
+                "Failed to flush %d buffered analytics events", len(batch)
+            )
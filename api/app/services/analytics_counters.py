@@ -0,0 +1,346 @@
+"""Redis-side live usage counters flushed to the Postgres rollups in bulk."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+from typing import TypeVar
+
+from app.providers.redis import RedisProvider
+from app.repositories.analytics import AnalyticsRepository
+from app.schemas.analytics import UsageStatIncrement
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+LIVE_INCR_SCRIPT = "analytics:live_incr"
+LIVE_DRAIN_SCRIPT = "analytics:live_drain"
+LIVE_ACK_SCRIPT = "analytics:live_ack"
+LIVE_READ_SCRIPT = "analytics:live_read"
+
+_LIVE_KEY_PREFIX = "analytics:live"
+_DIRTY_KEY = "analytics:live:dirty"
+
+# A read that finds a flush in progress waits this long for it to be
+# acknowledged before retrying, at most _READ_ATTEMPTS times.
+_READ_ATTEMPTS = 3
+_FLUSH_WAIT_SECONDS = 0.05
+
+# A flusher owns a user's flushing hash for this long after each drain; it
+# must write and acknowledge the deltas well within it.
+_FLUSH_LEASE_MS = 30_000
+
+# KEYS[1] = live hash, KEYS[2] = dirty set
+# ARGV[1] = user id, then (field, increment) pairs
+_LIVE_INCR_LUA = """
+for i = 2, #ARGV, 2 do
+    redis.call('HINCRBY', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call('SADD', KEYS[2], ARGV[1])
+return 1
+"""
+
+# KEYS[1] = live hash, KEYS[2] = flushing hash, KEYS[3] = flush lease
+# ARGV[1] = flusher token, ARGV[2] = lease in milliseconds
+# Returns nil while another flusher holds the lease.  Otherwise takes or
+# renews it, moves the live deltas aside unless a previous, unacknowledged
+# flush is still pending, and returns the deltas to write.
+_LIVE_DRAIN_LUA = """
+local owner = redis.call('GET', KEYS[3])
+if owner and owner ~= ARGV[1] then
+    return false
+end
+redis.call('SET', KEYS[3], ARGV[1], 'PX', ARGV[2])
+if redis.call('EXISTS', KEYS[2]) == 0 and redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('RENAME', KEYS[1], KEYS[2])
+end
+return redis.call('HGETALL', KEYS[2])
+"""
+
+# KEYS[1] = live hash, KEYS[2] = flushing hash, KEYS[3] = dirty set,
+# KEYS[4] = flush generation, KEYS[5] = flush lease
+# ARGV[1] = user id, ARGV[2] = flusher token
+# Returns 0 without discarding anything if the lease has passed to another
+# flusher.
+_LIVE_ACK_LUA = """
+local owner = redis.call('GET', KEYS[5])
+if owner and owner ~= ARGV[2] then
+    return 0
+end
+redis.call('DEL', KEYS[2], KEYS[5])
+redis.call('INCR', KEYS[4])
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('SREM', KEYS[3], ARGV[1])
+end
+return 1
+"""
+
+# KEYS[1] = live hash, KEYS[2] = flushing hash, KEYS[3] = flush generation
+_LIVE_READ_LUA = """
+return {
+    redis.call('HGETALL', KEYS[1]),
+    redis.call('HGETALL', KEYS[2]),
+    tonumber(redis.call('GET', KEYS[3]) or '0')
+}
+"""
+
+
+def register_live_counter_scripts(redis_provider: RedisProvider) -> None:
+    """Register the live counter Lua scripts with *redis_provider*."""
+    redis_provider.register_script(LIVE_INCR_SCRIPT, _LIVE_INCR_LUA)
+    redis_provider.register_script(LIVE_DRAIN_SCRIPT, _LIVE_DRAIN_LUA)
+    redis_provider.register_script(LIVE_ACK_SCRIPT, _LIVE_ACK_LUA)
+    redis_provider.register_script(LIVE_READ_SCRIPT, _LIVE_READ_LUA)
+
+
+class LiveUsageCounters:
+    """Per-user ``HINCRBY`` counters holding rollup deltas not yet in Postgres.
+
+    Each user has one hash whose fields are ``{hour}:e`` (events),
+    ``{hour}:t`` (tokens), ``{hour}:c:{type}`` and ``{hour}:k:{type}``
+    (per-type events and tokens), with ``{hour}`` the UTC hour start as a
+    Unix timestamp.  Users with pending deltas are tracked in a dirty set.
+
+    A flush renames the hash to ``...:flushing`` before writing it, so new
+    increments keep landing in a fresh hash and :meth:`read_with_pending`
+    can report both.  The flushing hash is deleted only after Postgres has
+    committed (:meth:`ack`); a failed flush is retried with the same deltas.
+
+    Every app instance runs a flusher, so draining takes a per-user lease
+    (``...:flush_lease``) holding the flusher's token.  While it is held,
+    other flushers skip the user, and only the owner retries a pending
+    flushing hash; after ``_FLUSH_LEASE_MS`` without a drain, e.g. when the
+    owner has died, another flusher takes it over.  A crash between the
+    commit and the acknowledgement replays that flush once.
+    """
+
+    def __init__(self, redis: RedisProvider) -> None:
+        self._redis = redis
+
+    async def add(self, increment: UsageStatIncrement) -> None:
+        """Add *increment* to the user's live hash."""
+        hour = _hour_field(increment.hour)
+        args: list = [
+            str(increment.user_id),
+            f"{hour}:e",
+            increment.total_events,
+            f"{hour}:t",
+            increment.total_tokens,
+        ]
+        for event_type, count in increment.events_by_type.items():
+            args += [f"{hour}:c:{event_type}", count]
+        for event_type, tokens in increment.tokens_by_type.items():
+            args += [f"{hour}:k:{event_type}", tokens]
+        await self._redis.run_script(
+            LIVE_INCR_SCRIPT,
+            [_live_key(increment.user_id), _DIRTY_KEY],
+            args,
+        )
+
+    async def read_with_pending(
+        self, user_id: uuid.UUID, read: Callable[[], Awaitable[T]]
+    ) -> tuple[T, list[UsageStatIncrement]]:
+        """
+        Run the Postgres *read* and return its result with the user's deltas
+        that it does not include yet.
+
+        Deltas are snapshotted before the read, so nothing acknowledged in
+        between can be missed.  A delta committed during the read would be
+        counted twice; that is detected through the flush generation (bumped
+        on every acknowledgement) and the read is retried.  A snapshot that
+        catches a flush in flight waits briefly for it to finish first.
+        """
+        attempt = 1
+        while True:
+            live, flushing, generation = await self._redis.run_script(
+                LIVE_READ_SCRIPT,
+                [
+                    _live_key(user_id),
+                    _flushing_key(user_id),
+                    _generation_key(user_id),
+                ],
+                [],
+            )
+            last = attempt >= _READ_ATTEMPTS
+            attempt += 1
+            if flushing and not last:
+                await asyncio.sleep(_FLUSH_WAIT_SECONDS)
+                continue
+            result = await read()
+            current = await self._redis.get(_generation_key(user_id))
+            if last or int(current or 0) == int(generation):
+                return result, _parse_hash(user_id, list(live) + list(flushing))
+
+    async def dirty_users(self) -> list[uuid.UUID]:
+        """Return the users that have deltas waiting to be flushed."""
+        members = await self._redis.client.smembers(_DIRTY_KEY)
+        return [
+            uuid.UUID(m.decode() if isinstance(m, bytes) else m)
+            for m in members
+        ]
+
+    async def drain(
+        self, user_id: uuid.UUID, owner: str
+    ) -> list[UsageStatIncrement] | None:
+        """
+        Move the user's live deltas aside for flushing by *owner* and return
+        them, or ``None`` if another flusher holds the user's lease.
+        """
+        flat = await self._redis.run_script(
+            LIVE_DRAIN_SCRIPT,
+            [_live_key(user_id), _flushing_key(user_id), _lease_key(user_id)],
+            [owner, _FLUSH_LEASE_MS],
+        )
+        if flat is None:
+            return None
+        return _parse_hash(user_id, list(flat))
+
+    async def ack(self, user_id: uuid.UUID, owner: str) -> bool:
+        """
+        Discard deltas drained by *owner* once they are committed to
+        Postgres and release the lease.  Returns ``False`` if the lease had
+        already passed to another flusher.
+        """
+        acked = await self._redis.run_script(
+            LIVE_ACK_SCRIPT,
+            [
+                _live_key(user_id),
+                _flushing_key(user_id),
+                _DIRTY_KEY,
+                _generation_key(user_id),
+                _lease_key(user_id),
+            ],
+            [str(user_id), owner],
+        )
+        return bool(acked)
+
+
+class AnalyticsCounterFlusher:
+    """Background task merging live counter deltas into the rollup tables.
+
+    Every *flush_interval* seconds each dirty user's deltas are drained and
+    written with one :meth:`AnalyticsRepository.upsert_daily_stats_batch`
+    call, so a busy user costs one rollup upsert per hour touched per
+    interval instead of one per event.  Users whose flush lease is held by
+    another instance's flusher are left to it.
+    """
+
+    def __init__(
+        self,
+        counters: LiveUsageCounters,
+        repo: AnalyticsRepository,
+        flush_interval: float = 1.0,
+    ) -> None:
+        self._counters = counters
+        self._repo = repo
+        self._flush_interval = flush_interval
+        self._owner = uuid.uuid4().hex
+        self._task: asyncio.Task | None = None
+        self._flushed = 0
+        self._failed = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic task and flush whatever is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def get_status(self) -> dict:
+        return {"flushed_users": self._flushed, "failed_users": self._failed}
+
+    async def flush(self) -> None:
+        """Flush every dirty user once."""
+        for user_id in await self._counters.dirty_users():
+            try:
+                increments = await self._counters.drain(user_id, self._owner)
+                if increments is None:
+                    continue
+                if increments:
+                    await self._repo.upsert_daily_stats_batch(increments)
+                if not await self._counters.ack(user_id, self._owner):
+                    logger.warning(
+                        "Flush lease for user_id=%s expired before its "
+                        "deltas were acknowledged",
+                        user_id,
+                    )
+                self._flushed += 1
+            except Exception:
+                self._failed += 1
+                logger.exception(
+                    "Failed to flush live usage counters for user_id=%s",
+                    user_id,
+                )
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            await asyncio.shield(self.flush())
+
+
+# ------------------------------------------------------------------
+# Private helpers
+# ------------------------------------------------------------------
+
+
+def _live_key(user_id: uuid.UUID) -> str:
+    return f"{_LIVE_KEY_PREFIX}:{user_id}"
+
+
+def _flushing_key(user_id: uuid.UUID) -> str:
+    return f"{_LIVE_KEY_PREFIX}:{user_id}:flushing"
+
+
+def _generation_key(user_id: uuid.UUID) -> str:
+    return f"{_LIVE_KEY_PREFIX}:{user_id}:generation"
+
+
+def _lease_key(user_id: uuid.UUID) -> str:
+    return f"{_LIVE_KEY_PREFIX}:{user_id}:flush_lease"
+
+
+def _hour_field(hour: datetime) -> int:
+    return int(
+        hour.astimezone(timezone.utc)
+        .replace(minute=0, second=0, microsecond=0)
+        .timestamp()
+    )
+
+
+def _parse_hash(
+    user_id: uuid.UUID, flat: list
+) -> list[UsageStatIncrement]:
+    """Fold flattened ``HGETALL`` replies into one increment per hour."""
+    increments: dict[int, UsageStatIncrement] = {}
+    for i in range(0, len(flat), 2):
+        field = flat[i].decode() if isinstance(flat[i], bytes) else flat[i]
+        value = int(flat[i + 1])
+        hour, kind, *rest = field.split(":", 2)
+        inc = increments.get(int(hour))
+        if inc is None:
+            inc = UsageStatIncrement(
+                user_id=user_id,
+                hour=datetime.fromtimestamp(int(hour), tz=timezone.utc),
+            )
+            increments[int(hour)] = inc
+        if kind == "e":
+            inc.total_events += value
+        elif kind == "t":
+            inc.total_tokens += value
+        elif kind == "c":
+            inc.events_by_type[rest[0]] = inc.events_by_type.get(rest[0], 0) + value
+        elif kind == "k":
+            inc.tokens_by_type[rest[0]] = inc.tokens_by_type.get(rest[0], 0) + value
+    return [increments[h] for h in sorted(increments)]
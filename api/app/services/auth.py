@@ -58,7 +58,7 @@ class AuthService:
                 detail="Email already registered",
             )
 
-        password_hash = self._pwd.hash(data.password)
+        password_hash = await self._pwd.hash_async(data.password)
         user = await self._user_repo.create(
             email=data.email,
             name=data.name,
@@ -74,7 +74,9 @@ class AuthService:
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid credentials",
             )
-        if not self._pwd.verify(data.password, user["password_hash"]):
+        if not await self._pwd.verify_async(
+            data.password, user["password_hash"]
+        ):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid credentials",
@@ -86,7 +88,7 @@ class AuthService:
             )
 
         if self._pwd.needs_rehash(user["password_hash"]):
-            new_hash = self._pwd.hash(data.password)
+            new_hash = await self._pwd.hash_async(data.password)
             await self._user_repo.update_password(
                 str(user["id"]), new_hash
             )
@@ -109,21 +111,22 @@ class AuthService:
                 detail="Invalid token type",
             )
 
-        token_hash = self._hash_token(raw_refresh_token)
-        stored = await self._token_repo.find_by_token_hash(token_hash)
-
-        if not stored:
-            if payload.family_id:
-                await self._token_repo.revoke_family(payload.family_id)
+        tokens, new_hash, family_id, expires_at = self._mint_token_pair(
+            payload.sub, family_id=payload.family_id
+        )
+        rotated = await self._token_repo.rotate(
+            self._hash_token(raw_refresh_token),
+            payload.sub,
+            new_hash,
+            family_id,
+            expires_at,
+        )
+        if not rotated:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Token reuse detected",
             )
-
-        await self._token_repo.revoke(str(stored["id"]))
-        return await self._create_token_pair(
-            payload.sub, family_id=payload.family_id
-        )
+        return tokens
 
     async def request_password_reset(self, email: str) -> None:
         user = await self._user_repo.find_by_email(email)
@@ -166,12 +169,31 @@ class AuthService:
                 detail="Invalid or expired reset token",
             )
 
-        password_hash = self._pwd.hash(new_password)
-        await self._user_repo.update_password(
-            str(stored["user_id"]), password_hash
-        )
-        await self._reset_repo.mark_used(str(stored["id"]))
-        await self._token_repo.revoke_all_for_user(str(stored["user_id"]))
+        user_id = str(stored["user_id"])
+        password_hash = await self._pwd.hash_async(new_password)
+        # Hashing happens before the transaction so no connection is held
+        # for it; the token is then re-checked under a row lock.
+        async with self._reset_repo.transaction() as tx:
+            stored = await self._reset_repo.using(tx).find_valid_by_hash(
+                token_hash, for_update=True
+            )
+            if stored:
+                await tx.execute_batch(
+                    [
+                        self._user_repo.update_password_statement(
+                            user_id, password_hash
+                        ),
+                        self._reset_repo.mark_used_statement(str(stored["id"])),
+                        self._token_repo.revoke_all_for_user_statement(user_id),
+                    ]
+                )
+
+        if not stored:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid or expired reset token",
+            )
+        await self._user_repo.invalidate(user_id)
 
     async def logout(self, raw_refresh_token: str) -> None:
         try:
@@ -236,20 +258,29 @@ class AuthService:
     async def _create_token_pair(
         self, user_id: str, family_id: str | None = None
     ) -> TokenResponse:
+        tokens, token_hash, fid, expires_at = self._mint_token_pair(
+            user_id, family_id
+        )
+        await self._token_repo.create(user_id, token_hash, fid, expires_at)
+        return tokens
+
+    def _mint_token_pair(
+        self, user_id: str, family_id: str | None = None
+    ) -> tuple[TokenResponse, str, str, datetime]:
+        """Mint a token pair; also return the refresh token's hash, family
+        and expiry for storing it."""
         access_token = self._jwt.create_access_token(user_id)
         refresh_token, fid, expires_at = self._jwt.create_refresh_token(
             user_id, family_id
         )
         token_hash = self._hash_token(refresh_token)
-
-        await self._token_repo.create(user_id, token_hash, fid, expires_at)
-
-        return TokenResponse(
+        tokens = TokenResponse(
             access_token=access_token,
             refresh_token=refresh_token,
             token_type="bearer",
             expires_in=self._settings.jwt.access_token_expire_minutes * 60,
         )
+        return tokens, token_hash, fid, expires_at
 
     @staticmethod
     def _hash_token(token: str) -> str:
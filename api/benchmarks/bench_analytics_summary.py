@@ -0,0 +1,198 @@
+"""Compare analytics summary strategies against a seeded PostgreSQL database.
+
+Usage
+-----
+    DB_HOST=localhost python -m benchmarks.bench_analytics_summary \\
+        [--days 365] [--events 50000] [--iterations 500] [--limit 50]
+
+Runs against a real database with the migrations applied.  A throw-away user
+is created with ``--days`` rows of daily stats and ``--events`` usage events,
+then the summary for the last 30 days is computed ``--iterations`` times with
+each strategy:
+
+* ``sequential``  – the previous implementation: aggregate query (scanning
+  ``daily_usage_stats`` twice), then recent events, then the daily list.
+* ``concurrent``  – the same three queries gathered on separate pooled
+  connections.
+* ``single_cte``  – :meth:`AnalyticsRepository.get_user_summary`, one
+  statement that scans the daily rows once.
+
+Latency p50/p99 is printed for each.  The seeded user and its rows are
+deleted afterwards.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+from app.config import DatabaseSettings
+from app.providers.database import DatabaseProvider
+from app.repositories.analytics import AnalyticsRepository
+
+_EVENT_TYPES = ("completion", "embedding", "chat", "moderation")
+
+_AGGREGATE_SQL = """
+SELECT
+    COALESCE(SUM(total_events), 0)  AS total_events,
+    COALESCE(SUM(total_tokens), 0)  AS total_tokens,
+    (
+        SELECT jsonb_object_agg(key, cnt)
+        FROM (
+            SELECT key, SUM(value::bigint) AS cnt
+            FROM   daily_usage_stats,
+                   jsonb_each_text(events_by_type)
+            WHERE  user_id = $1
+              AND  date BETWEEN $2 AND $3
+            GROUP  BY key
+        ) sub
+    ) AS events_by_type
+FROM daily_usage_stats
+WHERE user_id = $1
+  AND date BETWEEN $2 AND $3
+"""
+
+
+async def _seed(db: DatabaseProvider, days: int, events: int) -> uuid.UUID:
+    user = await db.fetch_one(
+        "INSERT INTO users (email, name) VALUES ($1, 'bench') RETURNING id",
+        f"bench-{uuid.uuid4()}@example.com",
+    )
+    user_id = user["id"]
+    today = datetime.now(timezone.utc).date()
+
+    daily = []
+    for offset in range(days):
+        by_type = {t: random.randint(0, 50) for t in _EVENT_TYPES}
+        daily.append(
+            (
+                user_id,
+                today - timedelta(days=offset),
+                sum(by_type.values()),
+                random.randint(0, 100_000),
+                by_type,
+            )
+        )
+    await db.execute_many(
+        """
+        INSERT INTO daily_usage_stats
+            (user_id, date, total_events, total_tokens, events_by_type)
+        VALUES ($1, $2, $3, $4, $5)
+        """,
+        daily,
+    )
+
+    now = datetime.now(timezone.utc)
+    # usage_events is partitioned by month; make sure the seeded range fits.
+    await db.execute(
+        "SELECT usage_events_create_partitions(0, $1)",
+        (now - timedelta(days=28)).date(),
+    )
+    await db.copy_records(
+        "usage_events",
+        [
+            (
+                uuid.uuid4(),
+                user_id,
+                random.choice(_EVENT_TYPES),
+                "openai",
+                "gpt-4o",
+                random.randint(1, 2000),
+                random.randint(50, 3000),
+                {},
+                now - timedelta(seconds=random.randint(0, 86_400 * 28)),
+            )
+            for _ in range(events)
+        ],
+        columns=(
+            "id",
+            "user_id",
+            "event_type",
+            "provider",
+            "model",
+            "tokens_used",
+            "latency_ms",
+            "metadata",
+            "created_at",
+        ),
+    )
+    await db.execute("ANALYZE usage_events")
+    await db.execute("ANALYZE daily_usage_stats")
+    return user_id
+
+
+async def _sequential(repo, db, user_id, start, end, limit) -> None:
+    await db.fetch_one(_AGGREGATE_SQL, user_id, start, end)
+    await repo.get_recent_events(user_id, limit, None)
+    await repo.get_daily_stats(user_id, start, end)
+
+
+async def _concurrent(repo, db, user_id, start, end, limit) -> None:
+    await asyncio.gather(
+        db.fetch_one(_AGGREGATE_SQL, user_id, start, end),
+        repo.get_recent_events(user_id, limit, None),
+        repo.get_daily_stats(user_id, start, end),
+    )
+
+
+async def _single_cte(repo, db, user_id, start, end, limit) -> None:
+    await repo.get_user_summary(user_id, start, end, limit)
+
+
+async def _measure(strategy, iterations: int, *args) -> dict:
+    for _ in range(min(20, iterations)):
+        await strategy(*args)
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await strategy(*args)
+        latencies.append(time.perf_counter() - started)
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {"p50_ms": quantiles[49] * 1000, "p99_ms": quantiles[98] * 1000}
+
+
+async def main(days: int, events: int, iterations: int, limit: int) -> None:
+    settings = DatabaseSettings()
+    db = DatabaseProvider(settings.dsn, min_size=3, max_size=3)
+    await db.connect()
+    repo = AnalyticsRepository(db)
+    user_id = await _seed(db, days, events)
+    try:
+        end: date = datetime.now(timezone.utc).date()
+        start = end - timedelta(days=29)
+        print(
+            f"{days} daily rows, {events} events, "
+            f"{iterations} iterations (limit {limit})"
+        )
+        print(f"{'strategy':<12} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+        for name, strategy in (
+            ("sequential", _sequential),
+            ("concurrent", _concurrent),
+            ("single_cte", _single_cte),
+        ):
+            result = await _measure(
+                strategy, iterations, repo, db, user_id, start, end, limit
+            )
+            print(
+                f"{name:<12} {result['p50_ms']:>10.3f} "
+                f"{result['p99_ms']:>10.3f}"
+            )
+    finally:
+        await db.execute("DELETE FROM usage_events WHERE user_id = $1", user_id)
+        await db.execute("DELETE FROM users WHERE id = $1", user_id)
+        await db.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--events", type=int, default=50_000)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.days, args.events, args.iterations, args.limit))
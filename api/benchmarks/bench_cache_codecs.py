@@ -0,0 +1,127 @@
+"""Compare cache codecs on a cached analytics summary.
+
+Usage
+-----
+    python -m benchmarks.bench_cache_codecs [--limit 500] [--days 30] \\
+        [--iterations 2000] [--min-size 1024]
+
+Builds a synthetic :class:`AnalyticsSummaryResponse` with ``--limit`` recent
+events and ``--days`` daily rows, then for every codec and compression whose
+library is installed reports the stored payload size and the time to encode
+(``model_dump`` + encode) and decode (decode + ``model_validate``) it, i.e.
+the full cost the analytics service pays per cache write and read.  ``serve``
+is the time to turn the payload into the JSON response body
+(:meth:`CacheCodec.decode_json`), which the summary endpoint does instead of
+decoding; ``parse+dump`` is the decode plus ``model_dump_json`` it replaces.
+``json`` without compression is the format used before codecs were
+configurable.  No Redis server is needed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+from app.providers.cache_codec import build_cache_codec
+from app.schemas.analytics import (
+    AnalyticsSummaryResponse,
+    DailyStatResponse,
+    UsageEventResponse,
+)
+
+_EVENT_TYPES = ("completion", "embedding", "chat", "moderation")
+_MODELS = ("gpt-4o", "claude-sonnet", "gemini-pro", None)
+
+
+def _build_summary(limit: int, days: int) -> AnalyticsSummaryResponse:
+    user_id = uuid.uuid4()
+    now = datetime.now(timezone.utc)
+    events = [
+        UsageEventResponse(
+            id=uuid.uuid4(),
+            user_id=user_id,
+            event_type=random.choice(_EVENT_TYPES),
+            provider=random.choice(("openai", "anthropic", "gemini", None)),
+            model=random.choice(_MODELS),
+            tokens_used=random.randint(1, 4000),
+            latency_ms=random.randint(50, 5000),
+            metadata={"request_id": uuid.uuid4().hex, "cached": False},
+            created_at=now - timedelta(seconds=i * 37),
+        )
+        for i in range(limit)
+    ]
+    daily = [
+        DailyStatResponse(
+            date=date.today() - timedelta(days=i),
+            total_events=random.randint(1, 5000),
+            total_tokens=random.randint(1, 2_000_000),
+            events_by_type={t: random.randint(0, 2000) for t in _EVENT_TYPES},
+        )
+        for i in range(days)
+    ]
+    return AnalyticsSummaryResponse(
+        total_events=sum(d.total_events for d in daily),
+        total_tokens=sum(d.total_tokens for d in daily),
+        events_by_type={t: random.randint(0, 60_000) for t in _EVENT_TYPES},
+        recent_events=events,
+        daily_stats=daily,
+    )
+
+
+def _time_us(fn, iterations: int) -> float:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(samples)
+
+
+def main(limit: int, days: int, iterations: int, min_size: int) -> None:
+    summary = _build_summary(limit, days)
+    print(
+        f"summary with {limit} recent events and {days} daily rows, "
+        f"median of {iterations} runs"
+    )
+    print(
+        f"{'codec':<16} {'bytes':>8} {'encode (us)':>12} {'decode (us)':>12} "
+        f"{'serve (us)':>11} {'parse+dump (us)':>16}"
+    )
+
+    for name in ("json", "orjson", "msgpack"):
+        for compression in ("none", "zlib", "zstd", "lz4"):
+            try:
+                codec = build_cache_codec(name, compression, min_size)
+            except ImportError:
+                continue
+            data = codec.encode_model(summary)
+            encode_us = _time_us(lambda: codec.encode_model(summary), iterations)
+            decode_us = _time_us(
+                lambda: codec.decode_model(data, AnalyticsSummaryResponse),
+                iterations,
+            )
+            serve_us = _time_us(lambda: codec.decode_json(data), iterations)
+            dump_us = _time_us(
+                lambda: codec.decode_model(
+                    data, AnalyticsSummaryResponse
+                ).model_dump_json(),
+                iterations,
+            )
+            print(
+                f"{codec.name:<16} {len(data):>8} {encode_us:>12.0f} "
+                f"{decode_us:>12.0f} {serve_us:>11.0f} {dump_us:>16.0f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--min-size", type=int, default=1024)
+    args = parser.parse_args()
+    main(args.limit, args.days, args.iterations, args.min_size)
@@ -0,0 +1,139 @@
+"""Compare write throughput of the ``jsonb`` and ``columnar`` rollup stats storage.
+
+Usage
+-----
+    DB_HOST=localhost python -m benchmarks.bench_daily_stats_storage \\
+        [--users 20] [--events 20000] [--concurrency 32]
+
+Runs against a real database with the migrations applied.  For each storage
+mode, ``--users`` throw-away users are created and ``--events`` single-event
+upserts (:meth:`AnalyticsRepository.upsert_daily_stats`) are issued from
+``--concurrency`` concurrent tasks, all on the same day so every write hits a
+hot row.  Each upsert is the full statement writing the hourly, daily and
+monthly tiers.  The benchmark reports upserts per second, the growth of the
+three tier tables together and the share of their updates that were HOT.
+
+The seeded users and their rows are deleted afterwards.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+
+from app.config import DatabaseSettings
+from app.providers.database import DatabaseProvider
+from app.repositories.analytics import AnalyticsRepository
+
+_EVENT_TYPES = ("completion", "embedding", "chat", "moderation")
+_TIER_TABLES = {
+    "jsonb": ("hourly_usage_stats", "daily_usage_stats", "monthly_usage_stats"),
+    "columnar": (
+        "hourly_usage_type_stats",
+        "daily_usage_type_stats",
+        "monthly_usage_type_stats",
+    ),
+}
+
+
+async def _table_stats(db: DatabaseProvider, tables: tuple[str, ...]) -> dict:
+    """Size and update counters summed over *tables*."""
+    row = await db.fetch_one(
+        """
+        SELECT COALESCE(SUM(pg_total_relation_size(relid)), 0) AS size,
+               COALESCE(SUM(n_tup_upd), 0)                     AS n_tup_upd,
+               COALESCE(SUM(n_tup_hot_upd), 0)                 AS n_tup_hot_upd
+        FROM   pg_stat_user_tables
+        WHERE  relid = ANY($1::regclass[])
+        """,
+        list(tables),
+    )
+    return dict(row)
+
+
+async def _run(
+    db: DatabaseProvider,
+    storage: str,
+    users: int,
+    events: int,
+    concurrency: int,
+) -> dict:
+    repo = AnalyticsRepository(db, stats_storage=storage)
+    user_ids = [
+        (
+            await db.fetch_one(
+                "INSERT INTO users (email, name) VALUES ($1, 'bench') "
+                "RETURNING id",
+                f"bench-{uuid.uuid4()}@example.com",
+            )
+        )["id"]
+        for _ in range(users)
+    ]
+    tables = _TIER_TABLES[storage]
+    await db.execute(f"VACUUM ANALYZE {', '.join(tables)}")
+    before = await _table_stats(db, tables)
+
+    now = datetime.now(timezone.utc)
+    remaining = iter(range(events))
+
+    async def worker() -> None:
+        for _ in remaining:
+            await repo.upsert_daily_stats(
+                user_id=random.choice(user_ids),
+                stat_hour=now,
+                event_type=random.choice(_EVENT_TYPES),
+                tokens=random.randint(1, 2000),
+            )
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    # pg_stat counters are flushed asynchronously by the backends.
+    await asyncio.sleep(1)
+    after = await _table_stats(db, tables)
+    await db.execute("DELETE FROM users WHERE id = ANY($1::uuid[])", user_ids)
+
+    updates = after["n_tup_upd"] - before["n_tup_upd"]
+    hot = after["n_tup_hot_upd"] - before["n_tup_hot_upd"]
+    return {
+        "ops_per_sec": events / elapsed,
+        "growth_kb": (after["size"] - before["size"]) / 1024,
+        "hot_pct": 100 * hot / updates if updates else 0.0,
+    }
+
+
+async def main(users: int, events: int, concurrency: int) -> None:
+    settings = DatabaseSettings()
+    db = DatabaseProvider(settings.dsn, min_size=concurrency, max_size=concurrency)
+    await db.connect()
+    try:
+        print(
+            f"{events} upserts over {users} users "
+            f"({concurrency} concurrent writers)"
+        )
+        print(
+            f"{'storage':<10} {'upserts/s':>10} {'growth (KB)':>12} "
+            f"{'HOT %':>7}"
+        )
+        for storage in ("jsonb", "columnar"):
+            result = await _run(db, storage, users, events, concurrency)
+            print(
+                f"{storage:<10} {result['ops_per_sec']:>10.0f} "
+                f"{result['growth_kb']:>12.0f} {result['hot_pct']:>7.1f}"
+            )
+    finally:
+        await db.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--events", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.events, args.concurrency))
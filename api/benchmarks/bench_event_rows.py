@@ -0,0 +1,105 @@
+"""Compare building an event listing page from dict rows and from records.
+
+Usage
+-----
+    DB_HOST=localhost python -m benchmarks.bench_event_rows \\
+        [--rows 500] [--iterations 2000]
+
+Fetches ``--rows`` event-shaped rows once from a real PostgreSQL server
+(generated by ``generate_series``, nothing is written), then times the CPU
+work of turning those driver records into a :class:`UsageEventPage`:
+
+* ``dicts``   – the previous path: ``fetch_all`` copies each record into a
+  dict, the repository validates it into a ``UsageEventResponse`` and the
+  page re-validates the models.
+* ``records`` – ``fetch_records`` plus :class:`UsageEventRecord`: each
+  record is unpacked into a slotted dataclass and the page validates the
+  list once.
+
+Median microseconds per page and the number of memory blocks a built page
+keeps alive (``tracemalloc``) are printed for each.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+from app.config import DatabaseSettings
+from app.providers.database import DatabaseProvider
+from app.repositories.analytics import (
+    _EVENT_SELECT,
+    UsageEventRecord,
+    _row_to_event,
+)
+from app.schemas.analytics import UsageEventPage
+
+_ROWS_SQL = f"""
+WITH events AS (
+    SELECT gen_random_uuid() AS id,
+           gen_random_uuid() AS user_id,
+           (ARRAY['completion', 'embedding', 'chat'])[1 + i % 3] AS event_type,
+           'openai' AS provider,
+           'gpt-4o' AS model,
+           (i * 37) % 4000 AS tokens_used,
+           (i * 13) % 900 AS latency_ms,
+           jsonb_build_object('request_id', md5(i::text)) AS metadata,
+           now() - i * INTERVAL '1 second' AS created_at
+    FROM   generate_series(1, $1) AS i
+)
+SELECT {_EVENT_SELECT} FROM events
+"""
+
+
+def _dicts(records) -> UsageEventPage:
+    rows = [dict(r) for r in records]
+    return UsageEventPage(items=[_row_to_event(r) for r in rows])
+
+
+def _records(records) -> UsageEventPage:
+    return UsageEventPage(items=[UsageEventRecord(*r) for r in records])
+
+
+def _measure(build, records, iterations: int) -> dict:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        build(records)
+        samples.append((time.perf_counter() - started) * 1e6)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    page = build(records)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(s.count_diff for s in after.compare_to(before, "filename"))
+    del page
+    return {"us": statistics.median(samples), "blocks": blocks}
+
+
+async def main(rows: int, iterations: int) -> None:
+    settings = DatabaseSettings()
+    db = DatabaseProvider(settings.dsn, min_size=1, max_size=1)
+    await db.connect()
+    try:
+        records = await db.fetch_records(_ROWS_SQL, rows)
+    finally:
+        await db.disconnect()
+
+    assert _dicts(records) == _records(records)
+    print(f"{rows} rows per page, median of {iterations} builds")
+    print(f"{'path':<8} {'us/page':>10} {'live blocks':>12}")
+    for name, build in (("dicts", _dicts), ("records", _records)):
+        result = _measure(build, records, iterations)
+        print(f"{name:<8} {result['us']:>10.0f} {result['blocks']:>12}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.iterations))
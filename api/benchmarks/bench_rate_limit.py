@@ -0,0 +1,135 @@
+"""Compare the pure-ASGI rate limiter against a ``BaseHTTPMiddleware`` one.
+
+Usage
+-----
+    python -m benchmarks.bench_rate_limit [--requests 5000] [--concurrency 50]
+
+Both middlewares run in front of a no-op endpoint and talk to an in-memory
+stand-in for Redis that returns a fixed "allowed" result, so the numbers
+isolate the per-request overhead of the middleware itself.  Latency p50/p99
+and requests per second are printed for each variant.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret")
+
+import httpx  # noqa: E402
+from fastapi import FastAPI, Request  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+
+from app.middleware.rate_limit import RateLimitMiddleware  # noqa: E402
+from app.providers.redis import RedisProvider  # noqa: E402
+
+
+class _StubRedisClient:
+    """Minimal async client returning an 'allowed' sliding-window result."""
+
+    async def evalsha(self, *_args):
+        return [1, 99, int(time.time()) + 60]
+
+    async def script_load(self, _source):
+        return None
+
+
+def _stub_redis_provider() -> RedisProvider:
+    provider = RedisProvider("localhost", 6379)
+    provider._client = _StubRedisClient()
+    return provider
+
+
+class _BaseHTTPRateLimitMiddleware(BaseHTTPMiddleware):
+    """The previous ``BaseHTTPMiddleware`` shape around the same limiter."""
+
+    def __init__(self, app) -> None:
+        super().__init__(app)
+        self._limiter = RateLimitMiddleware(app)
+
+    async def dispatch(self, request: Request, call_next):
+        redis_provider = request.app.state.redis_provider
+        _scope, identifier, route_prefix, max_requests, window_seconds = (
+            self._limiter._resolve_limit(request.scope)
+        )
+        remaining, reset_ts = await self._limiter._hit(
+            redis_provider,
+            f"rl:{_scope}:{identifier}:{route_prefix}",
+            max_requests,
+            window_seconds,
+        )
+        response = await call_next(request)
+        response.headers["X-RateLimit-Limit"] = str(max_requests)
+        response.headers["X-RateLimit-Remaining"] = str(remaining)
+        response.headers["X-RateLimit-Reset"] = str(reset_ts)
+        return response
+
+
+def _build_app(middleware_cls) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(middleware_cls)
+    app.state.redis_provider = _stub_redis_provider()
+
+    @app.get("/noop")
+    async def noop():
+        return {}
+
+    return app
+
+
+async def _run(app: FastAPI, requests: int, concurrency: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+
+        async def one() -> None:
+            async with semaphore:
+                start = time.perf_counter()
+                resp = await client.get("/noop")
+                latencies.append(time.perf_counter() - start)
+                assert resp.status_code == 200
+
+        # Warm up routing and middleware stack construction.
+        await asyncio.gather(*(one() for _ in range(min(200, requests))))
+        latencies.clear()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "p50_ms": quantiles[49] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+        "rps": requests / elapsed,
+    }
+
+
+async def main(requests: int, concurrency: int) -> None:
+    variants = {
+        "BaseHTTPMiddleware": _build_app(_BaseHTTPRateLimitMiddleware),
+        "pure ASGI": _build_app(RateLimitMiddleware),
+    }
+    print(f"{'variant':<20} {'p50 (ms)':>10} {'p99 (ms)':>10} {'req/s':>10}")
+    for name, app in variants.items():
+        result = await _run(app, requests, concurrency)
+        print(
+            f"{name:<20} {result['p50_ms']:>10.3f} "
+            f"{result['p99_ms']:>10.3f} {result['rps']:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,122 @@
+"""Compare Redis memory and throughput of the rate-limit algorithms.
+
+Usage
+-----
+    REDIS_HOST=localhost python -m benchmarks.bench_rate_limit_algorithms \\
+        [--users 2000] [--requests-per-user 200] [--db 15]
+
+Runs against a real Redis server.  For each algorithm (``sliding_log`` and
+``sliding_window_counter``) the selected database is flushed, every simulated
+user sends ``--requests-per-user`` requests through the same script and key
+layout as :class:`~app.middleware.rate_limit.RateLimitMiddleware`, and the
+benchmark reports script calls per second, the growth of ``used_memory``
+and the average ``MEMORY USAGE`` of a sampled key.
+
+The database given by ``--db`` is flushed: never point this at live data.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+import uuid
+
+from app.config import RedisSettings
+from app.middleware.rate_limit import (
+    RATE_LIMIT_COUNTER_SCRIPT,
+    RATE_LIMIT_SCRIPT,
+    register_rate_limit_scripts,
+)
+from app.providers.redis import RedisProvider
+
+_LIMIT = 200
+_WINDOW_SECONDS = 60
+_CONCURRENCY = 100
+
+
+async def _hit(redis: RedisProvider, algorithm: str, key: str) -> None:
+    now_ms = int(time.time() * 1000)
+    if algorithm == "sliding_window_counter":
+        await redis.run_script(
+            RATE_LIMIT_COUNTER_SCRIPT,
+            [key],
+            [now_ms, _LIMIT, _WINDOW_SECONDS],
+        )
+    else:
+        await redis.run_script(
+            RATE_LIMIT_SCRIPT,
+            [key],
+            [
+                now_ms - _WINDOW_SECONDS * 1000,
+                now_ms,
+                _LIMIT,
+                _WINDOW_SECONDS,
+                str(uuid.uuid4()),
+            ],
+        )
+
+
+async def _run(
+    redis: RedisProvider, algorithm: str, users: int, requests_per_user: int
+) -> dict:
+    client = redis.client
+    await client.flushdb()
+    memory_before = (await client.info("memory"))["used_memory"]
+
+    prefix = "rlc" if algorithm == "sliding_window_counter" else "rl"
+    keys = [f"{prefix}:user:{uuid.uuid4()}:global" for _ in range(users)]
+    semaphore = asyncio.Semaphore(_CONCURRENCY)
+
+    async def user_requests(key: str) -> None:
+        async with semaphore:
+            for _ in range(requests_per_user):
+                await _hit(redis, algorithm, key)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user_requests(key) for key in keys))
+    elapsed = time.perf_counter() - started
+
+    memory_after = (await client.info("memory"))["used_memory"]
+    sample = keys[:: max(1, users // 100)]
+    usages = [await client.memory_usage(key) or 0 for key in sample]
+    return {
+        "ops_per_sec": users * requests_per_user / elapsed,
+        "memory_delta_mb": (memory_after - memory_before) / 1024 / 1024,
+        "bytes_per_key": sum(usages) / len(usages),
+    }
+
+
+async def main(users: int, requests_per_user: int, db: int) -> None:
+    settings = RedisSettings()
+    redis = RedisProvider(settings.host, settings.port, db)
+    register_rate_limit_scripts(redis)
+    await redis.connect()
+    try:
+        print(
+            f"{users} users x {requests_per_user} requests "
+            f"(limit {_LIMIT}/{_WINDOW_SECONDS}s)"
+        )
+        print(
+            f"{'algorithm':<24} {'ops/s':>10} {'memory (MB)':>12} "
+            f"{'bytes/key':>10}"
+        )
+        for algorithm in ("sliding_log", "sliding_window_counter"):
+            result = await _run(redis, algorithm, users, requests_per_user)
+            print(
+                f"{algorithm:<24} {result['ops_per_sec']:>10.0f} "
+                f"{result['memory_delta_mb']:>12.2f} "
+                f"{result['bytes_per_key']:>10.0f}"
+            )
+        await redis.client.flushdb()
+    finally:
+        await redis.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--requests-per-user", type=int, default=200)
+    parser.add_argument("--db", type=int, default=15)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.requests_per_user, args.db))
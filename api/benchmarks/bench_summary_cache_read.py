@@ -0,0 +1,142 @@
+"""Compare analytics summary cache reads with two round trips and with one.
+
+Usage
+-----
+    REDIS_HOST=localhost python -m benchmarks.bench_summary_cache_read \\
+        [--reads 20000] [--concurrency 32] [--limit 50]
+
+Runs against a real Redis server.  A summary with ``--limit`` recent events
+is cached for a throw-away user, then ``--reads`` cache hits are issued from
+``--concurrency`` concurrent tasks with each strategy:
+
+* ``two_gets``  – the previous read path: ``GET`` the user's version key,
+  then ``GET`` the versioned summary key.
+* ``script``    – :meth:`AnalyticsService._read_cached_summary`, one
+  ``EVALSHA`` returning the version and the payload together.
+
+Latency p50/p99 and reads per second are printed for each.  The gap grows
+with the network round-trip time to Redis, so run it against a remote
+server as well as a local one.  The seeded keys are deleted afterwards.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from datetime import date, datetime, timezone
+
+from app.config import RedisSettings
+from app.providers.cache_codec import build_cache_codec
+from app.providers.redis import RedisProvider
+from app.schemas.analytics import AnalyticsSummaryResponse, UsageEventResponse
+from app.services.analytics import (
+    AnalyticsService,
+    _build_cache_key,
+    _version_key,
+    register_summary_cache_scripts,
+)
+
+_START = date(2024, 6, 1)
+_END = date(2024, 6, 30)
+
+
+async def _seed(redis: RedisProvider, user_id: uuid.UUID, limit: int) -> None:
+    now = datetime.now(timezone.utc)
+    summary = AnalyticsSummaryResponse(
+        total_events=limit,
+        total_tokens=limit * 100,
+        events_by_type={"completion": limit},
+        recent_events=[
+            UsageEventResponse(
+                id=uuid.uuid4(),
+                user_id=user_id,
+                event_type="completion",
+                provider="openai",
+                model="gpt-4o",
+                tokens_used=100,
+                latency_ms=250,
+                metadata={},
+                created_at=now,
+            )
+            for _ in range(limit)
+        ],
+        daily_stats=[],
+    )
+    await redis.set(_version_key(user_id), "7")
+    await redis.set_value(
+        _build_cache_key(user_id, 7, _START, _END, limit), summary, 3600
+    )
+
+
+async def _run(strategy, reads: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    remaining = iter(range(reads))
+
+    async def worker() -> None:
+        for _ in remaining:
+            started = time.perf_counter()
+            await strategy()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies),
+        "p99": latencies[int(len(latencies) * 0.99) - 1],
+        "rps": reads / elapsed,
+    }
+
+
+async def main(reads: int, concurrency: int, limit: int) -> None:
+    settings = RedisSettings()
+    redis = RedisProvider(
+        settings.host,
+        settings.port,
+        settings.db,
+        codec=build_cache_codec(
+            settings.codec, settings.compression, settings.compress_min_bytes
+        ),
+    )
+    register_summary_cache_scripts(redis)
+    await redis.connect()
+    user_id = uuid.uuid4()
+    service = AnalyticsService(analytics_repo=None, redis=redis)
+    try:
+        await _seed(redis, user_id, limit)
+
+        async def two_gets() -> None:
+            version = int(await redis.get(_version_key(user_id)) or 0)
+            await redis.get_value(
+                _build_cache_key(user_id, version, _START, _END, limit),
+                model_type=AnalyticsSummaryResponse,
+            )
+
+        async def script() -> None:
+            await service._read_cached_summary(user_id, _START, _END, limit)
+
+        print(f"{reads} cache hits ({concurrency} concurrent readers)")
+        print(f"{'strategy':<10} {'p50 ms':>8} {'p99 ms':>8} {'reads/s':>9}")
+        for name, strategy in (("two_gets", two_gets), ("script", script)):
+            result = await _run(strategy, reads, concurrency)
+            print(
+                f"{name:<10} {result['p50']:>8.3f} {result['p99']:>8.3f} "
+                f"{result['rps']:>9.0f}"
+            )
+    finally:
+        for key in await redis.client.keys(f"analytics:*:{user_id}*"):
+            await redis.client.delete(key)
+        await redis.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reads", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.reads, args.concurrency, args.limit))
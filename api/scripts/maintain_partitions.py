@@ -0,0 +1,90 @@
+"""Maintain the monthly partitions of ``usage_events``.
+
+Usage
+-----
+    python -m scripts.maintain_partitions
+
+Run daily (e.g. from a cron job or Kubernetes CronJob).  Connection settings
+come from the usual ``DB_*`` environment variables.
+
+Environment variables
+---------------------
+    ANALYTICS_PARTITIONS_AHEAD_MONTHS – partitions to pre-create (default: 3).
+    ANALYTICS_RETENTION_MONTHS        – months of events to keep (default: 12).
+    ANALYTICS_RETENTION_ACTION        – ``detach`` or ``drop`` (default: detach).
+
+Behaviour
+---------
+* Creates any missing partition from the current month up to the configured
+  number of months ahead.  Events recorded for a month without a partition
+  land in the ``usage_events_default`` partition; creating the month's
+  partition moves them into it, including months missed while this job was
+  not running.
+* Warns when events remain in the DEFAULT partition afterwards (e.g. with
+  timestamps beyond the months created ahead).
+* Detaches (or drops) partitions that lie entirely before the retention
+  window.  Detached tables keep their ``usage_events_YYYY_MM`` name and can
+  be archived and dropped separately.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+
+from app.config import AnalyticsSettings, DatabaseSettings
+from app.providers.database import DatabaseProvider
+from app.repositories.analytics import AnalyticsRepository
+
+
+async def maintain_partitions(
+    repo: AnalyticsRepository, settings: AnalyticsSettings
+) -> tuple[int, list[str], int]:
+    """Create upcoming partitions and expire old ones.
+
+    Returns the number of partitions created, the names of those detached
+    or dropped, and the number of events left in the DEFAULT partition.
+    """
+    created = await repo.create_event_partitions(
+        settings.partitions_ahead_months
+    )
+    expired = await repo.expire_event_partitions(
+        settings.retention_months,
+        detach_only=settings.retention_action == "detach",
+    )
+    stray = await repo.count_default_partition_events()
+    return created, expired, stray
+
+
+async def _main() -> None:
+    db_settings = DatabaseSettings()
+    analytics_settings = AnalyticsSettings()
+    db = DatabaseProvider(db_settings.dsn, min_size=1, max_size=1)
+    await db.connect()
+    try:
+        created, expired, stray = await maintain_partitions(
+            AnalyticsRepository(db), analytics_settings
+        )
+    finally:
+        await db.disconnect()
+
+    print(f"Partitions created: {created}")
+    verb = (
+        "detached" if analytics_settings.retention_action == "detach" else "dropped"
+    )
+    for name in expired:
+        print(f"Partition {verb}: {name}")
+    if stray:
+        print(
+            f"WARNING: {stray} event(s) remain in usage_events_default; "
+            "they have no monthly partition and are never expired",
+            file=sys.stderr,
+        )
+
+
+def main() -> None:
+    asyncio.run(_main())
+
+
+if __name__ == "__main__":
+    main()
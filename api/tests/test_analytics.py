@@ -9,12 +9,18 @@ from unittest.mock import AsyncMock, MagicMock
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
-from app.dependencies import get_analytics_service, get_current_user
+from app.dependencies import (
+    get_analytics_buffer,
+    get_analytics_service,
+    get_current_user,
+)
 from app.models.user import UserInDB
 from app.routers.analytics import router as analytics_router
 from app.schemas.analytics import (
     AnalyticsSummaryResponse,
     DailyStatResponse,
+    HourlyStatResponse,
+    UsageEventPage,
     UsageEventResponse,
 )
 
@@ -63,6 +69,13 @@ _MOCK_DAILY = DailyStatResponse(
     events_by_type={"completion": 5},
 )
 
+_MOCK_HOURLY = HourlyStatResponse(
+    hour=datetime(2024, 6, 1, 12, 0, tzinfo=timezone.utc),
+    total_events=2,
+    total_tokens=200,
+    events_by_type={"completion": 2},
+)
+
 _MOCK_SUMMARY = AnalyticsSummaryResponse(
     total_events=5,
     total_tokens=500,
@@ -75,10 +88,18 @@ _MOCK_SUMMARY = AnalyticsSummaryResponse(
 def _make_mock_service(**method_overrides):
     """Return an AsyncMock analytics service with sensible defaults."""
     svc = MagicMock()
-    svc.get_cached_summary = AsyncMock(return_value=_MOCK_SUMMARY)
-    svc.get_user_events = AsyncMock(return_value=[_MOCK_EVENT])
+    svc.get_cached_summary_json = AsyncMock(
+        return_value=_MOCK_SUMMARY.model_dump_json().encode()
+    )
+    svc.get_user_events_json = AsyncMock(
+        return_value=UsageEventPage(
+            items=[_MOCK_EVENT], next_cursor="abc"
+        ).model_dump_json().encode()
+    )
     svc.get_daily_stats_only = AsyncMock(return_value=[_MOCK_DAILY])
+    svc.get_hourly_stats_only = AsyncMock(return_value=[_MOCK_HOURLY])
     svc.track_event = AsyncMock(return_value=_MOCK_EVENT)
+    svc.track_events = AsyncMock(side_effect=lambda events: [_MOCK_EVENT] * len(events))
     for name, value in method_overrides.items():
         setattr(svc, name, value)
     return svc
@@ -112,6 +133,8 @@ class TestGetSummary:
             _teardown()
 
         assert resp.status_code == 200
+        assert resp.headers["content-type"] == "application/json"
+        assert resp.content == _MOCK_SUMMARY.model_dump_json().encode()
         data = resp.json()
         assert data["total_events"] == 5
         assert data["total_tokens"] == 500
@@ -132,7 +155,7 @@ class TestGetSummary:
         assert resp2.status_code == 200
         assert resp1.json() == resp2.json()
         # Service was called for both; caching layer is tested at the unit level
-        assert svc.get_cached_summary.call_count == 2
+        assert svc.get_cached_summary_json.call_count == 2
 
     def test_passes_query_params(self):
         client, svc = _client_with_overrides()
@@ -149,7 +172,7 @@ class TestGetSummary:
             _teardown()
 
         assert resp.status_code == 200
-        call_params = svc.get_cached_summary.call_args[0][1]
+        call_params = svc.get_cached_summary_json.call_args[0][1]
         assert str(call_params.start_date) == "2024-01-01"
         assert str(call_params.end_date) == "2024-06-30"
         assert call_params.limit == 10
@@ -165,7 +188,7 @@ class TestGetSummary:
 
 
 class TestListEvents:
-    def test_returns_event_list(self):
+    def test_returns_event_page(self):
         client, _ = _client_with_overrides()
         try:
             resp = client.get("/api/v1/analytics/events")
@@ -174,9 +197,22 @@ class TestListEvents:
 
         assert resp.status_code == 200
         data = resp.json()
-        assert isinstance(data, list)
-        assert len(data) == 1
-        assert data[0]["event_type"] == "completion"
+        assert len(data["items"]) == 1
+        assert data["items"][0]["event_type"] == "completion"
+        assert data["next_cursor"] == "abc"
+
+    def test_cursor_passed_to_service(self):
+        client, svc = _client_with_overrides()
+        try:
+            resp = client.get(
+                "/api/v1/analytics/events", params={"cursor": "abc"}
+            )
+        finally:
+            _teardown()
+
+        assert resp.status_code == 200
+        call_params = svc.get_user_events_json.call_args[0][1]
+        assert call_params.cursor == "abc"
 
     def test_date_filter_passed_to_service(self):
         client, svc = _client_with_overrides()
@@ -189,7 +225,7 @@ class TestListEvents:
             _teardown()
 
         assert resp.status_code == 200
-        call_params = svc.get_user_events.call_args[0][1]
+        call_params = svc.get_user_events_json.call_args[0][1]
         assert str(call_params.start_date) == "2024-06-01"
         assert str(call_params.end_date) == "2024-06-30"
 
@@ -204,7 +240,7 @@ class TestListEvents:
             _teardown()
 
         assert resp.status_code == 200
-        call_params = svc.get_user_events.call_args[0][1]
+        call_params = svc.get_user_events_json.call_args[0][1]
         assert call_params.event_type == "completion"
 
     def test_requires_auth(self):
@@ -212,6 +248,70 @@ class TestListEvents:
         assert resp.status_code in (401, 403)
 
 
+# ---------------------------------------------------------------------------
+# GET /api/v1/analytics/events/export
+# ---------------------------------------------------------------------------
+
+
+def _export_service():
+    async def export_events(user_id, params, fmt):
+        yield "chunk-1\n"
+        yield "chunk-2\n"
+
+    return _make_mock_service(export_events=MagicMock(side_effect=export_events))
+
+
+class TestExportEvents:
+    def test_streams_ndjson_by_default(self):
+        client, svc = _client_with_overrides(_export_service())
+        try:
+            resp = client.get("/api/v1/analytics/events/export")
+        finally:
+            _teardown()
+
+        assert resp.status_code == 200
+        assert resp.headers["content-type"] == "application/x-ndjson"
+        assert "usage_events.ndjson" in resp.headers["content-disposition"]
+        assert resp.text == "chunk-1\nchunk-2\n"
+        assert svc.export_events.call_args[0][2] == "ndjson"
+
+    def test_csv_format_and_filters(self):
+        client, svc = _client_with_overrides(_export_service())
+        try:
+            resp = client.get(
+                "/api/v1/analytics/events/export",
+                params={
+                    "format": "csv",
+                    "start_date": "2024-01-01",
+                    "event_type": "completion",
+                },
+            )
+        finally:
+            _teardown()
+
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/csv")
+        _, params, fmt = svc.export_events.call_args[0]
+        assert fmt == "csv"
+        assert str(params.start_date) == "2024-01-01"
+        assert params.event_type == "completion"
+
+    def test_rejects_unknown_format(self):
+        client, _ = _client_with_overrides(_export_service())
+        try:
+            resp = client.get(
+                "/api/v1/analytics/events/export", params={"format": "xml"}
+            )
+        finally:
+            _teardown()
+
+        assert resp.status_code == 422
+
+    def test_requires_auth(self):
+        resp = TestClient(_test_app).get("/api/v1/analytics/events/export")
+        assert resp.status_code in (401, 403)
+
+
 # ---------------------------------------------------------------------------
 # GET /api/v1/analytics/daily
 # ---------------------------------------------------------------------------
@@ -248,6 +348,34 @@ class TestListDailyStats:
         assert resp.status_code in (401, 403)
 
 
+# ---------------------------------------------------------------------------
+# GET /api/v1/analytics/hourly
+# ---------------------------------------------------------------------------
+
+
+class TestListHourlyStats:
+    def test_returns_hourly_list(self):
+        client, svc = _client_with_overrides()
+        try:
+            resp = client.get(
+                "/api/v1/analytics/hourly",
+                params={"start_date": "2024-06-01", "end_date": "2024-06-01"},
+            )
+        finally:
+            _teardown()
+
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data[0]["hour"].startswith("2024-06-01T12:00:00")
+        assert data[0]["total_events"] == 2
+        call_params = svc.get_hourly_stats_only.call_args[0][1]
+        assert str(call_params.start_date) == "2024-06-01"
+
+    def test_requires_auth(self):
+        resp = TestClient(_test_app).get("/api/v1/analytics/hourly")
+        assert resp.status_code in (401, 403)
+
+
 # ---------------------------------------------------------------------------
 # POST /api/v1/analytics/events
 # ---------------------------------------------------------------------------
@@ -300,3 +428,97 @@ class TestRecordEvent:
             json={"event_type": "completion"},
         )
         assert resp.status_code in (401, 403)
+
+
+# ---------------------------------------------------------------------------
+# POST /api/v1/analytics/events/batch
+# ---------------------------------------------------------------------------
+
+
+class TestRecordEventsBatch:
+    def test_accepts_batch_returns_count(self):
+        client, svc = _client_with_overrides()
+        try:
+            resp = client.post(
+                "/api/v1/analytics/events/batch",
+                json={
+                    "events": [
+                        {"event_type": "completion", "tokens_used": 10},
+                        {"event_type": "embedding", "tokens_used": 5},
+                    ]
+                },
+            )
+        finally:
+            _teardown()
+
+        assert resp.status_code == 201
+        assert resp.json() == {"accepted": 2}
+        svc.track_events.assert_awaited_once()
+
+    def test_user_ids_overridden_with_authenticated_user(self):
+        client, svc = _client_with_overrides()
+        try:
+            client.post(
+                "/api/v1/analytics/events/batch",
+                json={
+                    "events": [
+                        {"event_type": "completion", "user_id": str(uuid.uuid4())},
+                        {"event_type": "completion"},
+                    ]
+                },
+            )
+        finally:
+            _teardown()
+
+        recorded = svc.track_events.call_args[0][0]
+        assert [e.user_id for e in recorded] == [_USER_ID, _USER_ID]
+
+    def test_rejects_empty_batch(self):
+        client, _ = _client_with_overrides()
+        try:
+            resp = client.post(
+                "/api/v1/analytics/events/batch", json={"events": []}
+            )
+        finally:
+            _teardown()
+
+        assert resp.status_code == 422
+
+    def test_requires_auth(self):
+        resp = TestClient(_test_app).post(
+            "/api/v1/analytics/events/batch",
+            json={"events": [{"event_type": "completion"}]},
+        )
+        assert resp.status_code in (401, 403)
+
+
+# ---------------------------------------------------------------------------
+# POST /api/v1/analytics/events/async
+# ---------------------------------------------------------------------------
+
+
+class TestEnqueueEvent:
+    def _post(self, accepted: bool):
+        buffer = MagicMock()
+        buffer.put = AsyncMock(return_value=accepted)
+        client, _ = _client_with_overrides()
+        _test_app.dependency_overrides[get_analytics_buffer] = lambda: buffer
+        try:
+            resp = client.post(
+                "/api/v1/analytics/events/async",
+                json={"event_type": "completion", "user_id": str(uuid.uuid4())},
+            )
+        finally:
+            _test_app.dependency_overrides.pop(get_analytics_buffer, None)
+            _teardown()
+        return resp, buffer
+
+    def test_returns_202_and_enqueues_for_current_user(self):
+        resp, buffer = self._post(accepted=True)
+        assert resp.status_code == 202
+        assert resp.json() == {"accepted": 1}
+        assert buffer.put.call_args[0][0].user_id == _USER_ID
+
+    def test_returns_503_when_shed(self):
+        resp, _ = self._post(accepted=False)
+        assert resp.status_code == 503
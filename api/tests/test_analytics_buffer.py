@@ -0,0 +1,123 @@
+"""Tests for the analytics write-behind buffer."""
+
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from app.schemas.analytics import UsageEventCreate
+from app.services.analytics_buffer import AnalyticsEventBuffer
+
+
+def _event(i: int = 0) -> UsageEventCreate:
+    return UsageEventCreate(event_type=f"type-{i}")
+
+
+def _make_service():
+    service = MagicMock()
+    service.track_events = AsyncMock(side_effect=lambda batch: batch)
+    return service
+
+
+def _batch_sizes(service) -> list[int]:
+    return [len(c.args[0]) for c in service.track_events.await_args_list]
+
+
+class TestFlushing:
+    def test_flushes_full_batches_by_size(self):
+        service = _make_service()
+        buffer = AnalyticsEventBuffer(service, batch_size=3, flush_interval=10)
+
+        async def run():
+            buffer.start()
+            for i in range(6):
+                await buffer.put(_event(i))
+            for _ in range(100):
+                await asyncio.sleep(0)
+            sizes = _batch_sizes(service)
+            await buffer.stop()
+            return sizes
+
+        assert asyncio.run(run()) == [3, 3]
+
+    def test_flushes_partial_batch_after_interval(self):
+        service = _make_service()
+        buffer = AnalyticsEventBuffer(service, batch_size=100, flush_interval=0.01)
+
+        async def run():
+            buffer.start()
+            await buffer.put(_event())
+            await buffer.put(_event())
+            await asyncio.sleep(0.1)
+            sizes = _batch_sizes(service)
+            await buffer.stop()
+            return sizes
+
+        assert asyncio.run(run()) == [2]
+        assert buffer.get_status()["flushed"] == 2
+
+    def test_stop_drains_queue(self):
+        service = _make_service()
+        buffer = AnalyticsEventBuffer(service, batch_size=2, flush_interval=10)
+
+        async def run():
+            for i in range(5):
+                await buffer.put(_event(i))
+            await buffer.stop()
+
+        asyncio.run(run())
+        assert sum(_batch_sizes(service)) == 5
+        assert buffer.get_status()["queued"] == 0
+
+    def test_stop_during_flush_interval_writes_coalescing_batch(self):
+        service = _make_service()
+        buffer = AnalyticsEventBuffer(service, batch_size=100, flush_interval=10)
+
+        async def run():
+            buffer.start()
+            for i in range(3):
+                await buffer.put(_event(i))
+            await asyncio.sleep(0.05)
+            await buffer.stop()
+
+        asyncio.run(run())
+        assert sum(_batch_sizes(service)) == 3
+        assert buffer.get_status()["flushed"] == 3
+
+    def test_failed_flush_is_counted(self):
+        service = MagicMock()
+        service.track_events = AsyncMock(side_effect=RuntimeError("db down"))
+        buffer = AnalyticsEventBuffer(service)
+
+        async def run():
+            await buffer.put(_event())
+            await buffer.stop()
+
+        asyncio.run(run())
+        assert buffer.get_status()["failed"] == 1
+
+
+class TestOverflow:
+    def test_drop_policy_sheds_when_full(self):
+        buffer = AnalyticsEventBuffer(_make_service(), max_events=2)
+
+        async def run():
+            return [await buffer.put(_event(i)) for i in range(3)]
+
+        assert asyncio.run(run()) == [True, True, False]
+        assert buffer.get_status()["dropped"] == 1
+
+    def test_block_policy_waits_for_space(self):
+        service = _make_service()
+        buffer = AnalyticsEventBuffer(
+            service, max_events=1, batch_size=1, overflow="block"
+        )
+
+        async def run():
+            buffer.start()
+            results = await asyncio.gather(*(buffer.put(_event(i)) for i in range(3)))
+            await buffer.stop()
+            return results
+
+        assert asyncio.run(run()) == [True, True, True]
+        assert sum(_batch_sizes(service)) == 3
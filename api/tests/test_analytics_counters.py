@@ -0,0 +1,260 @@
+"""Tests for the Redis live usage counters and their flusher."""
+
+from __future__ import annotations
+
+import asyncio
+import uuid
+from datetime import date, datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+from app.repositories.analytics import AnalyticsRepository
+from app.schemas.analytics import (
+    AnalyticsQueryParams,
+    AnalyticsSummaryResponse,
+    DailyStatResponse,
+    UsageEventCreate,
+    UsageStatIncrement,
+)
+from app.services.analytics import SUMMARY_INDEX_SCRIPT, AnalyticsService
+from app.services.analytics_counters import (
+    LIVE_ACK_SCRIPT,
+    LIVE_DRAIN_SCRIPT,
+    LIVE_INCR_SCRIPT,
+    AnalyticsCounterFlusher,
+    LiveUsageCounters,
+)
+
+_USER = uuid.uuid4()
+_HOUR = datetime(2024, 6, 1, 12, 0, tzinfo=timezone.utc)
+_HOUR_TS = int(_HOUR.timestamp())
+
+
+def _make_redis(run_script=None):
+    redis = MagicMock()
+    redis.run_script = run_script or AsyncMock(return_value=1)
+    redis.get = AsyncMock(return_value=None)
+    redis.client.smembers = AsyncMock(return_value={str(_USER).encode()})
+    return redis
+
+
+def _flat(fields: dict[str, int]) -> list[bytes]:
+    flat: list[bytes] = []
+    for field, value in fields.items():
+        flat += [field.encode(), str(value).encode()]
+    return flat
+
+
+_PENDING_FIELDS = {
+    f"{_HOUR_TS}:e": 3,
+    f"{_HOUR_TS}:t": 30,
+    f"{_HOUR_TS}:c:completion": 2,
+    f"{_HOUR_TS}:c:tool:call": 1,
+    f"{_HOUR_TS}:k:completion": 30,
+}
+
+
+class TestLiveUsageCounters:
+    def test_add_sends_one_script_call(self):
+        redis = _make_redis()
+        increment = UsageStatIncrement(
+            user_id=_USER,
+            hour=_HOUR.replace(minute=42),
+            total_events=2,
+            total_tokens=15,
+            events_by_type={"completion": 2},
+            tokens_by_type={"completion": 15},
+        )
+
+        asyncio.run(LiveUsageCounters(redis).add(increment))
+
+        name, keys, args = redis.run_script.call_args[0]
+        assert name == LIVE_INCR_SCRIPT
+        assert keys == [f"analytics:live:{_USER}", "analytics:live:dirty"]
+        assert args == [
+            str(_USER),
+            f"{_HOUR_TS}:e",
+            2,
+            f"{_HOUR_TS}:t",
+            15,
+            f"{_HOUR_TS}:c:completion",
+            2,
+            f"{_HOUR_TS}:k:completion",
+            15,
+        ]
+
+    def test_drain_folds_fields_per_hour(self):
+        redis = _make_redis(AsyncMock(return_value=_flat(_PENDING_FIELDS)))
+
+        (inc,) = asyncio.run(LiveUsageCounters(redis).drain(_USER, "owner"))
+
+        assert redis.run_script.call_args[0][1][2] == (
+            f"analytics:live:{_USER}:flush_lease"
+        )
+        assert redis.run_script.call_args[0][2][0] == "owner"
+        assert inc.hour == _HOUR
+        assert (inc.total_events, inc.total_tokens) == (3, 30)
+        assert inc.events_by_type == {"completion": 2, "tool:call": 1}
+        assert inc.tokens_by_type == {"completion": 30}
+
+    def test_read_retries_when_a_flush_commits_meanwhile(self):
+        redis = _make_redis(
+            AsyncMock(return_value=[_flat(_PENDING_FIELDS), [], 4])
+        )
+        redis.get = AsyncMock(side_effect=["5", "4"])
+        read = AsyncMock(return_value="rows")
+
+        result, pending = asyncio.run(
+            LiveUsageCounters(redis).read_with_pending(_USER, read)
+        )
+
+        assert result == "rows"
+        assert read.await_count == 2
+        assert pending[0].total_events == 3
+
+
+class TestAnalyticsCounterFlusher:
+    def test_flush_writes_then_acknowledges(self):
+        redis = _make_redis(
+            AsyncMock(side_effect=[_flat(_PENDING_FIELDS), 1])
+        )
+        repo = MagicMock()
+        repo.upsert_daily_stats_batch = AsyncMock()
+
+        flusher = AnalyticsCounterFlusher(LiveUsageCounters(redis), repo)
+        asyncio.run(flusher.flush())
+
+        (increments,) = repo.upsert_daily_stats_batch.call_args[0]
+        assert increments[0].total_events == 3
+        drain_call, ack_call = redis.run_script.await_args_list
+        assert ack_call.args[0] == LIVE_ACK_SCRIPT
+        # The acknowledgement carries the token the deltas were drained with
+        assert ack_call.args[2][1] == drain_call.args[2][0]
+        assert flusher.get_status() == {"flushed_users": 1, "failed_users": 0}
+
+    def test_user_leased_to_another_flusher_is_skipped(self):
+        redis = _make_redis(AsyncMock(return_value=None))
+        repo = MagicMock()
+        repo.upsert_daily_stats_batch = AsyncMock()
+
+        flusher = AnalyticsCounterFlusher(LiveUsageCounters(redis), repo)
+        asyncio.run(flusher.flush())
+
+        repo.upsert_daily_stats_batch.assert_not_awaited()
+        names = [c.args[0] for c in redis.run_script.await_args_list]
+        assert names == [LIVE_DRAIN_SCRIPT]
+        assert flusher.get_status() == {"flushed_users": 0, "failed_users": 0}
+
+    def test_failed_write_keeps_deltas_for_retry(self):
+        redis = _make_redis(AsyncMock(return_value=_flat(_PENDING_FIELDS)))
+        repo = MagicMock()
+        repo.upsert_daily_stats_batch = AsyncMock(side_effect=RuntimeError)
+
+        flusher = AnalyticsCounterFlusher(LiveUsageCounters(redis), repo)
+        asyncio.run(flusher.flush())
+
+        names = [c.args[0] for c in redis.run_script.await_args_list]
+        assert LIVE_ACK_SCRIPT not in names
+        assert flusher.get_status() == {"flushed_users": 0, "failed_users": 1}
+
+
+class TestServiceWithLiveCounters:
+    @staticmethod
+    def _service(db, counters):
+        redis = MagicMock()
+        redis.incr = AsyncMock()
+        redis.run_script = AsyncMock(return_value=[])
+        redis.update_many = AsyncMock(return_value=0)
+        return AnalyticsService(
+            analytics_repo=AnalyticsRepository(db),
+            redis=redis,
+            counters=counters,
+        )
+
+    def test_track_event_skips_postgres_rollups(self):
+        db = MagicMock()
+        db.fetch_one = AsyncMock(
+            return_value={
+                "id": uuid.uuid4(),
+                "user_id": _USER,
+                "event_type": "completion",
+                "tokens_used": 5,
+                "metadata": {},
+                "created_at": _HOUR,
+            }
+        )
+        db.execute = AsyncMock()
+        counters = MagicMock()
+        counters.add = AsyncMock()
+        service = self._service(db, counters)
+
+        asyncio.run(
+            service.track_event(
+                UsageEventCreate(
+                    user_id=_USER, event_type="completion", tokens_used=5
+                )
+            )
+        )
+
+        db.execute.assert_not_awaited()
+        (increment,) = counters.add.call_args[0]
+        assert (increment.total_events, increment.total_tokens) == (1, 5)
+        # Cached summaries are updated in place rather than invalidated
+        service._redis.incr.assert_not_awaited()
+        assert service._redis.run_script.call_args[0][0] == SUMMARY_INDEX_SCRIPT
+        service._redis.update_many.assert_awaited_once()
+
+    def test_summary_includes_pending_deltas(self):
+        stored = AnalyticsSummaryResponse(
+            total_events=10,
+            total_tokens=100,
+            events_by_type={"completion": 10},
+            recent_events=[],
+            daily_stats=[
+                DailyStatResponse(
+                    date=date(2024, 5, 31),
+                    total_events=10,
+                    total_tokens=100,
+                    events_by_type={"completion": 10},
+                )
+            ],
+        )
+        pending = [
+            UsageStatIncrement(
+                user_id=_USER,
+                hour=_HOUR,
+                total_events=3,
+                total_tokens=30,
+                events_by_type={"completion": 2, "embedding": 1},
+            ),
+            # Outside the requested range
+            UsageStatIncrement(
+                user_id=_USER,
+                hour=datetime(2024, 7, 1, tzinfo=timezone.utc),
+                total_events=50,
+            ),
+        ]
+
+        async def read_with_pending(user_id, read):
+            return stored, pending
+
+        counters = MagicMock()
+        counters.read_with_pending = read_with_pending
+        service = self._service(MagicMock(), counters)
+
+        summary = asyncio.run(
+            service.get_user_summary(
+                _USER,
+                AnalyticsQueryParams(
+                    start_date=date(2024, 5, 1), end_date=date(2024, 6, 30)
+                ),
+            )
+        )
+
+        assert (summary.total_events, summary.total_tokens) == (13, 130)
+        assert summary.events_by_type == {"completion": 12, "embedding": 1}
+        assert [d.date for d in summary.daily_stats] == [
+            date(2024, 5, 31),
+            date(2024, 6, 1),
+        ]
+        assert summary.daily_stats[1].total_events == 3
+        assert stored.total_events == 10
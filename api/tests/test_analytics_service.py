@@ -0,0 +1,844 @@
+"""Tests for AnalyticsService write and cache behaviour."""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import io
+import json
+import uuid
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from asyncpg.pgproto import pgproto
+from fastapi import HTTPException
+
+from app.repositories.analytics import _EVENT_COLUMNS, AnalyticsRepository
+from app.schemas.analytics import (
+    AnalyticsQueryParams,
+    AnalyticsSummaryResponse,
+    UsageEventCreate,
+    UsageEventResponse,
+)
+from app.services.analytics import (
+    _SUMMARY_STALE_SECONDS,
+    SUMMARY_INDEX_SCRIPT,
+    SUMMARY_READ_SCRIPT,
+    AnalyticsService,
+    _plan_rollup_months,
+)
+
+_USER_A = uuid.uuid4()
+_USER_B = uuid.uuid4()
+
+
+def _make_db():
+    db = MagicMock()
+    db.copy_records = AsyncMock(return_value="COPY 0")
+    db.execute_many = AsyncMock(return_value=None)
+    db.execute = AsyncMock(return_value="INSERT 0 1")
+    db.fetch_one = AsyncMock(return_value=None)
+    db.fetch_all = AsyncMock(return_value=[])
+    db.in_transaction = False
+
+    @asynccontextmanager
+    async def transaction():
+        db.in_transaction = True
+        try:
+            yield db
+        finally:
+            db.in_transaction = False
+
+    db.transaction = MagicMock(side_effect=transaction)
+    return db
+
+
+def _make_redis():
+    redis = MagicMock()
+    redis.get = AsyncMock(return_value=None)
+    redis.set = AsyncMock(return_value=None)
+    redis.incr = AsyncMock(return_value=1)
+    redis.expire = AsyncMock()
+    redis.update_many = AsyncMock(return_value=0)
+    redis.run_script = AsyncMock(return_value=[])
+    redis.set_many_if_unchanged = AsyncMock(return_value=True)
+    return redis
+
+
+def _service(db=None, redis=None) -> AnalyticsService:
+    return AnalyticsService(
+        analytics_repo=AnalyticsRepository(db or _make_db()),
+        redis=redis or _make_redis(),
+    )
+
+
+class TestTrackEvents:
+    def test_batch_uses_one_copy_and_grouped_upserts(self):
+        db, redis = _make_db(), _make_redis()
+        events = [
+            UsageEventCreate(user_id=_USER_A, event_type="completion", tokens_used=10),
+            UsageEventCreate(user_id=_USER_A, event_type="completion", tokens_used=5),
+            UsageEventCreate(user_id=_USER_A, event_type="embedding"),
+            UsageEventCreate(user_id=_USER_B, event_type="completion", tokens_used=1),
+            UsageEventCreate(event_type="anonymous"),
+        ]
+        in_transaction = []
+        db.copy_records.side_effect = lambda *a, **k: in_transaction.append(
+            db.in_transaction
+        )
+        db.execute_many.side_effect = lambda *a, **k: in_transaction.append(
+            db.in_transaction
+        )
+
+        persisted = asyncio.run(_service(db, redis).track_events(events))
+
+        # The COPY and the rollup upsert commit together.
+        db.transaction.assert_called_once()
+        assert in_transaction == [True, True]
+        assert len(persisted) == 5
+        assert len({e.id for e in persisted}) == 5
+        db.copy_records.assert_awaited_once()
+        table, records = db.copy_records.call_args[0]
+        assert table == "usage_events"
+        assert len(records) == 5
+
+        db.execute_many.assert_awaited_once()
+        rows = db.execute_many.call_args[0][1]
+        by_user = {row[0]: row for row in rows}
+        assert set(by_user) == {_USER_A, _USER_B}
+        _, hour, day, month, total_events, total_tokens, by_type = by_user[
+            _USER_A
+        ]
+        assert (hour.minute, hour.second, hour.microsecond) == (0, 0, 0)
+        assert day == hour.date()
+        assert month == day.replace(day=1)
+        assert (total_events, total_tokens) == (3, 15)
+        assert by_type == {"completion": 2, "embedding": 1}
+
+        # Cached summaries are updated in place, not invalidated.
+        redis.incr.assert_not_awaited()
+        marked = {c.args[1][0] for c in redis.run_script.await_args_list}
+        assert marked == {
+            f"analytics:writes:{_USER_A}",
+            f"analytics:writes:{_USER_B}",
+        }
+
+    def test_empty_batch_is_noop(self):
+        db = _make_db()
+        assert asyncio.run(_service(db).track_events([])) == []
+        db.copy_records.assert_not_called()
+
+
+def _event_rows(count: int, driver_uuids: bool = False) -> list[dict]:
+    """Event rows; *driver_uuids* uses asyncpg's UUID type, as real rows do."""
+    make_uuid = _driver_uuid if driver_uuids else (lambda u: u)
+    newest = datetime(2024, 6, 1, 12, 0, tzinfo=timezone.utc)
+    return [
+        {
+            "id": make_uuid(uuid.uuid4()),
+            "user_id": make_uuid(_USER_A),
+            "event_type": "completion",
+            "metadata": {},
+            "created_at": newest - timedelta(minutes=i),
+        }
+        for i in range(count)
+    ]
+
+
+def _driver_uuid(value: uuid.UUID) -> uuid.UUID:
+    return pgproto.UUID(str(value))
+
+
+def _as_records(rows: list[dict]) -> list[tuple]:
+    """Rows as the driver returns them: values in SELECT column order."""
+    return [tuple(row.get(c) for c in _EVENT_COLUMNS) for row in rows]
+
+
+class TestGetUserEvents:
+    def test_full_page_returns_cursor_of_last_item(self):
+        db = _make_db()
+        rows = _event_rows(3)
+        db.fetch_records = AsyncMock(return_value=_as_records(rows))
+
+        page = asyncio.run(
+            _service(db).get_user_events(_USER_A, AnalyticsQueryParams(limit=2))
+        )
+
+        assert [e.id for e in page.items] == [rows[0]["id"], rows[1]["id"]]
+        assert page.next_cursor is not None
+        # limit + 1 rows are requested to detect a following page
+        assert db.fetch_records.call_args[0][-1] == 3
+        assert isinstance(page.items[0], UsageEventResponse)
+
+        db.fetch_records = AsyncMock(return_value=_as_records(rows[2:]))
+        asyncio.run(
+            _service(db).get_user_events(
+                _USER_A, AnalyticsQueryParams(limit=2, cursor=page.next_cursor)
+            )
+        )
+        query, *args = db.fetch_records.call_args[0]
+        assert "(created_at, id) <" in query
+        assert (rows[1]["created_at"], rows[1]["id"]) == tuple(args[-3:-1])
+
+    def test_last_page_has_no_cursor(self):
+        db = _make_db()
+        db.fetch_records = AsyncMock(return_value=_as_records(_event_rows(2)))
+
+        page = asyncio.run(
+            _service(db).get_user_events(_USER_A, AnalyticsQueryParams(limit=2))
+        )
+
+        assert len(page.items) == 2
+        assert page.next_cursor is None
+
+    def test_json_page_matches_the_model_page(self):
+        db = _make_db()
+        db.fetch_records = AsyncMock(return_value=_as_records(_event_rows(3)))
+        service = _service(db)
+        params = AnalyticsQueryParams(limit=2)
+
+        data = asyncio.run(service.get_user_events_json(_USER_A, params))
+        page = asyncio.run(service.get_user_events(_USER_A, params))
+
+        assert json.loads(data) == json.loads(page.model_dump_json())
+
+    def test_records_with_driver_uuids_validate_and_paginate(self):
+        rows = _event_rows(3, driver_uuids=True)
+        db = _make_db()
+        db.fetch_records = AsyncMock(return_value=_as_records(rows))
+        service = _service(db)
+
+        page = asyncio.run(
+            service.get_user_events(_USER_A, AnalyticsQueryParams(limit=2))
+        )
+
+        assert [e.id for e in page.items] == [rows[0]["id"], rows[1]["id"]]
+        assert json.loads(page.model_dump_json())["items"][0]["id"] == str(
+            rows[0]["id"]
+        )
+        asyncio.run(
+            service.get_user_events(
+                _USER_A, AnalyticsQueryParams(limit=2, cursor=page.next_cursor)
+            )
+        )
+        assert db.fetch_records.call_args[0][-2] == rows[1]["id"]
+
+    def test_json_page_serialises_driver_uuids(self):
+        rows = _event_rows(2, driver_uuids=True)
+        db = _make_db()
+        db.fetch_records = AsyncMock(return_value=_as_records(rows))
+
+        data = asyncio.run(
+            _service(db).get_user_events_json(
+                _USER_A, AnalyticsQueryParams(limit=5)
+            )
+        )
+
+        items = json.loads(data)["items"]
+        assert [i["id"] for i in items] == [str(r["id"]) for r in rows]
+        assert items[0]["user_id"] == str(_USER_A)
+
+    @pytest.mark.parametrize("cursor", ["not-a-cursor", "!!", "MjAyNHxub3BlCg"])
+    def test_malformed_cursor_is_rejected(self, cursor):
+        params = AnalyticsQueryParams(cursor=cursor)
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(_service().get_user_events(_USER_A, params))
+        assert exc.value.status_code == 400
+
+
+class TestGetSummary:
+    def test_summary_is_one_statement(self):
+        db = _make_db()
+        event_id = uuid.uuid4()
+        db.fetch_one = AsyncMock(
+            return_value={
+                "total_events": 3,
+                "total_tokens": 30,
+                "events_by_type": {"completion": 2, "embedding": 1},
+                "daily_stats": [
+                    {
+                        "date": "2024-06-01",
+                        "total_events": 3,
+                        "total_tokens": 30,
+                        "events_by_type": {"completion": 2},
+                    }
+                ],
+                "recent_events": [
+                    {
+                        "id": str(event_id),
+                        "user_id": str(_USER_A),
+                        "event_type": "completion",
+                        "provider": None,
+                        "model": None,
+                        "tokens_used": 10,
+                        "latency_ms": None,
+                        "metadata": {},
+                        "created_at": "2024-06-01T12:00:00+00:00",
+                    }
+                ],
+            }
+        )
+
+        summary = asyncio.run(
+            _service(db).get_user_summary(
+                _USER_A,
+                AnalyticsQueryParams(
+                    start_date=date(2024, 6, 1), end_date=date(2024, 6, 30)
+                ),
+            )
+        )
+
+        db.fetch_one.assert_awaited_once()
+        # Summaries are cached, so they are never read from a lagging replica.
+        assert db.fetch_one.call_args.kwargs == {}
+        db.fetch_all.assert_not_awaited()
+        assert (summary.total_events, summary.total_tokens) == (3, 30)
+        assert summary.events_by_type == {"completion": 2, "embedding": 1}
+        assert summary.daily_stats[0].date == date(2024, 6, 1)
+        assert summary.recent_events[0].id == event_id
+        assert summary.recent_events[0].created_at.tzinfo is not None
+
+    def test_summary_without_data_is_empty(self):
+        db = _make_db()
+        db.fetch_one = AsyncMock(
+            return_value={
+                "total_events": 0,
+                "total_tokens": 0,
+                "events_by_type": None,
+                "daily_stats": None,
+                "recent_events": None,
+            }
+        )
+
+        summary = asyncio.run(
+            _service(db).get_user_summary(_USER_A, AnalyticsQueryParams())
+        )
+
+        assert summary.total_events == 0
+        assert summary.events_by_type == {}
+        assert summary.daily_stats == []
+        assert summary.recent_events == []
+
+
+class TestExportEvents:
+    @staticmethod
+    def _db_streaming(rows: list[dict]):
+        db = _make_db()
+        calls = []
+
+        async def iterate(query, *args, prefetch=1000, read_only=False):
+            calls.append((query, args, read_only))
+            for row in rows:
+                yield row
+
+        db.iterate = iterate
+        return db, calls
+
+    @staticmethod
+    def _collect(service, fmt, params=None) -> list[str]:
+        async def run():
+            return [
+                chunk
+                async for chunk in service.export_events(
+                    _USER_A, params or AnalyticsQueryParams(), fmt
+                )
+            ]
+
+        return asyncio.run(run())
+
+    def test_ndjson_one_object_per_line(self):
+        rows = _event_rows(3)
+        rows[0]["metadata"] = {"k": "v"}
+        db, calls = self._db_streaming(rows)
+
+        chunks = self._collect(_service(db), "ndjson")
+
+        lines = "".join(chunks).splitlines()
+        assert len(lines) == 3
+        first = json.loads(lines[0])
+        assert first["id"] == str(rows[0]["id"])
+        assert first["metadata"] == {"k": "v"}
+        assert first["created_at"] == rows[0]["created_at"].isoformat()
+        query, args, read_only = calls[0]
+        assert "ORDER  BY created_at, id" in query
+        assert args[0] == _USER_A
+        assert read_only
+
+    def test_exports_rows_with_driver_uuids(self):
+        rows = _event_rows(2, driver_uuids=True)
+        db, _ = self._db_streaming(rows)
+
+        ndjson = "".join(self._collect(_service(db), "ndjson"))
+        records = list(
+            csv.reader(io.StringIO("".join(self._collect(_service(db), "csv"))))
+        )
+
+        first = json.loads(ndjson.splitlines()[0])
+        assert first["id"] == str(rows[0]["id"])
+        assert first["user_id"] == str(_USER_A)
+        assert records[1][0] == str(rows[0]["id"])
+
+    def test_csv_has_header_and_rows(self):
+        db, _ = self._db_streaming(_event_rows(2))
+
+        chunks = self._collect(_service(db), "csv")
+
+        records = list(csv.reader(io.StringIO("".join(chunks))))
+        assert records[0][0] == "id"
+        assert records[0][-1] == "created_at"
+        assert len(records) == 3
+        assert records[1][7] == "{}"
+
+    def test_rows_are_serialised_in_chunks(self):
+        db, _ = self._db_streaming(_event_rows(1201))
+
+        chunks = self._collect(_service(db), "ndjson")
+
+        assert [c.count("\n") for c in chunks] == [500, 500, 201]
+
+    def test_event_type_filter_is_applied(self):
+        db, calls = self._db_streaming([])
+
+        chunks = self._collect(
+            _service(db),
+            "ndjson",
+            AnalyticsQueryParams(event_type="embedding"),
+        )
+
+        assert chunks == []
+        query, args, _ = calls[0]
+        assert "event_type = $4" in query
+        assert args[-1] == "embedding"
+
+
+class TestRollupPlanner:
+    @pytest.mark.parametrize(
+        ("start", "end", "expected"),
+        [
+            # Whole year: twelve months, no edge days
+            ("2024-01-01", "2024-12-31", ("2024-01-01", "2024-12-01")),
+            # Edge days on both sides
+            ("2024-01-15", "2024-04-10", ("2024-02-01", "2024-03-01")),
+            # Range ending on the last day of February (leap year)
+            ("2024-01-02", "2024-02-29", ("2024-02-01", "2024-02-01")),
+            # Crossing a year boundary
+            ("2023-11-20", "2024-02-05", ("2023-12-01", "2024-01-01")),
+            # No whole month inside the range
+            ("2024-01-10", "2024-02-20", None),
+            ("2024-03-01", "2024-03-30", None),
+        ],
+    )
+    def test_picks_whole_months(self, start, end, expected):
+        plan = _plan_rollup_months(date.fromisoformat(start), date.fromisoformat(end))
+        if expected is None:
+            assert plan is None
+        else:
+            assert plan == tuple(date.fromisoformat(m) for m in expected)
+
+    def test_summary_passes_month_bounds_to_query(self):
+        db = _make_db()
+        asyncio.run(
+            _service(db).get_user_summary(
+                _USER_A,
+                AnalyticsQueryParams(
+                    start_date=date(2024, 1, 15), end_date=date(2024, 4, 10)
+                ),
+            )
+        )
+
+        query, *args = db.fetch_one.call_args[0]
+        assert "monthly_usage_stats" in query
+        assert args[4:] == [date(2024, 2, 1), date(2024, 3, 1), date(2024, 3, 31)]
+
+    def test_summary_without_whole_month_reads_daily_only(self):
+        db = _make_db()
+        asyncio.run(
+            _service(db).get_user_summary(
+                _USER_A,
+                AnalyticsQueryParams(
+                    start_date=date(2024, 1, 10), end_date=date(2024, 2, 20)
+                ),
+            )
+        )
+
+        assert db.fetch_one.call_args[0][5:] == (None, None, None)
+
+
+class TestTrackEvent:
+    def test_single_event_updates_all_tiers(self):
+        db = _make_db()
+        db.fetch_one = AsyncMock(return_value=_event_rows(1)[0])
+
+        asyncio.run(
+            _service(db).track_event(
+                UsageEventCreate(
+                    user_id=_USER_A, event_type="completion", tokens_used=7
+                )
+            )
+        )
+
+        query, *args = db.execute.call_args[0]
+        for table in ("hourly_usage_stats", "daily_usage_stats", "monthly_usage_stats"):
+            assert table in query
+        assert args[1] == datetime(2024, 6, 1, 12, 0, tzinfo=timezone.utc)
+        assert args[2:] == [
+            date(2024, 6, 1),
+            date(2024, 6, 1),
+            1,
+            7,
+            {"completion": 1},
+        ]
+
+
+class TestColumnarStatsStorage:
+    @staticmethod
+    def _columnar_service(db) -> AnalyticsService:
+        return AnalyticsService(
+            analytics_repo=AnalyticsRepository(db, stats_storage="columnar"),
+            redis=_make_redis(),
+        )
+
+    def test_batch_writes_per_type_counters(self):
+        db = _make_db()
+        events = [
+            UsageEventCreate(user_id=_USER_A, event_type="completion", tokens_used=10),
+            UsageEventCreate(user_id=_USER_A, event_type="completion", tokens_used=5),
+            UsageEventCreate(user_id=_USER_A, event_type="embedding", tokens_used=2),
+        ]
+
+        asyncio.run(self._columnar_service(db).track_events(events))
+
+        query, rows = db.execute_many.call_args[0]
+        for tier in ("hourly", "daily", "monthly"):
+            assert f"INSERT INTO {tier}_usage_type_stats" in query
+        assert "usage_counts_merge" not in query
+        (row,) = rows
+        assert row[4] == {"completion": 2, "embedding": 1}
+        assert row[5] == {"completion": 15, "embedding": 2}
+
+    def test_jsonb_storage_omits_per_type_tokens(self):
+        db = _make_db()
+        asyncio.run(
+            _service(db).track_events(
+                [UsageEventCreate(user_id=_USER_A, event_type="completion")]
+            )
+        )
+
+        query, rows = db.execute_many.call_args[0]
+        assert "$8" not in query
+        assert len(rows[0]) == 7
+
+    def test_reads_use_rollup_view(self):
+        db = _make_db()
+        service = self._columnar_service(db)
+        params = AnalyticsQueryParams(
+            start_date=date(2024, 6, 1), end_date=date(2024, 6, 30)
+        )
+
+        asyncio.run(service.get_daily_stats_only(_USER_A, params))
+        assert "FROM   daily_usage_type_rollup" in db.fetch_all.call_args[0][0]
+        asyncio.run(service.get_hourly_stats_only(_USER_A, params))
+        assert "FROM   hourly_usage_type_rollup" in db.fetch_all.call_args[0][0]
+
+        asyncio.run(service.get_user_summary(_USER_A, params))
+        summary_query = db.fetch_one.call_args[0][0]
+        assert "FROM   daily_usage_type_rollup" in summary_query
+        assert "FROM   monthly_usage_type_rollup" in summary_query
+
+
+class TestCachedSummary:
+    _PARAMS = AnalyticsQueryParams(
+        start_date=date(2024, 6, 1), end_date=date(2024, 6, 30)
+    )
+    _KEY = f"analytics:summary:{_USER_A}:{{}}:2024-06-01:2024-06-30:50"
+
+    @staticmethod
+    def _summary(total_events: int) -> AnalyticsSummaryResponse:
+        return AnalyticsSummaryResponse(
+            total_events=total_events,
+            total_tokens=0,
+            events_by_type={},
+            recent_events=[],
+            daily_stats=[],
+        )
+
+    @staticmethod
+    def _cache(store: dict, key: str, summary, fresh_for: float) -> None:
+        """Cache *summary* under *key* as stored ``fresh_for`` seconds ago."""
+        store[key] = summary
+        store[("pttl", key)] = int((fresh_for + _SUMMARY_STALE_SECONDS) * 1000)
+
+    @staticmethod
+    def _redis(store: dict):
+        redis = _make_redis()
+        redis.get = AsyncMock(side_effect=lambda key: store.get(key))
+        redis.get_value = AsyncMock(
+            side_effect=lambda key, model_type=None: store.get(key)
+        )
+
+        async def set_(key, value, expire_seconds=None):
+            store[key] = value
+
+        async def set_if_absent(key, value, expire_ms):
+            return store.setdefault(key, value) == value
+
+        async def incr(key):
+            store[key] = str(int(store.get(key, 0)) + 1)
+            return int(store[key])
+
+        async def set_many_if_unchanged(
+            values, expire_seconds, guard_key, guard_value, index=None
+        ):
+            if store.get(guard_key) != guard_value:
+                return False
+            store.update(values)
+            store.update({("pttl", k): expire_seconds * 1000 for k in values})
+            if index is not None:
+                store.setdefault(index[0], {}).update(index[1])
+            return True
+
+        async def update_many(keys, fn, attempts=5, model_type=None):
+            updates = {
+                key: fn(key, store[key]) for key in keys if key in store
+            }
+            updates = {k: v for k, v in updates.items() if v is not None}
+            store.update(updates)
+            return len(updates)
+
+        redis.set = AsyncMock(side_effect=set_)
+        redis.set_if_absent = AsyncMock(side_effect=set_if_absent)
+        redis.incr = AsyncMock(side_effect=incr)
+        redis.set_many_if_unchanged = AsyncMock(
+            side_effect=set_many_if_unchanged
+        )
+        redis.update_many = AsyncMock(side_effect=update_many)
+
+        async def run_script(name, keys, args):
+            if name == SUMMARY_INDEX_SCRIPT:
+                await incr(keys[0])
+                return list(store.get(keys[1], {}))
+            if name != SUMMARY_READ_SCRIPT:
+                return 1
+            version = int(store.get(keys[0], 0))
+            prefix, suffix = args
+            key = f"{prefix}{version}{suffix}"
+            return [
+                version,
+                store.get(key),
+                store.get(("pttl", key), -2),
+                store.get(f"{prefix}latest{suffix}"),
+            ]
+
+        redis.run_script = AsyncMock(side_effect=run_script)
+        redis.decode_value = lambda data, model_type=None: data
+        redis.decode_json = MagicMock(
+            side_effect=lambda data: data.model_dump_json().encode()
+        )
+        return redis
+
+    @staticmethod
+    def _db(total_events: int = 7, delay: float = 0.0):
+        db = _make_db()
+
+        async def fetch_one(*args, read_only=False):
+            await asyncio.sleep(delay)
+            return {
+                "total_events": total_events,
+                "total_tokens": 0,
+                "events_by_type": None,
+                "daily_stats": None,
+                "recent_events": None,
+            }
+
+        db.fetch_one = AsyncMock(side_effect=fetch_one)
+        return db
+
+    def test_fresh_entry_skips_database(self):
+        store: dict = {}
+        self._cache(store, self._KEY.format(0), self._summary(3), fresh_for=60)
+        db = self._db()
+        redis = self._redis(store)
+
+        summary = asyncio.run(
+            _service(db, redis).get_cached_summary(_USER_A, self._PARAMS)
+        )
+
+        assert summary.total_events == 3
+        db.fetch_one.assert_not_awaited()
+        # Version and payload come back from a single script call.
+        redis.run_script.assert_awaited_once()
+        redis.get.assert_not_awaited()
+        redis.get_value.assert_not_awaited()
+
+    def test_concurrent_misses_share_one_read(self):
+        store: dict = {}
+        db = self._db(delay=0.01)
+        redis = self._redis(store)
+
+        async def run():
+            return await asyncio.gather(
+                *(
+                    _service(db, redis).get_cached_summary(_USER_A, self._PARAMS)
+                    for _ in range(10)
+                )
+            )
+
+        summaries = asyncio.run(run())
+
+        assert {s.total_events for s in summaries} == {7}
+        db.fetch_one.assert_awaited_once()
+        assert store[self._KEY.format("latest")] == 0
+        # One read per request plus one lock release.
+        assert redis.run_script.await_count == 11
+
+    def test_expired_entry_is_served_while_refreshing(self):
+        store: dict = {}
+        self._cache(store, self._KEY.format(0), self._summary(3), fresh_for=-1)
+        db = self._db()
+
+        async def run():
+            service = _service(db, self._redis(store))
+            summary = await service.get_cached_summary(_USER_A, self._PARAMS)
+            await asyncio.sleep(0.01)
+            return summary
+
+        summary = asyncio.run(run())
+
+        assert summary.total_events == 3
+        db.fetch_one.assert_awaited_once()
+        assert store[self._KEY.format(0)].total_events == 7
+
+    def test_previous_version_is_served_after_a_bump(self):
+        store = {
+            "analytics:version:" + str(_USER_A): "2",
+            self._KEY.format(1): self._summary(3),
+            self._KEY.format("latest"): 1,
+        }
+        db = self._db()
+
+        async def run():
+            service = _service(db, self._redis(store))
+            summary = await service.get_cached_summary(_USER_A, self._PARAMS)
+            await asyncio.sleep(0.01)
+            return summary
+
+        summary = asyncio.run(run())
+
+        assert summary.total_events == 3
+        assert self._KEY.format(2) in store
+        assert store[self._KEY.format("latest")] == 2
+
+    def test_waits_for_replica_holding_the_lock(self):
+        store = {self._KEY.format(0) + ":lock": "other-replica"}
+        db = self._db()
+        redis = self._redis(store)
+
+        async def run():
+            async def other_replica():
+                await asyncio.sleep(0.02)
+                self._cache(
+                    store, self._KEY.format(0), self._summary(5), fresh_for=60
+                )
+
+            _, summary = await asyncio.gather(
+                other_replica(),
+                _service(db, redis).get_cached_summary(_USER_A, self._PARAMS),
+            )
+            return summary
+
+        summary = asyncio.run(run())
+
+        assert summary.total_events == 5
+        db.fetch_one.assert_not_awaited()
+        assert [c.args[0] for c in redis.run_script.await_args_list] == [
+            SUMMARY_READ_SCRIPT
+        ]
+
+    def test_tracked_event_is_applied_to_cached_summary(self):
+        store: dict = {}
+        db = self._db(total_events=7)
+        event_id = uuid.uuid4()
+        event_row = {
+            "id": event_id,
+            "user_id": _USER_A,
+            "event_type": "completion",
+            "tokens_used": 12,
+            "metadata": {},
+            "created_at": datetime(2024, 6, 15, 9, tzinfo=timezone.utc),
+        }
+        data = UsageEventCreate(
+            user_id=_USER_A, event_type="completion", tokens_used=12
+        )
+
+        redis = self._redis(store)
+
+        async def run():
+            service = _service(db, redis)
+            await service.get_cached_summary(_USER_A, self._PARAMS)
+            db.fetch_one = AsyncMock(return_value=event_row)
+            await service.track_event(data)
+            # A replayed event is recognised through the recent events list.
+            await service.track_event(data)
+            return await service.get_cached_summary(_USER_A, self._PARAMS)
+
+        summary = asyncio.run(run())
+
+        assert (summary.total_events, summary.total_tokens) == (8, 12)
+        assert summary.events_by_type == {"completion": 1}
+        assert [(d.date, d.total_events) for d in summary.daily_stats] == [
+            (date(2024, 6, 15), 1)
+        ]
+        assert [e.id for e in summary.recent_events] == [event_id]
+        assert f"analytics:version:{_USER_A}" not in store
+        # One script call and one transaction per tracked event.
+        assert redis.update_many.await_count == 2
+
+    def test_summary_read_during_a_write_is_not_cached(self):
+        store: dict = {}
+        redis = self._redis(store)
+        db = self._db()
+        fetch_one = db.fetch_one.side_effect
+
+        async def fetch_during_write(*args, **kwargs):
+            store[f"analytics:writes:{_USER_A}"] = "1"
+            return await fetch_one(*args, **kwargs)
+
+        db.fetch_one = AsyncMock(side_effect=fetch_during_write)
+
+        summary = asyncio.run(
+            _service(db, redis).get_cached_summary(_USER_A, self._PARAMS)
+        )
+
+        assert summary.total_events == 7
+        assert self._KEY.format(0) not in store
+        # The index is written in the same guarded transaction.
+        assert f"analytics:summary:{_USER_A}:index" not in store
+
+    def test_cached_summary_json_is_served_without_parsing(self):
+        store: dict = {}
+        self._cache(store, self._KEY.format(0), self._summary(3), fresh_for=60)
+        db = self._db()
+        redis = self._redis(store)
+
+        data = asyncio.run(
+            _service(db, redis).get_cached_summary_json(_USER_A, self._PARAMS)
+        )
+
+        assert json.loads(data)["total_events"] == 3
+        redis.decode_json.assert_called_once_with(store[self._KEY.format(0)])
+        db.fetch_one.assert_not_awaited()
+
+    def test_summary_json_on_a_miss_is_read_and_cached(self):
+        store: dict = {}
+        db = self._db()
+        redis = self._redis(store)
+
+        data = asyncio.run(
+            _service(db, redis).get_cached_summary_json(_USER_A, self._PARAMS)
+        )
+
+        assert json.loads(data)["total_events"] == 7
+        assert store[self._KEY.format(0)].total_events == 7
+        redis.decode_json.assert_not_called()
@@ -0,0 +1,132 @@
+"""Tests for refresh-token rotation and the password reset flow."""
+
+from __future__ import annotations
+
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import HTTPException
+
+from app.repositories.password_reset import PasswordResetRepository
+from app.repositories.refresh_token import RefreshTokenRepository
+from app.repositories.user import UserRepository
+from app.security.jwt import JWTManager
+from app.services.auth import AuthService
+
+_USER_ID = str(uuid.uuid4())
+_FAMILY_ID = str(uuid.uuid4())
+_TOKEN_ID = str(uuid.uuid4())
+
+
+def _make_db(stored: dict | None):
+    """A provider whose transactions yield *tx*, which finds *stored*."""
+    tx = MagicMock()
+    tx.fetch_one = AsyncMock(return_value=stored)
+    tx.execute_batch = AsyncMock()
+
+    @asynccontextmanager
+    async def transaction():
+        yield tx
+
+    db = MagicMock()
+    db.transaction = transaction
+    db.execute = AsyncMock()
+    db.execute_batch = AsyncMock()
+    db.fetch_one = AsyncMock(return_value=stored)
+    return db, tx
+
+
+def _service(db, cache=None) -> AuthService:
+    settings = MagicMock()
+    settings.jwt.access_token_expire_minutes = 15
+    pwd = MagicMock()
+    pwd.hash_async = AsyncMock(return_value="new-hash")
+    return AuthService(
+        user_repo=UserRepository(db, cache=cache),
+        token_repo=RefreshTokenRepository(db),
+        reset_repo=PasswordResetRepository(db),
+        oauth_repo=MagicMock(),
+        jwt_manager=JWTManager("test-secret", "HS256", 15, 7),
+        password_manager=pwd,
+        email_provider=MagicMock(),
+        github_provider=MagicMock(),
+        settings=settings,
+    )
+
+
+def _refresh_token() -> str:
+    token, _, _ = JWTManager("test-secret", "HS256", 15, 7).create_refresh_token(
+        _USER_ID, _FAMILY_ID
+    )
+    return token
+
+
+class TestRefreshTokens:
+    def test_rotation_is_one_statement(self):
+        db, _ = _make_db({"rotated": True, "raced": False})
+
+        tokens = asyncio.run(_service(db).refresh_tokens(_refresh_token()))
+
+        assert tokens.refresh_token
+        db.fetch_one.assert_awaited_once()
+        query, old_hash, new_hash, _, family_id, user_id = (
+            db.fetch_one.call_args.args
+        )
+        assert "INSERT INTO refresh_tokens" in query
+        assert old_hash != new_hash
+        assert (family_id, user_id) == (_FAMILY_ID, _USER_ID)
+        db.execute.assert_not_awaited()
+
+    def test_reuse_is_rejected_without_a_second_statement(self):
+        db, _ = _make_db({"rotated": False, "raced": False})
+
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(_service(db).refresh_tokens(_refresh_token()))
+
+        assert exc.value.status_code == 401
+        db.execute.assert_not_awaited()
+
+    def test_reuse_racing_a_rotation_revokes_its_new_token(self):
+        db, _ = _make_db({"rotated": False, "raced": True})
+
+        with pytest.raises(HTTPException):
+            asyncio.run(_service(db).refresh_tokens(_refresh_token()))
+
+        query, family_id = db.execute.call_args.args
+        assert "family_id" in query
+        assert family_id == _FAMILY_ID
+
+
+class TestConfirmPasswordReset:
+    def test_writes_are_one_batch_then_cache_is_invalidated(self):
+        db, tx = _make_db({"id": _TOKEN_ID, "user_id": _USER_ID})
+        cache = MagicMock()
+        cache.invalidate = AsyncMock()
+
+        asyncio.run(
+            _service(db, cache).confirm_password_reset("raw-token", "new-pass")
+        )
+
+        (statements,) = tx.execute_batch.call_args.args
+        assert [s.query.split()[1] for s in statements] == [
+            "users",
+            "password_reset_tokens",
+            "refresh_tokens",
+        ]
+        assert statements[0].args == ("new-hash", _USER_ID)
+        cache.invalidate.assert_awaited_once_with(_USER_ID)
+
+    def test_token_used_concurrently_is_rejected(self):
+        db, tx = _make_db({"id": _TOKEN_ID, "user_id": _USER_ID})
+        tx.fetch_one = AsyncMock(return_value=None)
+
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(
+                _service(db).confirm_password_reset("raw-token", "new-pass")
+            )
+
+        assert exc.value.status_code == 400
+        tx.execute_batch.assert_not_awaited()
@@ -0,0 +1,113 @@
+"""Tests for the Redis cache value codecs."""
+
+from __future__ import annotations
+
+import uuid
+from datetime import date, datetime, timezone
+
+import orjson
+import pytest
+
+from app.providers.cache_codec import (
+    CompressedCodec,
+    JsonCodec,
+    build_cache_codec,
+)
+from app.schemas.analytics import (
+    AnalyticsSummaryResponse,
+    DailyStatResponse,
+    UsageEventResponse,
+)
+
+_SUMMARY = AnalyticsSummaryResponse(
+    total_events=2,
+    total_tokens=30,
+    events_by_type={"completion": 2},
+    recent_events=[
+        UsageEventResponse(
+            id=uuid.uuid4(),
+            user_id=uuid.uuid4(),
+            event_type="completion",
+            provider="openai",
+            model=None,
+            tokens_used=30,
+            latency_ms=None,
+            metadata={"tags": [], "nested": {"a": 1}},
+            created_at=datetime(2024, 6, 1, 12, 30, tzinfo=timezone.utc),
+        )
+    ],
+    daily_stats=[
+        DailyStatResponse(
+            date=date(2024, 6, 1),
+            total_events=2,
+            total_tokens=30,
+            events_by_type={"completion": 2},
+        )
+    ],
+)
+
+
+def _codec(name: str, compression: str = "none", min_size: int = 1024):
+    if name == "msgpack":
+        pytest.importorskip("msgpack")
+    if compression in ("zstd", "lz4"):
+        pytest.importorskip("zstandard" if compression == "zstd" else "lz4")
+    return build_cache_codec(name, compression, min_size)
+
+
+@pytest.mark.parametrize("name", ["json", "orjson", "msgpack"])
+@pytest.mark.parametrize("compression", ["none", "zlib", "zstd", "lz4"])
+def test_models_round_trip(name, compression):
+    codec = _codec(name, compression, min_size=64)
+
+    data = codec.encode_model(_SUMMARY)
+
+    assert codec.decode_model(data, AnalyticsSummaryResponse) == _SUMMARY
+
+
+@pytest.mark.parametrize("name", ["json", "orjson", "msgpack"])
+@pytest.mark.parametrize("compression", ["none", "zlib"])
+def test_decode_json_matches_the_model(name, compression):
+    codec = _codec(name, compression, min_size=64)
+
+    data = codec.decode_json(codec.encode_model(_SUMMARY))
+
+    assert orjson.loads(data) == orjson.loads(_SUMMARY.model_dump_json())
+
+
+def test_json_payload_is_served_as_stored():
+    codec = _codec("orjson")
+    data = codec.encode_model(_SUMMARY)
+
+    assert codec.decode_json(data) is data
+
+
+@pytest.mark.parametrize("name", ["json", "orjson", "msgpack"])
+def test_plain_values_round_trip(name):
+    codec = _codec(name)
+
+    assert codec.decode(codec.encode(42)) == 42
+    assert codec.decode(codec.encode({"a": [1, "b"]})) == {"a": [1, "b"]}
+
+
+def test_compression_only_above_threshold():
+    codec = CompressedCodec(JsonCodec(), "zlib", min_size=1024)
+
+    small = codec.encode_model(_SUMMARY)
+    large = codec.encode("x" * 4096)
+
+    assert small[:1] == b"\x00"
+    assert large[:1] == b"\x01" and len(large) < 100
+    assert codec.decode(large) == "x" * 4096
+
+
+def test_unknown_payload_marker_is_rejected():
+    codec = CompressedCodec(JsonCodec(), "zlib")
+
+    with pytest.raises(ValueError):
+        codec.decode(b"\x07{}")
+
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(ValueError):
+        build_cache_codec("pickle")
@@ -0,0 +1,289 @@
+"""Tests for DatabaseProvider's pool handling, metrics and jsonb codec."""
+
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import asyncpg
+import pytest
+
+from app.providers.base import Statement
+from app.providers.database import (
+    DatabaseProvider,
+    _decode_jsonb,
+    _encode_jsonb,
+)
+
+
+def _provider(size: int = 3, idle: int = 1) -> tuple[DatabaseProvider, MagicMock]:
+    conn = MagicMock()
+    conn.fetchrow = AsyncMock(return_value={"id": 1})
+    pool = MagicMock()
+    pool.acquire = AsyncMock(return_value=conn)
+    pool.release = AsyncMock()
+    pool.get_size.return_value = size
+    pool.get_idle_size.return_value = idle
+    db = DatabaseProvider("postgresql://test", min_size=1, max_size=10)
+    db._pool = pool
+    return db, pool
+
+
+class TestPoolMetrics:
+    def test_queries_record_acquire_waits(self):
+        db, pool = _provider()
+
+        async def run():
+            await db.fetch_one("SELECT 1")
+            await db.fetch_one("SELECT 1")
+
+        asyncio.run(run())
+
+        assert pool.release.await_count == 2
+        status = db.get_status()
+        assert status["acquired"] == 2
+        assert status["waiting"] == 0
+        assert (status["size"], status["in_use"], status["idle"]) == (3, 2, 1)
+        assert status["max_size"] == 10
+        assert status["acquire_wait_max_ms"] >= status["acquire_wait_avg_ms"]
+
+    def test_waiting_counts_pending_acquires(self):
+        db, pool = _provider()
+
+        async def run():
+            release = asyncio.Event()
+
+            async def slow_acquire():
+                await release.wait()
+                return MagicMock(fetchrow=AsyncMock(return_value=None))
+
+            pool.acquire = slow_acquire
+            task = asyncio.create_task(db.fetch_one("SELECT 1"))
+            await asyncio.sleep(0)
+            waiting = db.get_status()["waiting"]
+            release.set()
+            await task
+            return waiting
+
+        assert asyncio.run(run()) == 1
+        assert db.get_status()["waiting"] == 0
+
+    def test_not_connected_raises(self):
+        db = DatabaseProvider("postgresql://test")
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(db.execute("SELECT 1"))
+        assert db.get_status()["size"] == 0
+
+
+class TestJsonbCodec:
+    def test_round_trip(self):
+        value = {"completion": 2, "nested": {"tags": ["a", "b"]}, "none": None}
+
+        data = _encode_jsonb(value)
+
+        assert data[:1] == b"\x01"
+        assert _decode_jsonb(data) == value
+
+    def test_init_hook_runs_after_codec(self):
+        calls = []
+        conn = MagicMock()
+        conn.set_type_codec = AsyncMock(
+            side_effect=lambda *a, **k: calls.append("codec")
+        )
+
+        async def hook(c):
+            calls.append(("hook", c))
+
+        db = DatabaseProvider("postgresql://test", init=hook)
+        asyncio.run(db._init_connection(conn))
+
+        assert calls == ["codec", ("hook", conn)]
+        assert conn.set_type_codec.call_args.kwargs["format"] == "binary"
+
+
+def _pool(fetchrow=None, fetchval=None) -> MagicMock:
+    conn = MagicMock()
+    conn.fetchrow = AsyncMock(side_effect=fetchrow, return_value={"pool": "x"})
+    conn.fetchval = AsyncMock(return_value=fetchval)
+    pool = MagicMock()
+    pool.acquire = AsyncMock(return_value=conn)
+    pool.release = AsyncMock()
+    pool.get_size.return_value = 1
+    pool.get_idle_size.return_value = 1
+    pool.conn = conn
+    return pool
+
+
+def _replicated(*replica_pools: MagicMock, **kwargs) -> DatabaseProvider:
+    db = DatabaseProvider(
+        "postgresql://primary",
+        replica_dsns=[f"postgresql://replica{i}" for i in range(len(replica_pools))],
+        **kwargs,
+    )
+    db._pool = _pool()
+    for replica, pool in zip(db._replicas, replica_pools):
+        replica.pool = pool
+        replica.healthy = True
+    return db
+
+
+class TestReadReplicas:
+    def test_read_only_queries_rotate_across_replicas(self):
+        first, second = _pool(), _pool()
+        db = _replicated(first, second)
+
+        async def run():
+            for _ in range(4):
+                await db.fetch_one("SELECT 1", read_only=True)
+            await db.fetch_one("SELECT 1")
+
+        asyncio.run(run())
+
+        assert first.conn.fetchrow.await_count == 2
+        assert second.conn.fetchrow.await_count == 2
+        assert db._pool.conn.fetchrow.await_count == 1
+
+    def test_writes_never_use_replicas(self):
+        replica = _pool()
+        db = _replicated(replica)
+        db._pool.conn.execute = AsyncMock(return_value="INSERT 0 1")
+
+        asyncio.run(db.execute("INSERT INTO t VALUES (1)"))
+
+        replica.acquire.assert_not_awaited()
+
+    def test_failed_replica_falls_back_to_primary(self):
+        replica = _pool(fetchrow=ConnectionResetError())
+        db = _replicated(replica)
+
+        row = asyncio.run(db.fetch_one("SELECT 1", read_only=True))
+
+        assert row == {"pool": "x"}
+        db._pool.conn.fetchrow.assert_awaited_once()
+        assert db._replicas[0].healthy is False
+        # Until it passes a health check the replica is skipped.
+        asyncio.run(db.fetch_one("SELECT 1", read_only=True))
+        replica.conn.fetchrow.assert_awaited_once()
+
+    def test_query_errors_are_not_retried(self):
+        replica = _pool(fetchrow=asyncpg.UndefinedTableError("missing"))
+        db = _replicated(replica)
+
+        with pytest.raises(asyncpg.UndefinedTableError):
+            asyncio.run(db.fetch_one("SELECT 1", read_only=True))
+        assert db._replicas[0].healthy is True
+        db._pool.conn.fetchrow.assert_not_awaited()
+
+    def test_timeouts_do_not_fail_over(self):
+        replica = _pool(fetchrow=TimeoutError())
+        db = _replicated(replica)
+
+        with pytest.raises(TimeoutError):
+            asyncio.run(db.fetch_one("SELECT 1", read_only=True))
+        assert db._replicas[0].healthy is True
+        db._pool.conn.fetchrow.assert_not_awaited()
+
+    def test_health_check_applies_lag_limit(self):
+        current, lagging = _pool(fetchval=0.5), _pool(fetchval=42.0)
+        for pool in (current, lagging):
+            pool.acquire = MagicMock(return_value=_AsyncContext(pool.conn))
+        db = _replicated(current, lagging, replica_max_lag=10.0)
+
+        asyncio.run(db._check_replicas())
+
+        assert [r.healthy for r in db._replicas] == [True, False]
+        replicas = db.get_status()["replicas"]
+        assert [r["lag_seconds"] for r in replicas] == [0.5, 42.0]
+
+    def test_unreachable_replica_is_marked_down(self):
+        db = _replicated(_pool())
+        db._replicas[0].pool = None
+        db._create_pool = AsyncMock(side_effect=OSError("refused"))
+
+        asyncio.run(db._check_replicas())
+
+        assert db._replicas[0].healthy is False
+        assert db._replicas[0].failed_checks == 1
+
+
+class _AsyncContext:
+    def __init__(self, value) -> None:
+        self._value = value
+
+    async def __aenter__(self):
+        return self._value
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+
+class TestTransactionsAndBatches:
+    def test_transaction_pins_one_connection(self):
+        db, pool = _provider()
+        conn = pool.acquire.return_value
+        conn.transaction = MagicMock(return_value=_AsyncContext(None))
+        conn.execute = AsyncMock(return_value="UPDATE 1")
+
+        async def run():
+            async with db.transaction() as tx:
+                await tx.fetch_one("SELECT 1", read_only=True)
+                await tx.execute("UPDATE t SET x = 1")
+
+        asyncio.run(run())
+
+        pool.acquire.assert_awaited_once()
+        pool.release.assert_awaited_once_with(conn)
+        conn.transaction.assert_called_once()
+        conn.fetchrow.assert_awaited_once()
+        conn.execute.assert_awaited_once()
+
+    def test_batch_is_one_statement_with_shifted_placeholders(self):
+        db, pool = _provider()
+        conn = pool.acquire.return_value
+        conn.execute = AsyncMock()
+
+        asyncio.run(
+            db.execute_batch(
+                [
+                    Statement("UPDATE a SET x = $1 WHERE id = $2", (1, 2)),
+                    Statement("DELETE FROM b WHERE id = $1", (3,)),
+                ]
+            )
+        )
+
+        query, *args = conn.execute.call_args.args
+        assert query == (
+            "WITH s0 AS (UPDATE a SET x = $1 WHERE id = $2), "
+            "s1 AS (DELETE FROM b WHERE id = $3) SELECT 1"
+        )
+        assert args == [1, 2, 3]
+
+    @pytest.mark.parametrize(
+        "query",
+        [
+            "WITH old AS (SELECT 1) DELETE FROM b WHERE id = $1",
+            "DELETE FROM b WHERE id = $1;",
+            "UPDATE b SET body = $$ $1 $$ WHERE id = $1",
+            "UPDATE b SET note = 'costs $1' WHERE id = $1",
+        ],
+    )
+    def test_batch_rejects_statements_it_cannot_merge(self, query):
+        db, pool = _provider()
+        conn = pool.acquire.return_value
+        conn.execute = AsyncMock()
+        batch = [Statement("DELETE FROM a WHERE id = $1", (1,)), Statement(query, (2,))]
+
+        with pytest.raises(ValueError):
+            asyncio.run(db.execute_batch(batch))
+        conn.execute.assert_not_awaited()
+
+    def test_single_statement_batch_runs_as_is(self):
+        db, pool = _provider()
+        conn = pool.acquire.return_value
+        conn.execute = AsyncMock()
+
+        asyncio.run(db.execute_batch([Statement("DELETE FROM b WHERE id = $1", (3,))]))
+        asyncio.run(db.execute_batch([]))
+
+        conn.execute.assert_awaited_once_with("DELETE FROM b WHERE id = $1", 3)
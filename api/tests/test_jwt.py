@@ -0,0 +1,107 @@
+"""Tests for JWT decoding and the decoded-payload cache."""
+
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import pytest
+from jose import JWTError, jwt
+
+from app.cache import TTLCache
+from app.security.jwt import JWTManager
+
+_SECRET = "test-secret-key"
+
+
+def _manager(cache=None) -> JWTManager:
+    return JWTManager(_SECRET, "HS256", 15, 7, cache=cache)
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+# ---------------------------------------------------------------------------
+# TTLCache
+# ---------------------------------------------------------------------------
+
+
+class TestTTLCache:
+    def test_hit_and_miss_counters(self):
+        cache: TTLCache[str, int] = TTLCache(maxsize=2)
+        assert cache.get("a") is None
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        assert cache.hits == 1
+        assert cache.misses == 1
+
+    def test_evicts_least_recently_used(self):
+        cache: TTLCache[str, int] = TTLCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_entries_expire(self):
+        clock = _Clock()
+        cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl_seconds=10, clock=clock)
+        cache.set("a", 1)
+        clock.now += 9
+        assert cache.get("a") == 1
+        clock.now += 1
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_non_positive_ttl_is_not_stored(self):
+        cache: TTLCache[str, int] = TTLCache(maxsize=2)
+        cache.set("a", 1, ttl_seconds=0)
+        assert cache.get("a") is None
+
+
+# ---------------------------------------------------------------------------
+# JWTManager payload cache
+# ---------------------------------------------------------------------------
+
+
+class TestDecodeCache:
+    def test_second_decode_served_from_cache(self):
+        cache = TTLCache(maxsize=10)
+        manager = _manager(cache)
+        token = manager.create_access_token("user-1")
+
+        with patch("app.security.jwt.jwt.decode", wraps=jwt.decode) as decode:
+            first = manager.decode_token(token)
+            second = manager.decode_token(token)
+
+        assert first.sub == second.sub == "user-1"
+        assert decode.call_count == 1
+        assert cache.hits == 1
+        assert cache.misses == 1
+
+    def test_invalid_token_is_not_cached(self):
+        cache = TTLCache(maxsize=10)
+        manager = _manager(cache)
+        with pytest.raises(JWTError):
+            manager.decode_token("not-a-jwt")
+        assert len(cache) == 0
+
+    def test_missing_claims_raise_jwt_error(self):
+        token = jwt.encode({"sub": "user-1"}, _SECRET, algorithm="HS256")
+        with pytest.raises(JWTError):
+            _manager().decode_token(token)
+
+    def test_cache_keyed_by_token_digest(self):
+        cache = TTLCache(maxsize=10)
+        manager = _manager(cache)
+        token = manager.create_access_token("user-1")
+        manager.decode_token(token)
+        (key,) = cache._data.keys()
+        assert token not in key
+        assert len(key) == 64
@@ -0,0 +1,61 @@
+"""Tests for api/scripts/maintain_partitions.py (unit-level, no live DB)."""
+
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from app.config import AnalyticsSettings
+from app.repositories.analytics import AnalyticsRepository
+from scripts.maintain_partitions import maintain_partitions
+
+
+def _make_db(
+    created: int = 2, expired: list[str] | None = None, stray: int = 0
+):
+    db = MagicMock()
+    db.fetch_one = AsyncMock(
+        side_effect=[{"created": created}, {"events": stray}]
+    )
+    db.fetch_all = AsyncMock(
+        return_value=[{"name": n} for n in (expired or [])]
+    )
+    return db
+
+
+def test_creates_ahead_and_detaches_by_default():
+    db = _make_db(created=2, expired=["usage_events_2023_01"])
+    settings = AnalyticsSettings(partitions_ahead_months=4, retention_months=6)
+
+    created, expired, stray = asyncio.run(
+        maintain_partitions(AnalyticsRepository(db), settings)
+    )
+
+    assert created == 2
+    assert expired == ["usage_events_2023_01"]
+    assert stray == 0
+    create_call = db.fetch_one.call_args_list[0]
+    assert create_call[0][1:] == (4,)
+    assert "usage_events_create_partitions" in create_call[0][0]
+    assert db.fetch_all.call_args[0][1:] == (6, True)
+
+
+def test_drop_action_disables_detach_only():
+    db = _make_db()
+    settings = AnalyticsSettings(retention_action="drop")
+
+    asyncio.run(maintain_partitions(AnalyticsRepository(db), settings))
+
+    assert "usage_events_expire_partitions" in db.fetch_all.call_args[0][0]
+    assert db.fetch_all.call_args[0][2] is False
+
+
+def test_reports_events_left_in_default_partition():
+    db = _make_db(stray=7)
+
+    _, _, stray = asyncio.run(
+        maintain_partitions(AnalyticsRepository(db), AnalyticsSettings())
+    )
+
+    assert stray == 7
+    assert "usage_events_default" in db.fetch_one.call_args[0][0]
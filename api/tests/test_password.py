@@ -0,0 +1,84 @@
+"""Tests for password hashing and the bounded hashing pool."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+
+from app.security.password import HashingPool, PasswordManager
+
+
+class TestAsyncHashing:
+    def test_hash_and_verify_round_trip_in_pool(self):
+        pool = HashingPool(max_workers=2)
+        manager = PasswordManager(pool=pool)
+
+        async def run():
+            hashed = await manager.hash_async("correct horse")
+            return (
+                hashed,
+                await manager.verify_async("correct horse", hashed),
+                await manager.verify_async("wrong", hashed),
+            )
+
+        try:
+            hashed, ok, bad = asyncio.run(run())
+        finally:
+            pool.shutdown()
+
+        assert hashed.startswith("$argon2")
+        assert ok is True
+        assert bad is False
+        assert pool.get_status()["completed"] == 3
+
+    def test_without_pool_still_off_loop(self):
+        manager = PasswordManager()
+        hashed = manager.hash("secret-pass")
+        assert asyncio.run(manager.verify_async("secret-pass", hashed)) is True
+
+
+class TestHashingPool:
+    def test_concurrency_cap_queues_callers(self):
+        pool = HashingPool(max_workers=4, max_concurrency=1)
+        release = threading.Event()
+
+        async def run():
+            first = asyncio.create_task(pool.run(release.wait, 5))
+            second = asyncio.create_task(pool.run(release.wait, 5))
+            for _ in range(100):
+                await asyncio.sleep(0.01)
+                if pool.get_status()["in_flight"] == 1:
+                    break
+            status = pool.get_status()
+            release.set()
+            await asyncio.gather(first, second)
+            return status
+
+        try:
+            status = asyncio.run(run())
+        finally:
+            pool.shutdown()
+
+        assert status["in_flight"] == 1
+        assert status["queued"] == 1
+        assert status["max_concurrency"] == 1
+        assert pool.get_status() == {
+            "queued": 0,
+            "in_flight": 0,
+            "max_concurrency": 1,
+            "completed": 2,
+        }
+
+    def test_executor_is_only_started_by_work(self):
+        pool = HashingPool(max_workers=2)
+        assert pool._executor is None
+
+        pool.shutdown()
+        assert pool._executor is None
+
+        try:
+            assert asyncio.run(pool.run(sum, [1, 2])) == 3
+            assert pool._executor is not None
+        finally:
+            pool.shutdown()
+        assert pool._executor is None
@@ -4,7 +4,10 @@ These tests exercise:
 - Tier selection (auth routes per-IP, authenticated per-user, unauthenticated
   per-IP) and verify the correct Redis key scope and limit are used.
 - ``X-RateLimit-*`` response headers on both allowed and rejected requests.
+- The sliding window counter algorithm's script and key prefix.
+- The Lua script is invoked via EVALSHA and reloaded on NOSCRIPT.
 - HTTP 429 when the Lua script signals that the limit has been exceeded.
+- Headers injected into streaming responses.
 - Redis-unavailable pass-through (no headers, no 429).
 """
 
@@ -14,11 +17,19 @@ import time
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
 from fastapi.testclient import TestClient
-from jose import jwt
+from redis.exceptions import NoScriptError
 
-from app.middleware.rate_limit import RateLimitMiddleware
+from app.middleware.rate_limit import (
+    _RATE_LIMIT_LUA,
+    RATE_LIMIT_COUNTER_SCRIPT,
+    RATE_LIMIT_SCRIPT,
+    RateLimitMiddleware,
+)
+from app.providers.redis import RedisProvider
+from app.security.jwt import JWTManager
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -29,8 +40,8 @@ _JWT_ALGORITHM = "HS256"
 
 
 def _make_token(sub: str = "user-uuid-1234") -> str:
-    """Return a signed JWT with the given ``sub`` claim."""
-    return jwt.encode({"sub": sub}, _JWT_SECRET, algorithm=_JWT_ALGORITHM)
+    """Return a signed access token with the given ``sub`` claim."""
+    return JWTManager(_JWT_SECRET, _JWT_ALGORITHM, 15, 7).create_access_token(sub)
 
 
 def _lua_result(count: int, remaining: int, reset_ts: int | None = None):
@@ -41,16 +52,16 @@ def _lua_result(count: int, remaining: int, reset_ts: int | None = None):
 
 
 def _make_redis_mock(count: int = 1, remaining: int = 59, reset_ts: int | None = None):
-    """Return an AsyncMock Redis client whose ``eval`` simulates the Lua script."""
+    """Return an AsyncMock Redis client whose ``evalsha`` simulates the Lua script."""
     client = AsyncMock()
-    client.eval = AsyncMock(return_value=_lua_result(count, remaining, reset_ts))
+    client.evalsha = AsyncMock(return_value=_lua_result(count, remaining, reset_ts))
     return client
 
 
 def _make_provider_mock(redis_client):
-    """Return a mock RedisProvider with the given underlying client."""
-    provider = MagicMock()
-    type(provider).client = property(lambda self: redis_client)
+    """Return a RedisProvider wired to the given mock client."""
+    provider = RedisProvider("localhost", 6379)
+    provider._client = redis_client
     return provider
 
 
@@ -73,18 +84,54 @@ def app():
     async def login():
         return {"token": "fake"}
 
+    @_app.get("/whoami")
+    async def whoami(request: Request):
+        payload = getattr(request.state, "token_payload", None)
+        return {"sub": payload.sub if payload else None}
+
+    @_app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"chunk-{i}\n"
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
     return _app
 
 
-@pytest.fixture()
-def client(app):
-    """TestClient wrapping the minimal app, with JWT_SECRET_KEY set."""
-    mock_settings = MagicMock(
+def _mock_settings(algorithm: str = "sliding_log"):
+    return MagicMock(
         jwt_secret_key=_JWT_SECRET,
         jwt_algorithm=_JWT_ALGORITHM,
-        rate_limit=MagicMock(unauthenticated=60, authenticated=200, window_seconds=60),
+        jwt_access_token_expire_minutes=15,
+        jwt_refresh_token_expire_days=7,
+        rate_limit=MagicMock(
+            unauthenticated=60,
+            authenticated=200,
+            window_seconds=60,
+            algorithm=algorithm,
+        ),
     )
-    with patch("app.middleware.rate_limit.get_settings", return_value=mock_settings):
+
+
+@pytest.fixture()
+def client(app):
+    """TestClient wrapping the minimal app, with JWT_SECRET_KEY set."""
+    with patch(
+        "app.middleware.rate_limit.get_settings", return_value=_mock_settings()
+    ):
+        with TestClient(app, raise_server_exceptions=True) as tc:
+            yield tc
+
+
+@pytest.fixture()
+def counter_client(app):
+    """TestClient for the app with the sliding window counter selected."""
+    with patch(
+        "app.middleware.rate_limit.get_settings",
+        return_value=_mock_settings("sliding_window_counter"),
+    ):
         with TestClient(app, raise_server_exceptions=True) as tc:
             yield tc
 
@@ -128,12 +175,12 @@ class TestUnauthenticatedTier:
         assert resp.headers["X-RateLimit-Reset"] == str(reset_ts)
         assert resp.json()["detail"] == "Rate limit exceeded. Try again later."
 
-    def test_lua_eval_called_with_correct_key_scope(self, client, app):
+    def test_lua_evalsha_called_with_correct_key_scope(self, client, app):
         redis_client = _make_redis_mock()
         _set_redis(app, redis_client)
         client.get("/health")
-        call_args = redis_client.eval.call_args
-        # KEYS[1] is the first positional arg after the script and numkeys
+        call_args = redis_client.evalsha.call_args
+        # KEYS[1] is the first positional arg after the SHA and numkeys
         key = call_args[0][2]
         assert key.startswith("rl:ip:"), f"Unexpected key scope in: {key}"
         assert key.endswith(":global"), f"Unexpected route prefix in: {key}"
@@ -154,18 +201,31 @@ class TestAuthenticatedTier:
         assert resp.headers["X-RateLimit-Limit"] == "200"
         assert resp.headers["X-RateLimit-Remaining"] == "199"
 
-    def test_lua_eval_called_with_user_scope_and_uuid(self, client, app):
+    def test_lua_evalsha_called_with_user_scope_and_uuid(self, client, app):
         redis_client = _make_redis_mock()
         _set_redis(app, redis_client)
         user_id = "user-uuid-abc"
         token = _make_token(sub=user_id)
         client.get("/health", headers={"Authorization": f"Bearer {token}"})
-        call_args = redis_client.eval.call_args
+        call_args = redis_client.evalsha.call_args
         key = call_args[0][2]
         assert key.startswith("rl:user:"), f"Expected user scope, got: {key}"
         assert user_id in key, f"Expected user UUID in key: {key}"
         assert key.endswith(":global"), f"Expected global route prefix: {key}"
 
+    def test_decoded_payload_exposed_on_request_state(self, client, app):
+        _set_redis(app, _make_redis_mock())
+        token = _make_token(sub="user-uuid-state")
+        resp = client.get("/whoami", headers={"Authorization": f"Bearer {token}"})
+        assert resp.json() == {"sub": "user-uuid-state"}
+
+    def test_invalid_token_falls_back_to_ip_scope(self, client, app):
+        redis_client = _make_redis_mock()
+        _set_redis(app, redis_client)
+        client.get("/whoami", headers={"Authorization": "Bearer not-a-jwt"})
+        key = redis_client.evalsha.call_args[0][2]
+        assert key.startswith("rl:ip:"), f"Expected IP scope: {key}"
+
     def test_429_for_authenticated_user(self, client, app):
         reset_ts = int(time.time()) + 10
         _set_redis(app, _make_redis_mock(count=200, remaining=-1, reset_ts=reset_ts))
@@ -201,12 +261,81 @@ class TestAuthRouteTier:
         redis_client = _make_redis_mock()
         _set_redis(app, redis_client)
         client.get("/api/v1/auth/login")
-        call_args = redis_client.eval.call_args
+        call_args = redis_client.evalsha.call_args
         key = call_args[0][2]
         assert key.startswith("rl:ip:"), f"Expected IP scope: {key}"
         assert "/api/v1/auth/login" in key, f"Expected route path in key: {key}"
 
 
+# ---------------------------------------------------------------------------
+# Tests: EVALSHA script caching
+# ---------------------------------------------------------------------------
+
+
+class TestScriptCaching:
+    def test_script_invoked_by_sha(self, client, app):
+        redis_client = _make_redis_mock()
+        _set_redis(app, redis_client)
+        client.get("/health")
+        sha = app.state.redis_provider._scripts[RATE_LIMIT_SCRIPT][1]
+        assert redis_client.evalsha.call_args[0][0] == sha
+        redis_client.eval.assert_not_called()
+
+    def test_noscript_reloads_and_retries(self, client, app):
+        redis_client = _make_redis_mock(count=1, remaining=59)
+        redis_client.evalsha.side_effect = [
+            NoScriptError("NOSCRIPT No matching script."),
+            _lua_result(1, 59),
+        ]
+        _set_redis(app, redis_client)
+        resp = client.get("/health")
+        assert resp.status_code == 200
+        assert resp.headers["X-RateLimit-Remaining"] == "59"
+        redis_client.script_load.assert_awaited_once_with(_RATE_LIMIT_LUA)
+        assert redis_client.evalsha.await_count == 2
+
+
+# ---------------------------------------------------------------------------
+# Tests: sliding window counter algorithm
+# ---------------------------------------------------------------------------
+
+
+class TestSlidingWindowCounter:
+    def test_counter_script_and_key_prefix(self, counter_client, app):
+        redis_client = _make_redis_mock(count=1, remaining=59)
+        _set_redis(app, redis_client)
+        resp = counter_client.get("/health")
+        assert resp.status_code == 200
+        assert resp.headers["X-RateLimit-Remaining"] == "59"
+        sha, numkeys, key, *args = redis_client.evalsha.call_args[0]
+        assert sha == app.state.redis_provider._scripts[RATE_LIMIT_COUNTER_SCRIPT][1]
+        assert numkeys == 1
+        assert key.startswith("rlc:ip:") and key.endswith(":global")
+        # now_ms, max_requests, window_seconds – no per-request member id.
+        assert args[1:] == [60, 60]
+
+    def test_counter_429(self, counter_client, app):
+        _set_redis(app, _make_redis_mock(count=60, remaining=-1))
+        resp = counter_client.get("/health")
+        assert resp.status_code == 429
+        assert resp.headers["X-RateLimit-Remaining"] == "0"
+
+
+# ---------------------------------------------------------------------------
+# Tests: streaming responses
+# ---------------------------------------------------------------------------
+
+
+class TestStreamingResponse:
+    def test_headers_added_to_streaming_response(self, client, app):
+        _set_redis(app, _make_redis_mock(count=1, remaining=59))
+        resp = client.get("/stream")
+        assert resp.status_code == 200
+        assert resp.text == "chunk-0\nchunk-1\nchunk-2\n"
+        assert resp.headers["X-RateLimit-Limit"] == "60"
+        assert resp.headers["X-RateLimit-Remaining"] == "59"
+
+
 # ---------------------------------------------------------------------------
 # Tests: Redis unavailable pass-through
 # ---------------------------------------------------------------------------
@@ -0,0 +1,124 @@
+"""Tests for the in-process user cache in front of UserRepository."""
+
+from __future__ import annotations
+
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+from app.repositories.user import UserRepository
+from app.repositories.user_cache import INVALIDATION_CHANNEL, UserCache
+
+_USER_ID = str(uuid.uuid4())
+
+_USER_ROW = {
+    "id": uuid.UUID(_USER_ID),
+    "email": "test@example.com",
+    "name": "Test User",
+    "avatar_url": None,
+    "password_hash": None,
+    "provider": "email",
+    "is_active": True,
+    "is_verified": False,
+    "created_at": datetime(2024, 1, 1, tzinfo=timezone.utc),
+    "updated_at": datetime(2024, 1, 1, tzinfo=timezone.utc),
+}
+
+
+def _make_db():
+    db = MagicMock()
+    db.fetch_one = AsyncMock(return_value=dict(_USER_ROW))
+    db.execute = AsyncMock(return_value="UPDATE 1")
+    return db
+
+
+class TestCachedLookup:
+    def test_second_lookup_skips_database(self):
+        db = _make_db()
+        repo = UserRepository(db, cache=UserCache())
+
+        async def run():
+            first = await repo.get_by_id(_USER_ID)
+            second = await repo.get_by_id(_USER_ID)
+            return first, second
+
+        first, second = asyncio.run(run())
+        assert first.email == second.email == "test@example.com"
+        assert db.fetch_one.await_count == 1
+
+    def test_without_cache_always_queries(self):
+        db = _make_db()
+        repo = UserRepository(db)
+
+        async def run():
+            await repo.get_by_id(_USER_ID)
+            await repo.get_by_id(_USER_ID)
+
+        asyncio.run(run())
+        assert db.fetch_one.await_count == 2
+
+    def test_missing_user_is_not_cached(self):
+        db = _make_db()
+        db.fetch_one = AsyncMock(return_value=None)
+        cache = UserCache()
+        repo = UserRepository(db, cache=cache)
+        assert asyncio.run(repo.get_by_id(_USER_ID)) is None
+        assert cache.get(_USER_ID) is None
+
+
+class TestInvalidation:
+    def test_writes_evict_and_publish(self):
+        redis = MagicMock()
+        redis.publish = AsyncMock(return_value=1)
+        cache = UserCache(redis=redis)
+        db = _make_db()
+        repo = UserRepository(db, cache=cache)
+
+        async def run():
+            for write in (
+                lambda: repo.update_password(_USER_ID, "new-hash"),
+                lambda: repo.mark_verified(_USER_ID),
+            ):
+                await repo.get_by_id(_USER_ID)
+                assert cache.get(_USER_ID) is not None
+                await write()
+                assert cache.get(_USER_ID) is None
+
+        asyncio.run(run())
+        assert redis.publish.await_count == 2
+        redis.publish.assert_awaited_with(INVALIDATION_CHANNEL, _USER_ID)
+
+    def test_publish_failure_is_swallowed(self):
+        redis = MagicMock()
+        redis.publish = AsyncMock(side_effect=ConnectionError("down"))
+        cache = UserCache(redis=redis)
+        asyncio.run(cache.invalidate(_USER_ID))
+
+    def test_listener_evicts_announced_users(self):
+        other_id = str(uuid.uuid4())
+
+        async def messages(channel):
+            assert channel == INVALIDATION_CHANNEL
+            yield _USER_ID
+            await asyncio.Event().wait()
+
+        redis = MagicMock()
+        redis.subscribe = messages
+        cache = UserCache(redis=redis)
+
+        async def run():
+            repo = UserRepository(_make_db(), cache=cache)
+            await repo.get_by_id(_USER_ID)
+            row = dict(_USER_ROW, id=uuid.UUID(other_id))
+            repo._db.fetch_one = AsyncMock(return_value=row)
+            await repo.get_by_id(other_id)
+
+            listener = asyncio.create_task(cache.listen())
+            await asyncio.sleep(0)
+            listener.cancel()
+            return cache.get(_USER_ID), cache.get(other_id)
+
+        evicted, kept = asyncio.run(run())
+        assert evicted is None
+        assert kept is not None
@@ -0,0 +1,136 @@
+-- Analytics: range-partition usage_events by month
+--
+-- usage_events becomes a partitioned table with one partition per calendar
+-- month (UTC), named usage_events_YYYY_MM.  A composite
+-- (user_id, created_at DESC) index is declared on the parent so every
+-- partition gets one, turning "recent events for a user" into an index range
+-- scan over the newest partitions instead of a sort over the whole heap.
+--
+-- Partitions are managed with two functions, called by
+-- `python -m scripts.maintain_partitions`:
+--   usage_events_create_partitions(months_ahead, from_month)
+--   usage_events_expire_partitions(retention_months, detach_only)
+
+-- ---------------------------------------------------------------------------
+-- Partition management
+-- ---------------------------------------------------------------------------
+
+-- Create any missing monthly partitions from from_month up to
+-- months_ahead months after the current month.  Returns the number created.
+CREATE OR REPLACE FUNCTION usage_events_create_partitions(
+    months_ahead INTEGER DEFAULT 3,
+    from_month   DATE    DEFAULT (NOW() AT TIME ZONE 'UTC')::date
+) RETURNS INTEGER AS $$
+DECLARE
+    month_start    DATE := date_trunc('month', from_month)::date;
+    last_month     DATE := (
+        date_trunc('month', NOW() AT TIME ZONE 'UTC')
+        + make_interval(months => months_ahead)
+    )::date;
+    partition_name TEXT;
+    created        INTEGER := 0;
+BEGIN
+    WHILE month_start <= last_month LOOP
+        partition_name := 'usage_events_' || to_char(month_start, 'YYYY_MM');
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF usage_events '
+                'FOR VALUES FROM (%L) TO (%L)',
+                partition_name,
+                month_start::timestamp AT TIME ZONE 'UTC',
+                (month_start + INTERVAL '1 month')::timestamp AT TIME ZONE 'UTC'
+            );
+            created := created + 1;
+        END IF;
+        month_start := (month_start + INTERVAL '1 month')::date;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Detach (or drop) every monthly partition that ends before the start of
+-- the month retention_months before the current one.  Detached partitions
+-- keep their name and can be archived or dropped later.  Returns the names
+-- of the affected partitions.
+CREATE OR REPLACE FUNCTION usage_events_expire_partitions(
+    retention_months INTEGER,
+    detach_only      BOOLEAN DEFAULT TRUE
+) RETURNS SETOF TEXT AS $$
+DECLARE
+    cutoff DATE := (
+        date_trunc('month', NOW() AT TIME ZONE 'UTC')
+        - make_interval(months => retention_months)
+    )::date;
+    part   RECORD;
+BEGIN
+    FOR part IN
+        SELECT c.relname
+        FROM   pg_inherits i
+        JOIN   pg_class c ON c.oid = i.inhrelid
+        WHERE  i.inhparent = 'usage_events'::regclass
+          AND  c.relname ~ '^usage_events_[0-9]{4}_[0-9]{2}$'
+          AND  to_date(right(c.relname, 7), 'YYYY_MM') < cutoff
+        ORDER  BY c.relname
+    LOOP
+        IF detach_only THEN
+            EXECUTE format(
+                'ALTER TABLE usage_events DETACH PARTITION %I', part.relname
+            );
+        ELSE
+            EXECUTE format('DROP TABLE %I', part.relname);
+        END IF;
+        RETURN NEXT part.relname;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ---------------------------------------------------------------------------
+-- Convert the existing table
+-- ---------------------------------------------------------------------------
+
+BEGIN;
+
+ALTER TABLE usage_events RENAME TO usage_events_unpartitioned;
+ALTER TABLE usage_events_unpartitioned
+    RENAME CONSTRAINT usage_events_pkey TO usage_events_unpartitioned_pkey;
+DROP INDEX idx_usage_events_user_id;
+DROP INDEX idx_usage_events_event_type;
+DROP INDEX idx_usage_events_created_at;
+
+-- The partition key must be part of the primary key.
+CREATE TABLE usage_events (
+    id          UUID NOT NULL DEFAULT gen_random_uuid(),
+    user_id     UUID REFERENCES users(id) ON DELETE SET NULL,
+    event_type  VARCHAR(100) NOT NULL,
+    provider    VARCHAR(50),
+    model       VARCHAR(100),
+    tokens_used INTEGER,
+    latency_ms  INTEGER,
+    metadata    JSONB NOT NULL DEFAULT '{}',
+    created_at  TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE INDEX idx_usage_events_user_created
+    ON usage_events (user_id, created_at DESC);
+CREATE INDEX idx_usage_events_event_type ON usage_events (event_type);
+
+SELECT usage_events_create_partitions(
+    3,
+    COALESCE(
+        (SELECT (MIN(created_at) AT TIME ZONE 'UTC')::date
+         FROM usage_events_unpartitioned),
+        (NOW() AT TIME ZONE 'UTC')::date
+    )
+);
+
+INSERT INTO usage_events
+    (id, user_id, event_type, provider, model,
+     tokens_used, latency_ms, metadata, created_at)
+SELECT id, user_id, event_type, provider, model,
+       tokens_used, latency_ms, metadata, created_at
+FROM   usage_events_unpartitioned;
+
+DROP TABLE usage_events_unpartitioned;
+
+COMMIT;
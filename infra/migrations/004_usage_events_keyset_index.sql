@@ -0,0 +1,12 @@
+-- Analytics: keyset pagination index for usage_events
+--
+-- GET /api/v1/analytics/events pages on (created_at, id) descending.  Adding
+-- id to the per-user index lets the row comparison
+--   (created_at, id) < ($cursor_created_at, $cursor_id)
+-- become an index bound, so every page is a short range scan regardless of
+-- how deep the client has paged.
+
+CREATE INDEX IF NOT EXISTS idx_usage_events_user_created_id
+    ON usage_events (user_id, created_at DESC, id DESC);
+
+DROP INDEX IF EXISTS idx_usage_events_user_created;
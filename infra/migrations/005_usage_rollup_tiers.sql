@@ -0,0 +1,106 @@
+-- Analytics: hourly and monthly rollups alongside daily_usage_stats
+--
+-- All three tiers are maintained by the same upsert that records an event's
+-- daily increment (AnalyticsRepository.upsert_daily_stats[_batch]).  Summary
+-- reads take whole months from monthly_usage_stats and only the edge days
+-- from daily_usage_stats; hourly_usage_stats serves intra-day breakdowns.
+--
+-- Hours are UTC hour starts, months are the first day of the UTC month.
+--
+-- Rolling out to an existing deployment:
+--   1. apply this migration (backfills both tiers);
+--   2. roll out the application version that writes them;
+--   3. re-run the two backfill statements below to pick up events recorded
+--      by instances that were still writing only daily_usage_stats during
+--      the rollout.  Without this, summaries that read whole months from
+--      monthly_usage_stats stay too low for those months.  The statements
+--      recompute rows from usage_events and daily_usage_stats, so they are
+--      idempotent.
+
+-- Sum two {event_type: count} JSONB objects key by key.
+CREATE OR REPLACE FUNCTION usage_counts_merge(a JSONB, b JSONB)
+RETURNS JSONB AS $$
+    SELECT COALESCE(jsonb_object_agg(key, cnt), '{}'::jsonb)
+    FROM (
+        SELECT key, SUM(value::bigint) AS cnt
+        FROM (
+            SELECT * FROM jsonb_each_text(COALESCE(a, '{}'::jsonb))
+            UNION ALL
+            SELECT * FROM jsonb_each_text(COALESCE(b, '{}'::jsonb))
+        ) merged
+        GROUP BY key
+    ) sub
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE TABLE hourly_usage_stats (
+    user_id         UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    hour            TIMESTAMPTZ NOT NULL,
+    total_events    INTEGER NOT NULL DEFAULT 0,
+    total_tokens    BIGINT NOT NULL DEFAULT 0,
+    events_by_type  JSONB NOT NULL DEFAULT '{}',
+    PRIMARY KEY (user_id, hour)
+);
+
+CREATE TABLE monthly_usage_stats (
+    user_id         UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    month           DATE NOT NULL CHECK (EXTRACT(DAY FROM month) = 1),
+    total_events    BIGINT NOT NULL DEFAULT 0,
+    total_tokens    BIGINT NOT NULL DEFAULT 0,
+    events_by_type  JSONB NOT NULL DEFAULT '{}',
+    PRIMARY KEY (user_id, month)
+);
+
+-- Backfill from the existing data (safe to re-run).
+INSERT INTO hourly_usage_stats
+    (user_id, hour, total_events, total_tokens, events_by_type)
+SELECT user_id, hour, SUM(cnt), SUM(tokens), jsonb_object_agg(event_type, cnt)
+FROM (
+    SELECT user_id,
+           date_trunc('hour', created_at AT TIME ZONE 'UTC')
+               AT TIME ZONE 'UTC'          AS hour,
+           event_type,
+           COUNT(*)                         AS cnt,
+           COALESCE(SUM(tokens_used), 0)    AS tokens
+    FROM   usage_events
+    WHERE  user_id IS NOT NULL
+    GROUP  BY 1, 2, 3
+) per_type
+GROUP BY user_id, hour
+ON CONFLICT (user_id, hour) DO UPDATE SET
+    total_events   = EXCLUDED.total_events,
+    total_tokens   = EXCLUDED.total_tokens,
+    events_by_type = EXCLUDED.events_by_type;
+
+INSERT INTO monthly_usage_stats
+    (user_id, month, total_events, total_tokens, events_by_type)
+WITH totals AS (
+    SELECT user_id,
+           date_trunc('month', date)::date AS month,
+           SUM(total_events)                AS total_events,
+           SUM(total_tokens)                AS total_tokens
+    FROM   daily_usage_stats
+    WHERE  user_id IS NOT NULL
+    GROUP  BY 1, 2
+),
+per_type AS (
+    SELECT d.user_id,
+           date_trunc('month', d.date)::date AS month,
+           t.key,
+           SUM(t.value::bigint)               AS cnt
+    FROM   daily_usage_stats d, jsonb_each_text(d.events_by_type) t
+    WHERE  d.user_id IS NOT NULL
+    GROUP  BY 1, 2, 3
+),
+by_type AS (
+    SELECT user_id, month, jsonb_object_agg(key, cnt) AS events_by_type
+    FROM   per_type
+    GROUP  BY 1, 2
+)
+SELECT totals.user_id, totals.month, totals.total_events, totals.total_tokens,
+       COALESCE(by_type.events_by_type, '{}'::jsonb)
+FROM   totals
+LEFT   JOIN by_type USING (user_id, month)
+ON CONFLICT (user_id, month) DO UPDATE SET
+    total_events   = EXCLUDED.total_events,
+    total_tokens   = EXCLUDED.total_tokens,
+    events_by_type = EXCLUDED.events_by_type;
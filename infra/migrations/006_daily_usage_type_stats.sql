@@ -0,0 +1,74 @@
+-- Analytics: columnar per-type daily counters
+--
+-- Alternative storage for the daily tier, selected with
+-- ANALYTICS_STATS_STORAGE=columnar.  Each (user_id, date, event_type) gets
+-- one row of plain integers, so an upsert only touches two non-indexed
+-- columns of a narrow tuple.  With free space left on each page
+-- (fillfactor) these updates are HOT and never rewrite a JSONB document.
+--
+-- daily_usage_type_rollup presents the table in the daily_usage_stats shape
+-- so the read path and the API response stay unchanged.
+--
+-- Switching an existing deployment:
+--   1. apply this migration (backfills from usage_events);
+--   2. set ANALYTICS_STATS_STORAGE=columnar and roll out;
+--   3. re-run the backfill statements below to pick up events recorded by
+--      instances that were still writing daily_usage_stats during the
+--      rollout.  The first recomputes rows from usage_events, so it is
+--      idempotent.
+--
+-- Days whose raw events have already been expired by partition retention
+-- are copied from daily_usage_stats.events_by_type by the second statement,
+-- which only fills days the first one left empty.  daily_usage_stats does
+-- not split tokens by type, so such a day's total_tokens is recorded on its
+-- alphabetically first event type; the rollup view's totals stay exact.
+
+CREATE TABLE daily_usage_type_stats (
+    user_id      UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    date         DATE NOT NULL,
+    event_type   VARCHAR(100) NOT NULL,
+    event_count  BIGINT NOT NULL DEFAULT 0,
+    total_tokens BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, date, event_type)
+) WITH (fillfactor = 80);
+
+CREATE VIEW daily_usage_type_rollup AS
+SELECT user_id,
+       date,
+       SUM(event_count)                        AS total_events,
+       SUM(total_tokens)                       AS total_tokens,
+       jsonb_object_agg(event_type, event_count) AS events_by_type
+FROM   daily_usage_type_stats
+GROUP  BY user_id, date;
+
+-- Backfill (safe to re-run).
+INSERT INTO daily_usage_type_stats
+    (user_id, date, event_type, event_count, total_tokens)
+SELECT user_id,
+       (created_at AT TIME ZONE 'UTC')::date,
+       event_type,
+       COUNT(*),
+       COALESCE(SUM(tokens_used), 0)
+FROM   usage_events
+WHERE  user_id IS NOT NULL
+GROUP  BY 1, 2, 3
+ON CONFLICT (user_id, date, event_type) DO UPDATE SET
+    event_count  = EXCLUDED.event_count,
+    total_tokens = EXCLUDED.total_tokens;
+
+INSERT INTO daily_usage_type_stats
+    (user_id, date, event_type, event_count, total_tokens)
+SELECT d.user_id,
+       d.date,
+       t.key,
+       t.value::bigint,
+       CASE WHEN t.key = MIN(t.key) OVER (PARTITION BY d.user_id, d.date)
+            THEN d.total_tokens ELSE 0 END
+FROM   daily_usage_stats d, jsonb_each_text(d.events_by_type) t
+WHERE  d.user_id IS NOT NULL
+AND    NOT EXISTS (
+           SELECT 1
+           FROM   daily_usage_type_stats s
+           WHERE  s.user_id = d.user_id AND s.date = d.date
+       )
+ON CONFLICT (user_id, date, event_type) DO NOTHING;
@@ -0,0 +1,118 @@
+-- Analytics: columnar per-type hourly and monthly counters
+--
+-- Extends the columnar layout of 006 to the other two rollup tiers, so with
+-- ANALYTICS_STATS_STORAGE=columnar no tier rewrites an events_by_type JSONB
+-- document per event: every upsert is an integer increment on a narrow
+-- (user, period, event_type) row, HOT thanks to the fillfactor.
+--
+-- hourly_usage_type_rollup and monthly_usage_type_rollup present the tables
+-- in the hourly_usage_stats / monthly_usage_stats shape, so the read path
+-- and the API response stay unchanged.
+--
+-- Switching an existing deployment: as for 006, apply this migration, set
+-- ANALYTICS_STATS_STORAGE=columnar and roll out, then re-run the backfill
+-- statements below to pick up events recorded by instances still writing
+-- the JSONB tiers during the rollout.  The usage_events backfills recompute
+-- rows, so they are idempotent.
+--
+-- Hours and months whose raw events have already been expired by partition
+-- retention are copied from the JSONB tiers' events_by_type, as in 006:
+-- only periods the usage_events backfill left empty are filled, and each
+-- period's total_tokens is recorded on its alphabetically first event type.
+
+CREATE TABLE hourly_usage_type_stats (
+    user_id      UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    hour         TIMESTAMPTZ NOT NULL,
+    event_type   VARCHAR(100) NOT NULL,
+    event_count  BIGINT NOT NULL DEFAULT 0,
+    total_tokens BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, hour, event_type)
+) WITH (fillfactor = 80);
+
+CREATE TABLE monthly_usage_type_stats (
+    user_id      UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    month        DATE NOT NULL CHECK (EXTRACT(DAY FROM month) = 1),
+    event_type   VARCHAR(100) NOT NULL,
+    event_count  BIGINT NOT NULL DEFAULT 0,
+    total_tokens BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, month, event_type)
+) WITH (fillfactor = 80);
+
+CREATE VIEW hourly_usage_type_rollup AS
+SELECT user_id,
+       hour,
+       SUM(event_count)                          AS total_events,
+       SUM(total_tokens)                         AS total_tokens,
+       jsonb_object_agg(event_type, event_count) AS events_by_type
+FROM   hourly_usage_type_stats
+GROUP  BY user_id, hour;
+
+CREATE VIEW monthly_usage_type_rollup AS
+SELECT user_id,
+       month,
+       SUM(event_count)                          AS total_events,
+       SUM(total_tokens)                         AS total_tokens,
+       jsonb_object_agg(event_type, event_count) AS events_by_type
+FROM   monthly_usage_type_stats
+GROUP  BY user_id, month;
+
+-- Backfill (safe to re-run).
+INSERT INTO hourly_usage_type_stats
+    (user_id, hour, event_type, event_count, total_tokens)
+SELECT user_id,
+       date_trunc('hour', created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+       event_type,
+       COUNT(*),
+       COALESCE(SUM(tokens_used), 0)
+FROM   usage_events
+WHERE  user_id IS NOT NULL
+GROUP  BY 1, 2, 3
+ON CONFLICT (user_id, hour, event_type) DO UPDATE SET
+    event_count  = EXCLUDED.event_count,
+    total_tokens = EXCLUDED.total_tokens;
+
+INSERT INTO monthly_usage_type_stats
+    (user_id, month, event_type, event_count, total_tokens)
+SELECT user_id,
+       date_trunc('month', created_at AT TIME ZONE 'UTC')::date,
+       event_type,
+       COUNT(*),
+       COALESCE(SUM(tokens_used), 0)
+FROM   usage_events
+WHERE  user_id IS NOT NULL
+GROUP  BY 1, 2, 3
+ON CONFLICT (user_id, month, event_type) DO UPDATE SET
+    event_count  = EXCLUDED.event_count,
+    total_tokens = EXCLUDED.total_tokens;
+
+INSERT INTO hourly_usage_type_stats
+    (user_id, hour, event_type, event_count, total_tokens)
+SELECT h.user_id,
+       h.hour,
+       t.key,
+       t.value::bigint,
+       CASE WHEN t.key = MIN(t.key) OVER (PARTITION BY h.user_id, h.hour)
+            THEN h.total_tokens ELSE 0 END
+FROM   hourly_usage_stats h, jsonb_each_text(h.events_by_type) t
+WHERE  NOT EXISTS (
+           SELECT 1
+           FROM   hourly_usage_type_stats s
+           WHERE  s.user_id = h.user_id AND s.hour = h.hour
+       )
+ON CONFLICT (user_id, hour, event_type) DO NOTHING;
+
+INSERT INTO monthly_usage_type_stats
+    (user_id, month, event_type, event_count, total_tokens)
+SELECT m.user_id,
+       m.month,
+       t.key,
+       t.value::bigint,
+       CASE WHEN t.key = MIN(t.key) OVER (PARTITION BY m.user_id, m.month)
+            THEN m.total_tokens ELSE 0 END
+FROM   monthly_usage_stats m, jsonb_each_text(m.events_by_type) t
+WHERE  NOT EXISTS (
+           SELECT 1
+           FROM   monthly_usage_type_stats s
+           WHERE  s.user_id = m.user_id AND s.month = m.month
+       )
+ON CONFLICT (user_id, month, event_type) DO NOTHING;
@@ -0,0 +1,70 @@
+-- Analytics: DEFAULT partition for usage_events
+--
+-- Without it, an event whose month has no partition (e.g. when the
+-- maintenance job has not run for ANALYTICS_PARTITIONS_AHEAD_MONTHS) fails
+-- to insert.  Such events now land in usage_events_default, and
+-- usage_events_create_partitions() moves them into their monthly partition
+-- when it creates it: the partition is built detached, filled from the
+-- DEFAULT partition and then attached, since attaching a range that the
+-- DEFAULT partition still holds rows for is rejected.
+--
+-- The function also starts from the oldest month found in the DEFAULT
+-- partition, so months missed entirely while maintenance was not running
+-- get their partition too.  `python -m scripts.maintain_partitions` warns
+-- about rows still left in the DEFAULT partition afterwards.
+
+CREATE TABLE usage_events_default PARTITION OF usage_events DEFAULT;
+
+CREATE OR REPLACE FUNCTION usage_events_create_partitions(
+    months_ahead INTEGER DEFAULT 3,
+    from_month   DATE    DEFAULT (NOW() AT TIME ZONE 'UTC')::date
+) RETURNS INTEGER AS $$
+DECLARE
+    month_start    DATE := date_trunc(
+        'month',
+        LEAST(
+            from_month,
+            (SELECT (MIN(created_at) AT TIME ZONE 'UTC')::date
+             FROM usage_events_default)
+        )
+    )::date;
+    last_month     DATE := (
+        date_trunc('month', NOW() AT TIME ZONE 'UTC')
+        + make_interval(months => months_ahead)
+    )::date;
+    lower_bound    TIMESTAMPTZ;
+    upper_bound    TIMESTAMPTZ;
+    partition_name TEXT;
+    created        INTEGER := 0;
+BEGIN
+    WHILE month_start <= last_month LOOP
+        partition_name := 'usage_events_' || to_char(month_start, 'YYYY_MM');
+        IF to_regclass(partition_name) IS NULL THEN
+            lower_bound := month_start::timestamp AT TIME ZONE 'UTC';
+            upper_bound := (month_start + INTERVAL '1 month')::timestamp
+                           AT TIME ZONE 'UTC';
+            EXECUTE format(
+                'CREATE TABLE %I (LIKE usage_events '
+                'INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                partition_name
+            );
+            EXECUTE format(
+                'WITH moved AS ('
+                '    DELETE FROM usage_events_default'
+                '    WHERE created_at >= %L AND created_at < %L'
+                '    RETURNING *'
+                ') INSERT INTO %I SELECT * FROM moved',
+                lower_bound, upper_bound, partition_name
+            );
+            EXECUTE format(
+                'ALTER TABLE usage_events ATTACH PARTITION %I '
+                'FOR VALUES FROM (%L) TO (%L)',
+                partition_name, lower_bound, upper_bound
+            );
+            created := created + 1;
+        END IF;
+        month_start := (month_start + INTERVAL '1 month')::date;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;